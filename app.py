@@ -1,10 +1,61 @@
+import sqlite3
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import data.catalog as catalog
+import data.session_store as session_store
+import logic.diagnostics as diagnostics
+import logic.session_registry as session_registry
+import logic.snapshot as snapshot
 
 st.set_page_config(layout="wide")
 
+ctx = get_script_run_ctx()
+registry_key = ctx.session_id if ctx is not None else None
+
+# Resume an exam from its snapshot after a reload, a restart or on another
+# replica: the quiz URL carries the session id (see pages/setup.py). A
+# resumed exam takes an exam place like a new one (see the exam cap below).
+resume_id = st.query_params.get("session")
+store = session_store.configured_store()
+if (
+    resume_id
+    and store is not None
+    and not st.session_state.get("session_active")
+    and not st.session_state.get("session_submitted")
+):
+    try:
+        saved = session_store.load_snapshot(store, resume_id)
+        if saved is None:
+            del st.query_params["session"]  # finished or expired
+        elif registry_key and not session_registry.resume_exam_slot(registry_key, resume_id):
+            st.warning(
+                f"All {session_registry.max_active_exams()} exam places are in use. "
+                "Reload this page in a moment to resume your exam."
+            )
+        else:
+            user_record = session_store.load_snapshot(store, snapshot.user_record_id(resume_id))
+            st.session_state.update(
+                snapshot.restore_state(saved, catalog.load_tag_map(), user_record=user_record)
+            )
+    except (OSError, ValueError, sqlite3.Error) as e:
+        st.warning(f"Your previous session could not be resumed: {e}")
+        del st.query_params["session"]
+
+# Track this session for memory estimates, idle eviction and the exam cap
+if ctx is not None:
+    st.session_state._registry_key = registry_key
+    session_registry.touch(registry_key, ctx.session_state)
+
 setup_page = st.Page("pages/setup.py", title="Session Setup", icon="⚙️")
 quiz_page = st.Page("pages/quiz.py", title="Quiz", icon="📝")
 results_page = st.Page("pages/results.py", title="Results", icon="📊")
+study_page = st.Page("pages/study.py", title="Study Browser", icon="📚")
+
+pages = [setup_page, quiz_page, results_page, study_page]
+if diagnostics.admin_token():
+    pages.append(st.Page("pages/diagnostics.py", title="Diagnostics", icon="🩺"))
 
-pg = st.navigation([setup_page, quiz_page, results_page])
+pg = st.navigation(pages)
 pg.run()
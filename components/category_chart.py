@@ -4,18 +4,19 @@ import numpy as np
 import streamlit as st
 
 
-def render_category_chart(category_breakdown: dict) -> None:
+def render_category_chart(category_breakdown: dict, pass_pct: int = 60) -> None:
     """
     Render a horizontal grouped bar chart of session vs cumulative performance.
 
     Args:
         category_breakdown: dict mapping category name →
             {session_points, session_max, cumulative_points, cumulative_max}
+        pass_pct: Pass percentage of the session's exam profile.
 
     Shows:
         - Blue bars: session percentage (session_points / session_max × 100)
         - Green bars: cumulative percentage (cumulative_points / cumulative_max × 100)
-        - Red dashed vertical line at x=60 (60% pass mark)
+        - Red dashed vertical line at x=pass_pct (pass mark)
 
     If the breakdown dict is empty, renders an info message instead.
     """
@@ -50,7 +51,9 @@ def render_category_chart(category_breakdown: dict) -> None:
     ax.barh(y + bar_h / 2, session_pcts, bar_h, label="This Session", color="steelblue")
     ax.barh(y - bar_h / 2, cumulative_pcts, bar_h, label="Cumulative", color="mediumseagreen")
 
-    ax.axvline(x=60, color="red", linestyle="--", linewidth=1.5, label="Pass mark (60%)")
+    ax.axvline(
+        x=pass_pct, color="red", linestyle="--", linewidth=1.5, label=f"Pass mark ({pass_pct}%)"
+    )
 
     ax.set_yticks(y)
     ax.set_yticklabels(categories, fontsize=9)
@@ -0,0 +1,43 @@
+"""components/feedback.py — Practice-mode answer feedback and live score panel."""
+import streamlit as st
+
+_TIER_LABELS = {
+    "best": "Best answer",
+    "second_best": "Second-best answer",
+    "third_best": "Third-best answer",
+    "distractor": "Distractor",
+}
+
+
+def render_answer_feedback(question: dict, answer: dict, points_lookup: dict) -> None:
+    """
+    Show the tier and points of the chosen option, then the rationale for
+    every option, best first.
+    """
+    tier_for_option = {tier["option"]: name for name, tier in question["scoring"].items()}
+    selected = answer["original_option_id"]
+    tier = tier_for_option[selected]
+    message = f"{_TIER_LABELS[tier]} — {answer['points']} / {max(points_lookup.values())} points"
+    if tier == "best":
+        st.success(message, icon="✅")
+    elif answer["points"] > 0:
+        st.warning(message, icon="➗")
+    else:
+        st.error(message, icon="❌")
+
+    for opt_id in sorted(points_lookup, key=points_lookup.get, reverse=True):
+        marker = " ← **your answer**" if opt_id == selected else ""
+        st.markdown(
+            f"**Option {opt_id}** ({points_lookup[opt_id]} pts){marker}: "
+            f"{question['rationale'][f'why_{tier_for_option[opt_id]}']}"
+        )
+    st.caption(question["rationale"]["togaf_reference"])
+
+
+def render_live_score(live: dict) -> None:
+    """Render the running score and per-category bars in the sidebar."""
+    st.sidebar.metric("Score so far", f"{live['total']} / {live['answered_max']}")
+    for name in sorted(live["category_answered_max"]):
+        points = live["breakdown"][name]["session_points"]
+        answered_max = live["category_answered_max"][name]
+        st.sidebar.progress(points / answered_max, text=f"{name}: {points}/{answered_max}")
@@ -0,0 +1,22 @@
+"""components/media.py — Question and case-study images."""
+import streamlit as st
+
+import data.assets as assets
+
+
+def render_media(refs: list) -> None:
+    """
+    Show the images referenced by refs ([{"asset", "caption", "alt"}]).
+
+    Bytes come from the shared cache in data/assets.py and go straight to
+    st.image; nothing is kept in session state. Streamlit serves identical
+    bytes under the same URL, so reruns of the same question do not make the
+    browser download an image again.
+    """
+    for ref in refs:
+        try:
+            _, data = assets.read_asset(ref["asset"], assets.DISPLAY_WIDTH)
+        except LookupError:
+            st.caption(f"Image not available: {ref.get('caption') or ref['asset'][:12]}")
+            continue
+        st.image(data, caption=ref.get("caption") or ref.get("alt") or None)
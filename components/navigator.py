@@ -1,6 +1,10 @@
 """components/navigator.py — Question navigation sidebar widget (T018)."""
 import streamlit as st
 
+# Questions shown per navigator page; long exams are paged so the sidebar
+# always renders a fixed number of widgets regardless of question count.
+PAGE_SIZE = 20
+
 
 def render_navigator(
     questions: list,
@@ -9,30 +13,61 @@ def render_navigator(
     current_idx: int,
 ) -> int | None:
     """
-    Render question navigation buttons in the sidebar.
+    Render a paginated question grid in the sidebar.
+
+    The grid is a single pills widget holding one page of questions, plus a
+    page selector when the session has more than PAGE_SIZE questions, so the
+    sidebar cost stays flat at 8 or 200 questions.
 
-    Button label precedence (highest to lowest):
-        1. current  → "▶ Q{n}"
-        2. flagged  → "🚩 Q{n}"
-        3. answered → "✓ Q{n}"
-        4. unanswered → "○ Q{n}"
+    Label precedence (highest to lowest):
+        1. current  → "▶ {n}"
+        2. flagged  → "🚩 {n}"
+        3. answered → "✓ {n}"
+        4. unanswered → "○ {n}"
 
-    Returns the 0-based index of the clicked button, or None if no click this
+    Returns the 0-based index of the clicked question, or None if no click this
     render cycle. Does not mutate any state.
     """
-    clicked = None
-    for i, q in enumerate(questions):
-        q_id = q["id"]
+    n_pages = (len(questions) + PAGE_SIZE - 1) // PAGE_SIZE
+    current_page = current_idx // PAGE_SIZE
+
+    # Widget keys carry current_idx so both widgets re-initialise to the
+    # current question's page after every navigation.
+    page = current_page
+    if n_pages > 1:
+        page = st.sidebar.selectbox(
+            "Page",
+            options=list(range(n_pages)),
+            index=current_page,
+            format_func=lambda p: (
+                f"Questions {p * PAGE_SIZE + 1}–"
+                f"{min((p + 1) * PAGE_SIZE, len(questions))}"
+            ),
+            key=f"nav_page_{current_idx}",
+            label_visibility="collapsed",
+        )
+
+    def _label(i: int) -> str:
+        q_id = questions[i]["id"]
         if i == current_idx:
-            label = f"▶ Q{i + 1}"
-        elif q_id in flags:
-            label = f"🚩 Q{i + 1}"
-        elif q_id in answers:
-            label = f"✓ Q{i + 1}"
-        else:
-            label = f"○ Q{i + 1}"
-
-        if st.sidebar.button(label, key=f"nav_{i}", use_container_width=True):
-            clicked = i
-
-    return clicked
+            return f"▶ {i + 1}"
+        if q_id in flags:
+            return f"🚩 {i + 1}"
+        if q_id in answers:
+            return f"✓ {i + 1}"
+        return f"○ {i + 1}"
+
+    page_indices = range(page * PAGE_SIZE, min((page + 1) * PAGE_SIZE, len(questions)))
+    selected = st.sidebar.pills(
+        "Questions",
+        options=list(page_indices),
+        format_func=_label,
+        selection_mode="single",
+        default=current_idx if current_idx in page_indices else None,
+        key=f"nav_grid_{current_idx}_{page}",
+        label_visibility="collapsed",
+    )
+
+    if selected is None or selected == current_idx:
+        return None
+    return selected
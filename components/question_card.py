@@ -1,11 +1,14 @@
 """components/question_card.py — Question display widget (T019)."""
 import streamlit as st
 
+from components.media import render_media
+
 
 def render_question_card(
     question: dict,
     shuffled_options: list,
     answer: dict | None,
+    locked: bool = False,
 ) -> None:
     """
     Render question scenario, stem, and answer radio for one question.
@@ -15,11 +18,17 @@ def render_question_card(
         shuffled_options: List of {option_id, text, display_idx} for this question.
         answer:          Current answer dict {display_idx, original_option_id, points}
                          or None if not yet answered.
+        locked:          Disable the radio (practice mode, once feedback is shown).
     """
     if question.get("scenario"):
-        st.info(question["scenario"])
+        # Keyed by case study so consecutive questions sharing a scenario keep
+        # the same element instead of replacing it.
+        with st.container(key=f"case_study_{question['case_study_id']}"):
+            st.info(question["scenario"])
+            render_media(question.get("scenario_media", []))
 
     st.subheader(question["question"])
+    render_media(question.get("media", []))
 
     option_texts = [opt["text"] for opt in shuffled_options]
     current_index = answer["display_idx"] if answer else None
@@ -30,4 +39,5 @@ def render_question_card(
         options=option_texts,
         index=current_index,
         key=q_key,
+        disabled=locked,
     )
@@ -0,0 +1,240 @@
+"""data/assets.py — Content-addressed store for question images and diagrams.
+
+Images live in assets/ next to bank/, one directory per image named by the
+SHA-256 of the original file, with resized variants made when the image is
+added:
+
+    assets/<id>/original.png
+    assets/<id>/w480.png
+    assets/<id>/w960.png
+
+Questions and case studies reference images by id ("media" and
+"scenario_media", see data/loader.py), so a bank stays small and an image
+used by many questions is stored once. An image's bytes are read only when
+a question showing it is displayed, and are then kept in a process-wide LRU
+cache bounded by total size (QUIZLIT_ASSET_CACHE_MB), shared by every
+session; session state only ever holds the references.
+
+Usage:
+    python -m data.assets add diagram.png [--caption "ADM cycle"] [--alt "..."]
+    python -m data.assets check [--bank-dir bank]
+
+MUST NOT import streamlit.
+"""
+import argparse
+import collections
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+
+from PIL import Image
+
+import data.catalog as catalog
+
+ASSET_DIR = "assets"
+# Widths of the resized variants; an image narrower than a width gets no variant for it.
+VARIANT_WIDTHS = (480, 960)
+# Width the quiz and study pages request: sharp on high-density screens in the main column.
+DISPLAY_WIDTH = 960
+CACHE_MB_ENV = "QUIZLIT_ASSET_CACHE_MB"
+DEFAULT_CACHE_MB = 64
+# Pillow format -> (file extension, MIME type). Variants keep the original's format,
+# except GIF variants, which are written as PNG.
+FORMATS = {
+    "PNG": (".png", "image/png"),
+    "JPEG": (".jpg", "image/jpeg"),
+    "WEBP": (".webp", "image/webp"),
+    "GIF": (".gif", "image/gif"),
+}
+_MIME_TYPES = {ext: mime for ext, mime in FORMATS.values()}
+_ASSET_ID_RE = re.compile(r"[0-9a-f]{64}")
+_VARIANT_RE = re.compile(r"w(\d+)\.")
+
+# (asset dir, id, width) -> (MIME type, bytes), least recently used first
+_cache: collections.OrderedDict = collections.OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_stats: collections.Counter = collections.Counter()
+
+
+def cache_limit_bytes() -> int:
+    return int(float(os.environ.get(CACHE_MB_ENV) or DEFAULT_CACHE_MB) * 1024 * 1024)
+
+
+def asset_id_for(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def media_refs(q: dict) -> list:
+    """Return every image reference of a question: its scenario's, then its own."""
+    return [*q.get("scenario_media", []), *q.get("media", [])]
+
+
+def add_asset(path: str, asset_dir: str = ASSET_DIR) -> str:
+    """
+    Store the image at path (PNG, JPEG, WEBP or GIF) with its resized
+    variants and return its id. Adding the same file again does nothing.
+    Raises ValueError if the file is not a supported image.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"{path} is not a readable image ({e})") from None
+    if image.format not in FORMATS:
+        raise ValueError(f"{path}: unsupported image format {image.format}")
+
+    asset_id = asset_id_for(data)
+    folder = os.path.join(asset_dir, asset_id)
+    ext = FORMATS[image.format][0]
+    if os.path.exists(os.path.join(folder, f"original{ext}")):
+        return asset_id
+    os.makedirs(folder, exist_ok=True)
+    for width in VARIANT_WIDTHS:
+        if image.width > width:
+            variant_format = "PNG" if image.format == "GIF" else image.format
+            # Palette images would be resized without filtering; JPEG takes RGB only
+            variant = image.convert("RGB" if variant_format == "JPEG" else "RGBA")
+            variant.thumbnail((width, image.height), Image.LANCZOS)
+            _write(
+                os.path.join(folder, f"w{width}{FORMATS[variant_format][0]}"),
+                _encode(variant, variant_format),
+            )
+    # The original goes last: its presence marks the asset as complete
+    _write(os.path.join(folder, f"original{ext}"), data)
+    return asset_id
+
+
+def _encode(image, image_format: str) -> bytes:
+    out = io.BytesIO()
+    if image_format == "JPEG":
+        image.save(out, "JPEG", quality=85, optimize=True)
+    else:
+        image.save(out, image_format, optimize=True)
+    return out.getvalue()
+
+
+def _write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _pick_file(folder: str, width: int | None) -> str:
+    """Return the smallest variant at least width wide, else the original."""
+    originals, variants = [], []
+    for name in os.listdir(folder):
+        if name.startswith("original."):
+            originals.append(name)
+        elif (match := _VARIANT_RE.match(name)) and not name.endswith(".tmp"):
+            variants.append((int(match.group(1)), name))
+    if not originals:
+        raise FileNotFoundError(folder)
+    if width is not None:
+        wide_enough = sorted(v for v in variants if v[0] >= width)
+        if wide_enough:
+            return wide_enough[0][1]
+    return originals[0]
+
+
+def read_asset(asset_id: str, width: int | None = None, asset_dir: str = ASSET_DIR) -> tuple:
+    """
+    Return (MIME type, bytes) of an image, as the smallest variant at least
+    width pixels wide (the original if width is None or none is that wide).
+
+    Served from the shared LRU cache. Raises LookupError if there is no such
+    image.
+    """
+    global _cache_bytes
+    key = (asset_dir, asset_id, width)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return cached
+        _stats["misses"] += 1
+
+    # Ids come from banks and API paths: never let one name a path of its own
+    if not _ASSET_ID_RE.fullmatch(asset_id):
+        raise LookupError(f"No image {asset_id}")
+    try:
+        name = _pick_file(os.path.join(asset_dir, asset_id), width)
+        with open(os.path.join(asset_dir, asset_id, name), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        raise LookupError(f"No image {asset_id}") from None
+    value = (_MIME_TYPES.get(os.path.splitext(name)[1], "application/octet-stream"), data)
+
+    limit = cache_limit_bytes()
+    with _cache_lock:
+        if len(data) <= limit and key not in _cache:
+            _cache[key] = value
+            _cache_bytes += len(data)
+            while _cache_bytes > limit:
+                _, (_, evicted) = _cache.popitem(last=False)
+                _cache_bytes -= len(evicted)
+    return value
+
+
+def cache_stats() -> dict:
+    """Return {"entries", "hits", "misses", "bytes"} of the image cache for diagnostics."""
+    with _cache_lock:
+        return {
+            "entries": len(_cache),
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "bytes": _cache_bytes,
+        }
+
+
+def missing_assets(bank_dir: str = catalog.BANK_DIR, asset_dir: str = ASSET_DIR) -> list:
+    """Return [(question id, asset id), ...] for images referenced by banks but not stored."""
+    missing = []
+    entries = catalog.load_banks(catalog.discover_banks(bank_dir))
+    for entry in entries.values():
+        for q in entry["questions"]:
+            for ref in media_refs(q):
+                if not os.path.isdir(os.path.join(asset_dir, ref["asset"])):
+                    missing.append((q["id"], ref["asset"]))
+    return missing
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage question images.")
+    parser.add_argument("--asset-dir", default=ASSET_DIR, help="Image store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Store images and print their media references")
+    add.add_argument("images", nargs="+")
+    add.add_argument("--caption", default=None, help="Caption shown under the image")
+    add.add_argument("--alt", default=None, help="Text alternative for screen readers and the API")
+    check = commands.add_parser("check", help="List images referenced by banks but not stored")
+    check.add_argument("--bank-dir", default=catalog.BANK_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        for path in args.images:
+            try:
+                ref = {"asset": add_asset(path, args.asset_dir)}
+            except ValueError as e:
+                parser.exit(1, f"{e}\n")
+            ref.update({key: value for key, value in (("caption", args.caption), ("alt", args.alt)) if value})
+            print(json.dumps(ref, ensure_ascii=False))
+        return
+
+    missing = missing_assets(args.bank_dir, args.asset_dir)
+    for q_id, asset_id in missing:
+        print(f"{q_id}: missing image {asset_id}")
+    if missing:
+        parser.exit(1, f"{len(missing)} missing image(s)\n")
+    print("All referenced images are stored")
+
+
+if __name__ == "__main__":
+    main()
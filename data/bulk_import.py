@@ -0,0 +1,311 @@
+"""data/bulk_import.py — Bulk import of authored questions from spreadsheets.
+
+Authors write one question per row in an .xlsx workbook (first sheet) or a
+.csv file, under a header row naming the columns (case, spaces and
+punctuation are ignored, so "Option A" matches option_a):
+
+    id                  optional; defaults to the row number
+    scenario, question
+    option_a .. option_d
+    best, second_best, third_best, distractor    option letters (A-D)
+    tags                tag names from togaf_tags_db.csv (or tag ids), separated by ";"
+    why_best, why_second_best, why_third_best, why_distractor,
+    concept_tested, common_mistakes, togaf_reference
+
+Rows are streamed (openpyxl read-only mode for workbooks) and converted and
+validated in chunks by a process pool, with only a few chunks in flight, so
+memory stays flat however long the sheet is. Valid rows are written as a
+JSON Lines or JSON array bank; every rejected row gets a line in a CSV error
+report. The bank is written to a temporary file and moved into place, so
+the bank watcher never sees a half-written file.
+
+Usage:
+    python -m data.bulk_import questions.xlsx --out bank/Q2.jsonl [--errors errors.csv]
+
+MUST NOT import streamlit.
+"""
+import argparse
+import collections
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+
+import data.catalog as catalog
+from data.loader import is_json_lines, prepare_question
+
+TIER_POINTS = {"best": 5, "second_best": 3, "third_best": 1, "distractor": 0}
+RATIONALE_COLUMNS = [
+    "why_best",
+    "why_second_best",
+    "why_third_best",
+    "why_distractor",
+    "concept_tested",
+    "common_mistakes",
+    "togaf_reference",
+]
+OPTION_COLUMNS = {"A": "option_a", "B": "option_b", "C": "option_c", "D": "option_d"}
+REQUIRED_COLUMNS = [
+    "scenario",
+    "question",
+    *OPTION_COLUMNS.values(),
+    *TIER_POINTS,
+    "tags",
+    *RATIONALE_COLUMNS,
+]
+TAG_SEPARATOR = ";"
+
+# Rows converted per worker task.
+CHUNK_SIZE = 2000
+# Chunks in flight per worker; bounds memory on very large sheets.
+_CHUNKS_PER_WORKER = 2
+_HEADER_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_header(name) -> str:
+    """Return the canonical form of a header cell ("Option A" -> "option_a")."""
+    return _HEADER_RE.sub("_", str(name or "").lower()).strip("_")
+
+
+def map_columns(header: list, renames: dict | None = None) -> dict:
+    """
+    Return {column: position in row} for the header row.
+
+    renames maps a column to the header used for it in this sheet
+    ({"question": "Stem"}). Raises ValueError listing missing columns.
+    """
+    positions = {normalize_header(name): i for i, name in enumerate(header) if name is not None}
+    for column, name in (renames or {}).items():
+        if normalize_header(name) in positions:
+            positions[column] = positions[normalize_header(name)]
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return {column: positions[column] for column in ["id", *REQUIRED_COLUMNS] if column in positions}
+
+
+def tag_ids_by_name(tag_map: dict) -> dict:
+    """Return {lowercased tag name or id string: tag id} for resolving the tags column."""
+    lookup = {str(tag_id): tag_id for tag_id in tag_map}
+    lookup.update({info["name"].strip().lower(): tag_id for tag_id, info in tag_map.items()})
+    return lookup
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # workbook numbers come back as floats
+    return str(value).strip()
+
+
+def row_to_question(row: tuple, row_number: int, columns: dict, tag_lookup: dict) -> dict:
+    """
+    Return the bank question for one sheet row, validated by data.loader.
+
+    Raises ValueError describing the first problem found.
+    """
+    cell = {column: _text(row[i]) if i < len(row) else "" for column, i in columns.items()}
+    raw_id = cell.get("id") or str(row_number)
+    if not raw_id.isdigit():
+        raise ValueError(f"id must be a whole number, not '{raw_id}'")
+
+    tags = []
+    for name in filter(None, (part.strip() for part in cell["tags"].split(TAG_SEPARATOR))):
+        tag_id = tag_lookup.get(name.lower())
+        if tag_id is None:
+            raise ValueError(f"Unknown tag '{name}'")
+        if tag_id not in tags:
+            tags.append(tag_id)
+
+    question = {
+        "id": int(raw_id),
+        "scenario": cell["scenario"],
+        "question": cell["question"],
+        "options": {letter: cell[column] for letter, column in OPTION_COLUMNS.items()},
+        "scoring": {
+            tier: {"option": cell[tier].upper(), "points": points}
+            for tier, points in TIER_POINTS.items()
+        },
+        "tags": tags,
+        "rationale": {column: cell[column] for column in RATIONALE_COLUMNS},
+    }
+    if not question["scenario"]:
+        raise ValueError("Scenario is empty")
+    for column in RATIONALE_COLUMNS:
+        if not question["rationale"][column]:
+            raise ValueError(f"{column} is empty")
+    # The loader adds derived fields, so validate a copy and keep the source form
+    prepare_question({**question}, {}, {})
+    return question
+
+
+def convert_chunk(rows: list, columns: dict, tag_lookup: dict) -> list:
+    """
+    Convert [(row number, row), ...]; return [(row number, question id,
+    JSON line or None, error or None), ...] in the same order.
+    """
+    converted = []
+    for row_number, row in rows:
+        try:
+            q = row_to_question(row, row_number, columns, tag_lookup)
+        except ValueError as e:
+            raw_id = _text(row[columns["id"]]) if "id" in columns and columns["id"] < len(row) else ""
+            converted.append((row_number, raw_id or str(row_number), None, str(e)))
+            continue
+        converted.append((row_number, q["id"], json.dumps(q, ensure_ascii=False), None))
+    return converted
+
+
+def read_rows(path: str):
+    """Yield the header row, then (row number, row) for each non-blank data row."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            yield from _numbered(rows)
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from _numbered(csv.reader(f))
+
+
+def _numbered(rows):
+    rows = iter(rows)
+    yield list(next(rows, []))
+    for row_number, row in enumerate(rows, 2):
+        if any(value not in (None, "") for value in row):
+            yield row_number, tuple(row)
+
+
+def _chunks(rows, size: int):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_questions(
+    source: str,
+    out: str,
+    errors_path: str,
+    tag_map: dict,
+    renames: dict | None = None,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> dict:
+    """
+    Convert the rows of source into a bank at out (JSON Lines if it ends in
+    .jsonl, else a JSON array) and a CSV error report at errors_path.
+
+    Returns {"rows", "imported", "rejected", "seconds"}. Raises ValueError
+    if the header is missing required columns.
+    """
+    started = time.perf_counter()
+    rows = read_rows(source)
+    columns = map_columns(next(rows), renames)
+    tag_lookup = tag_ids_by_name(tag_map)
+    json_lines = is_json_lines(out)
+    seen_ids = set()
+    counts = collections.Counter()
+
+    def write(converted: list) -> None:
+        for row_number, q_id, line, error in converted:
+            counts["rows"] += 1
+            if error is None and q_id in seen_ids:
+                error = f"Duplicate id {q_id}"
+            if error is not None:
+                counts["rejected"] += 1
+                errors.writerow([row_number, q_id, error])
+                continue
+            seen_ids.add(q_id)
+            if json_lines:
+                bank.write(line + "\n")
+            else:
+                bank.write(("\n" if not counts["imported"] else ",\n") + line)
+            counts["imported"] += 1
+
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp_path = f"{out}.tmp"
+    workers = workers or os.cpu_count() or 1
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as bank, open(
+            errors_path, "w", newline="", encoding="utf-8"
+        ) as report:
+            errors = csv.writer(report)
+            errors.writerow(["row", "id", "error"])
+            if not json_lines:
+                bank.write("[")
+            if workers == 1:
+                for chunk in _chunks(rows, chunk_size):
+                    write(convert_chunk(chunk, columns, tag_lookup))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    in_flight = collections.deque()
+                    for chunk in _chunks(rows, chunk_size):
+                        in_flight.append(pool.submit(convert_chunk, chunk, columns, tag_lookup))
+                        if len(in_flight) >= workers * _CHUNKS_PER_WORKER:
+                            write(in_flight.popleft().result())
+                    while in_flight:
+                        write(in_flight.popleft().result())
+            if not json_lines:
+                bank.write("\n]\n")
+        os.replace(tmp_path, out)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)  # failed part-way; leave any previous bank in place
+    return {
+        "rows": counts["rows"],
+        "imported": counts["imported"],
+        "rejected": counts["rejected"],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Import questions from a spreadsheet into a bank.")
+    parser.add_argument("source", help="Workbook (.xlsx) or CSV file, one question per row")
+    parser.add_argument("--out", required=True, help="Bank to write (.jsonl for JSON Lines, else JSON)")
+    parser.add_argument("--errors", default=None, help="Error report (default <source>.errors.csv)")
+    parser.add_argument("--tags", default=catalog.TAGS_PATH, help="Tag catalog used to resolve tag names")
+    parser.add_argument(
+        "--column",
+        action="append",
+        default=[],
+        metavar="COLUMN=HEADER",
+        help="Read COLUMN from a differently named header, e.g. question=Stem (repeatable)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args(argv)
+
+    renames = {}
+    for item in args.column:
+        column, sep, header = item.partition("=")
+        if not sep or normalize_header(column) not in ["id", *REQUIRED_COLUMNS]:
+            parser.error(f"--column expects COLUMN=HEADER with a known column, not '{item}'")
+        renames[normalize_header(column)] = header
+    errors_path = args.errors or f"{os.path.splitext(args.source)[0]}.errors.csv"
+
+    try:
+        summary = import_questions(
+            args.source, args.out, errors_path, catalog.load_tag_map(args.tags), renames, args.workers
+        )
+    except ValueError as e:
+        parser.exit(1, f"{args.source}: {e}\n")
+    print(
+        f"Imported {summary['imported']} of {summary['rows']} rows to {args.out} "
+        f"in {summary['seconds']}s; {summary['rejected']} rejected (see {errors_path})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""data/cat.py — Computerized adaptive testing: calibration files and item selection.
+
+Item step difficulties are calibrated offline from the attempt-history store
+(see data/history.py) and written per bank to calibration/<bank>.json.
+Items without a calibration fall back to data.irt.DEFAULT_STEPS.
+
+At runtime each bank gets a shared information table (ability grid x
+items), built once per catalog entry. A session only keeps one availability
+mask per bank, and choosing the next question is a masked top-k over one
+table row per bank. Picking at random among the top few items
+(randomesque exposure control) keeps the same item from opening every
+session.
+
+Usage:
+    python -m data.cat --db history.db bank/Q1.json [bank/Q2.json ...]
+
+MUST NOT import streamlit.
+"""
+import argparse
+import collections
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from data.catalog import load_banks
+from data.irt import (
+    DEFAULT_STEPS,
+    THETA_GRID,
+    TIER_CATEGORIES,
+    estimate_ability,
+    fit_partial_credit,
+    information_table,
+)
+from data.search import tag_mask
+
+CALIBRATION_VERSION = 1
+CALIBRATION_DIR = "calibration"
+
+# Items need this many recorded answers before their fitted steps are used.
+MIN_RESPONSES = 20
+# Next question is drawn at random among this many most informative items.
+RANDOMESQUE = 5
+
+_index_lock = threading.Lock()
+# Information-index lookups for the diagnostics page.
+_stats: collections.Counter = collections.Counter()
+
+
+def answer_category(question: dict, option_id: str) -> int:
+    """Return the ordered response category (0..3) of an original option id."""
+    tier = next(name for name, t in question["scoring"].items() if t["option"] == option_id)
+    return TIER_CATEGORIES[tier]
+
+
+def calibration_path(bank_name: str, calibration_dir: str = CALIBRATION_DIR) -> str:
+    return os.path.join(calibration_dir, f"{bank_name}.json")
+
+
+def load_calibration(path: str) -> dict:
+    """Return {question_id: [step, step, step]} from a calibration file ({} if absent)."""
+    try:
+        with open(path, "rb") as f:
+            calibration = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(calibration, dict) or calibration.get("version") != CALIBRATION_VERSION:
+        raise ValueError(f"{path}: unsupported calibration format")
+    return calibration["items"]
+
+
+def get_information_index(entry: dict, calibration_dir: str = CALIBRATION_DIR) -> dict:
+    """
+    Return the entry's {"steps", "table", "order"} for adaptive selection, building it
+    on first use and again whenever the bank's calibration file changes.
+    """
+    path = calibration_path(entry["name"], calibration_dir)
+    try:
+        key = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        key = None
+    cached = entry.get("information_index")
+    if cached is None or cached[0] != key:
+        _stats["misses"] += 1
+        with _index_lock:
+            cached = entry.get("information_index")
+            if cached is None or cached[0] != key:
+                calibration = load_calibration(path)
+                steps = np.array(
+                    [calibration.get(q["id"], DEFAULT_STEPS) for q in entry["questions"]],
+                    dtype=float,
+                ).reshape(-1, len(DEFAULT_STEPS))
+                table = information_table(steps)
+                # Items by descending information per grid row, so selection
+                # scans only the head of a row instead of the whole bank
+                order = np.argsort(-table, axis=1, kind="stable").astype(np.int32)
+                cached = (key, {"steps": steps, "table": table, "order": order})
+                entry["information_index"] = cached
+    else:
+        _stats["hits"] += 1
+    return cached[1]
+
+
+def cache_stats(entries: list) -> dict:
+    """Return {"entries", "hits", "misses"} of the information index over catalog entries."""
+    return {
+        "entries": sum(1 for entry in entries if "information_index" in entry),
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+    }
+
+
+def new_cat_session(combined: dict, tag_ids: list, n: int, avoid_near_duplicates: bool = True) -> dict:
+    """
+    Return per-session adaptive-test state over the banks of a combined bank
+    (see data.catalog.combined_bank).
+
+    Only questions carrying one of tag_ids are eligible (all questions if
+    tag_ids is empty). Raises ValueError if fewer than n are eligible.
+    """
+    entries = [combined["entries"][name] for name in combined["banks"]]
+    available = [
+        tag_mask(entry["tag_index"], tag_ids, len(entry["questions"]))
+        if tag_ids
+        else np.ones(len(entry["questions"]), dtype=bool)
+        for entry in entries
+    ]
+    eligible = int(sum(mask.sum() for mask in available))
+    if eligible < n:
+        raise ValueError(f"Need {n} questions but only {eligible} match the selected categories")
+    for entry in entries:
+        get_information_index(entry)
+    return {
+        "entries": entries,
+        "available": available,
+        "positions": {},  # question id -> (entry number, position)
+        "near_duplicates": combined["near_duplicates"],
+        "used_clusters": set(),
+        "avoid_near_duplicates": avoid_near_duplicates,
+        "target": n,
+        "tag_ids": list(tag_ids),
+    }
+
+
+def resume_cat_session(
+    combined: dict, tag_ids: list, n: int, avoid_near_duplicates: bool, question_ids: list
+) -> dict:
+    """Return adaptive-test state as it was after administering question_ids."""
+    cat = new_cat_session(combined, tag_ids, n, avoid_near_duplicates)
+    administered = set(question_ids)
+    for e, entry in enumerate(cat["entries"]):
+        for pos, question in enumerate(entry["questions"]):
+            if question["id"] in administered:
+                cat["available"][e][pos] = False
+                cat["positions"][question["id"]] = (e, pos)
+                cluster = cat["near_duplicates"].get(question["id"])
+                if avoid_near_duplicates and cluster is not None:
+                    cat["used_clusters"].add(cluster)
+    return cat
+
+
+def current_ability(cat: dict, questions: list, answers: dict) -> tuple:
+    """Return (theta, standard_error) from the answered questions so far."""
+    steps, categories = [], []
+    for q in questions:
+        if q["id"] in answers:
+            e, pos = cat["positions"][q["id"]]
+            steps.append(get_information_index(cat["entries"][e])["steps"][pos])
+            categories.append(answer_category(q, answers[q["id"]]["original_option_id"]))
+    return estimate_ability(
+        np.array(steps).reshape(-1, len(DEFAULT_STEPS)), np.array(categories, dtype=int)
+    )
+
+
+def next_question(cat: dict, questions: list, answers: dict, rng: np.random.Generator | None = None) -> dict:
+    """
+    Return the next question: one of the RANDOMESQUE most informative
+    eligible items at the current ability estimate. Marks it used.
+
+    Raises ValueError if no eligible question is left.
+    """
+    rng = rng or np.random.default_rng()
+    theta, _ = current_ability(cat, questions, answers)
+    row = int(np.abs(THETA_GRID - theta).argmin())
+    while True:
+        candidates = []  # (information, entry number, position)
+        for e, (entry, mask) in enumerate(zip(cat["entries"], cat["available"])):
+            index = get_information_index(entry)
+            top = _top_available(index["order"][row], mask, RANDOMESQUE)
+            candidates.extend((float(index["table"][row, pos]), e, int(pos)) for pos in top)
+        if not candidates:
+            raise ValueError("No eligible questions left for the adaptive test")
+        candidates.sort(key=lambda c: -c[0])
+        _, e, pos = candidates[int(rng.integers(min(RANDOMESQUE, len(candidates))))]
+        cat["available"][e][pos] = False
+        entry = cat["entries"][e]
+        question = entry["questions"][pos]
+        cluster = cat["near_duplicates"].get(question["id"])
+        if cat["avoid_near_duplicates"] and cluster is not None:
+            if cluster in cat["used_clusters"]:
+                continue  # near-duplicate of an earlier question; pick again
+            cat["used_clusters"].add(cluster)
+        cat["positions"][question["id"]] = (e, pos)
+        return question
+
+
+def _top_available(order: np.ndarray, mask: np.ndarray, k: int) -> np.ndarray:
+    """Return up to k available positions, most informative first."""
+    width = 4 * k
+    while True:
+        head = order[:width]
+        top = head[mask[head]][:k]
+        if len(top) == k or width >= len(order):
+            return top
+        width *= 4  # heavily filtered pools: widen the scanned head
+
+
+def calibrate(db_path: str, bank_paths: list) -> dict:
+    """
+    Fit step difficulties from every answered question in the history store.
+
+    Returns {bank_name: calibration dict} for the given banks; items with
+    fewer than MIN_RESPONSES answers are left out (they use DEFAULT_STEPS).
+    """
+    entries = load_banks(bank_paths)
+    by_id = {q["id"]: (name, q) for name, entry in entries.items() for q in entry["questions"]}
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT attempt_id, question_id, selected_option FROM answers"
+            " WHERE selected_option IS NOT NULL"
+        ).fetchall()
+    rows = [row for row in rows if row[1] in by_id]
+    if not rows:
+        raise ValueError("The history store has no answers for these banks")
+
+    attempt_ids, persons = np.unique([row[0] for row in rows], return_inverse=True)
+    item_ids, items = np.unique([row[1] for row in rows], return_inverse=True)
+    categories = np.array([answer_category(by_id[q_id][1], option) for _, q_id, option in rows])
+    steps, _, _ = fit_partial_credit(persons, items, categories, len(attempt_ids), len(item_ids))
+    counts = np.bincount(items, minlength=len(item_ids))
+
+    calibrations = {
+        name: {"version": CALIBRATION_VERSION, "model": "partial_credit", "bank": name, "items": {}}
+        for name in entries
+    }
+    for i, q_id in enumerate(item_ids.tolist()):
+        if counts[i] >= MIN_RESPONSES:
+            calibrations[by_id[q_id][0]]["items"][q_id] = np.round(steps[i], 4).tolist()
+    return calibrations
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate IRT step difficulties for adaptive tests.")
+    parser.add_argument("banks", nargs="+", help="JSON question bank paths")
+    parser.add_argument("--db", required=True, help="Attempt-history SQLite database")
+    parser.add_argument("--out-dir", default=CALIBRATION_DIR, help="Calibration output directory")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for name, calibration in calibrate(args.db, args.banks).items():
+        path = calibration_path(name, args.out_dir)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(calibration, f, separators=(",", ":"))
+        print(f"Wrote {len(calibration['items'])} calibrated items to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""data/catalog.py — Multi-bank catalog with parallel loading and id namespacing.
+
+Every bank file under bank/ is parsed at most once per process (until the
+file changes on disk) and shared read-only by all sessions. When a file
+changes, only questions whose content hash changed are revalidated,
+re-signed and re-indexed; the new version is swapped in for new sessions while running
+sessions keep the questions they drew. Question ids are
+namespaced by bank ("Q1:3") so any selection of banks can be combined; the
+original integer id is kept under "source_id".
+
+Near-duplicate detection runs over one MinHash LSH index shared by all
+cached banks: each new or edited question is queried against every bank,
+so clusters can span banks, and a re-parsed bank only touches the index for
+the questions that changed.
+
+Combined banks (one question list and tag index over a selection of banks)
+are cached the same way, keyed by the selected bank versions, so every
+session and prefetch pool selecting the same banks shares one copy.
+
+MUST NOT import streamlit.
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from data.dedupe import (
+    cluster_lookup,
+    find_near_duplicate_clusters,
+    linked_clusters,
+    lsh_add,
+    lsh_query,
+    lsh_remove,
+    new_lsh_index,
+    question_signature,
+)
+from data.loader import (
+    build_tag_index,
+    check_question_id,
+    is_json_lines,
+    prepare_question,
+    question_content_hash,
+    read_bank_json,
+    update_tag_index,
+)
+from data.search import build_search_index, update_search_index
+from data.tag_resolver import load_tags
+
+BANK_DIR = "bank"
+BANK_SUFFIXES = (".json", ".jsonl")
+TAGS_PATH = "togaf_tags_db.csv"
+
+_MAX_WORKERS = 8
+# Combined banks kept per selection of bank versions.
+MAX_COMBINED_BANKS = 32
+
+# (path, mtime_ns, size) -> parsed bank entry; shared across sessions.
+_bank_cache: dict = {}
+# (path, mtime_ns, size) -> ValueError for the latest version of a file, if it
+# failed validation.
+_failed_keys: dict = {}
+_tag_cache: dict = {}
+# MinHash LSH index over the questions of every cached bank file, keyed by
+# (path, question id), and the near-duplicate pairs found in it: key -> set of keys.
+_dup_index: dict = new_lsh_index()
+_dup_links: dict = {}
+# ((bank name, version), ...) -> combined bank; least recently used dropped first.
+_combined_cache: collections.OrderedDict = collections.OrderedDict()
+_cache_lock = threading.Lock()
+# Lookup counts for the diagnostics page: "<cache>_hits" / "<cache>_misses".
+_stats: collections.Counter = collections.Counter()
+_watcher: threading.Thread | None = None
+
+
+def bank_name_for(path: str) -> str:
+    """Return the namespace for a bank file: its file name without extension."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def namespace_questions(questions: list, bank_name: str) -> list:
+    """Prefix question ids with bank_name in place; keep the original as source_id."""
+    for q in questions:
+        q["source_id"] = q["id"]
+        q["id"] = f"{bank_name}:{q['id']}"
+        q["bank"] = bank_name
+    return questions
+
+
+def discover_banks(bank_dir: str = BANK_DIR) -> list:
+    """Return sorted paths of the *.json and *.jsonl bank files in bank_dir."""
+    return sorted(
+        os.path.join(bank_dir, f) for f in os.listdir(bank_dir) if f.endswith(BANK_SUFFIXES)
+    )
+
+
+def build_entry(
+    name: str,
+    questions: list,
+    path: str | None = None,
+    signatures: dict | None = None,
+    previous: dict | None = None,
+) -> dict:
+    """
+    Return a catalog entry (namespaced questions, tag index, signatures).
+
+    questions must already be namespaced if they carry a 'content_hash'
+    (see _parse_bank); plain validated questions are hashed and namespaced
+    here, so the version tells apart uploads that reuse the same ids.
+
+    Near-duplicates of a bank file (path given) are found across banks in
+    the shared index when the entry is cached (see load_banks), so its
+    "near_duplicates" is None. A standalone entry (an upload) is clustered
+    on its own: {question id: (name, cluster number)}.
+
+    With the previous version of the same bank (whose unchanged questions
+    are reused as-is), its tag and search indexes are patched instead of
+    rebuilt: only the added questions are read.
+    """
+    if questions and "source_id" not in questions[0]:
+        for q in questions:
+            q["content_hash"] = question_content_hash(q, {})
+        questions = namespace_questions(questions, name)
+    signatures = {} if signatures is None else signatures
+    if path is None:
+        clusters = find_near_duplicate_clusters([(q["id"], q) for q in questions], signatures=signatures)
+        near_duplicates = {
+            q_id: (name, cluster) for q_id, cluster in cluster_lookup(clusters).items()
+        }
+    else:
+        for q in questions:
+            question_signature(q, signatures)
+        near_duplicates = None
+    entry = {
+        "name": name,
+        "path": path,
+        "version": hashlib.sha1(
+            "".join(q["content_hash"] for q in questions).encode("utf-8")
+        ).hexdigest()[:12],
+        "questions": questions,
+        "by_hash": {q["content_hash"]: q for q in questions},
+        "signatures": signatures,
+        "near_duplicates": near_duplicates,
+    }
+    if previous is None:
+        entry["tag_index"] = build_tag_index(questions)
+        return entry
+
+    old_positions = {id(q): pos for pos, q in enumerate(previous["questions"])}
+    remap = np.full(len(previous["questions"]), -1, dtype=np.int32)
+    added = []
+    for pos, q in enumerate(questions):
+        old = old_positions.get(id(q))
+        if old is None:
+            added.append(pos)
+        else:
+            remap[old] = pos
+    entry["tag_index"] = update_tag_index(previous["tag_index"], remap.tolist(), questions, added)
+    search_index = previous.get("search_index")
+    if search_index is not None:
+        entry["search_index"] = update_search_index(search_index, remap, questions, added)
+    return entry
+
+
+def _parse_bank(path: str, previous: dict | None = None) -> dict:
+    """
+    Parse one bank file into a catalog entry.
+
+    With the previous version of the same bank, questions whose content hash
+    is unchanged are reused as-is (already validated and namespaced, and
+    never mutated), and their MinHash signatures are carried over; only new
+    or edited questions are validated, signed and indexed.
+    """
+    name = bank_name_for(path)
+    with open(path, "rb") as f:
+        raw_questions, case_studies = read_bank_json(f, is_json_lines(path))
+
+    reusable = previous["by_hash"] if previous else {}
+    scenario_texts = {q["scenario"]: q["scenario"] for q in reusable.values()}
+    seen_ids = set()
+    questions = []
+    for raw in raw_questions:
+        check_question_id(raw, seen_ids)
+        content_hash = question_content_hash(raw, case_studies)
+        q = reusable.get(content_hash)
+        if q is None:
+            q = prepare_question(raw, case_studies, scenario_texts)
+            namespace_questions([q], name)
+            q["content_hash"] = content_hash
+        questions.append(q)
+
+    previous_signatures = previous["signatures"] if previous else {}
+    signatures = {
+        q["content_hash"]: previous_signatures[q["content_hash"]]
+        for q in questions
+        if q["content_hash"] in previous_signatures
+    }
+    return build_entry(name, questions, path, signatures, previous)
+
+
+def _cache_key(path: str) -> tuple:
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def load_banks(paths: list) -> dict:
+    """
+    Return {bank_name: entry} for paths, parsing uncached banks concurrently.
+
+    A bank whose file changed is re-parsed incrementally against its cached
+    version, and the new entry replaces it atomically for new lookups.
+    Sessions already holding the old entry (or questions drawn from it) keep
+    it unchanged. A file that fails validation is not retried until it
+    changes again.
+
+    Raises ValueError naming the first bank that fails validation.
+    """
+    keys = {path: _cache_key(path) for path in paths}
+    with _cache_lock:
+        for path in paths:
+            if keys[path] in _failed_keys:
+                raise _failed_keys[keys[path]]
+        missing = [path for path in paths if keys[path] not in _bank_cache]
+        _stats["banks_hits"] += len(paths) - len(missing)
+        _stats["banks_misses"] += len(missing)
+        previous = {
+            path: next((e for k, e in _bank_cache.items() if k[0] == path), None)
+            for path in missing
+        }
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(missing))) as pool:
+            parsed = dict(
+                zip(missing, pool.map(_try_parse_bank, missing, [previous[p] for p in missing]))
+            )
+        with _cache_lock:
+            for path, result in parsed.items():
+                # Only the latest version of a file can fail again; forget older failures
+                for failed in [k for k in _failed_keys if k[0] == path]:
+                    del _failed_keys[failed]
+                if isinstance(result, ValueError):
+                    _failed_keys[keys[path]] = ValueError(f"{os.path.basename(path)}: {result}")
+                    continue
+                # Swap in the new version; drop superseded ones of the same file
+                stale_keys = [k for k in _bank_cache if k[0] == path]
+                _index_near_duplicates(_bank_cache[stale_keys[0]] if stale_keys else None, result)
+                for stale in stale_keys:
+                    del _bank_cache[stale]
+                _bank_cache[keys[path]] = result
+            for path in missing:
+                if keys[path] in _failed_keys:
+                    raise _failed_keys[keys[path]]
+
+    with _cache_lock:
+        return {bank_name_for(path): _bank_cache[keys[path]] for path in paths}
+
+
+def _index_near_duplicates(old: dict | None, new: dict | None) -> None:
+    """
+    Move the shared near-duplicate index from the old version of a bank to
+    the new one (caller holds _cache_lock); new is None for a removed bank.
+    Only questions whose content hash changed are removed or queried, and
+    each new question is queried against every cached bank, so
+    near-duplicates are found across banks.
+    """
+    old_by_hash = old["by_hash"] if old else {}
+    new_by_hash = new["by_hash"] if new else {}
+    for content_hash, q in old_by_hash.items():
+        if content_hash in new_by_hash:
+            continue
+        key = (old["path"], q["id"])
+        lsh_remove(_dup_index, key)
+        for other in _dup_links.pop(key, ()):
+            _dup_links[other].discard(key)
+            if not _dup_links[other]:
+                del _dup_links[other]
+    for content_hash, q in new_by_hash.items():
+        if content_hash in old_by_hash:
+            continue
+        key = (new["path"], q["id"])
+        signature = new["signatures"][content_hash]
+        for match, _ in lsh_query(_dup_index, signature):
+            _dup_links.setdefault(key, set()).add(match)
+            _dup_links.setdefault(match, set()).add(key)
+        lsh_add(_dup_index, key, signature)
+
+
+def _try_parse_bank(path: str, previous: dict | None):
+    try:
+        return _parse_bank(path, previous)
+    except ValueError as e:
+        return e
+    except (OSError, json.JSONDecodeError) as e:
+        return ValueError(str(e))
+
+
+def load_tag_map(path: str = TAGS_PATH) -> dict:
+    """Return the tag map for path, re-reading the CSV only when it changes."""
+    key = _cache_key(path)
+    with _cache_lock:
+        if _tag_cache.get("key") == key:
+            _stats["tag_map_hits"] += 1
+            return _tag_cache["tag_map"]
+        _stats["tag_map_misses"] += 1
+    with open(path, "rb") as f:
+        tag_map = load_tags(f)
+    with _cache_lock:
+        _tag_cache.update(key=key, tag_map=tag_map)
+    return tag_map
+
+
+def cache_stats() -> dict:
+    """Return {cache: {"entries", "hits", "misses"}} for the bank, tag map, combined and search caches."""
+    with _cache_lock:
+        entries = list(_bank_cache.values())
+        counts = dict(_stats)
+        tag_entries = 1 if "tag_map" in _tag_cache else 0
+        combined_entries = len(_combined_cache)
+    sizes = {
+        "banks": len(entries),
+        "tag_map": tag_entries,
+        "combined": combined_entries,
+        "search_index": sum(1 for entry in entries if "search_index" in entry),
+    }
+    return {
+        name: {
+            "entries": size,
+            "hits": counts.get(f"{name}_hits", 0),
+            "misses": counts.get(f"{name}_misses", 0),
+        }
+        for name, size in sizes.items()
+    }
+
+
+def cached_entries() -> list:
+    """Return the cached bank entries (current versions only)."""
+    with _cache_lock:
+        return list(_bank_cache.values())
+
+
+def cached_combined_banks() -> list:
+    """Return the cached combined banks."""
+    with _cache_lock:
+        return list(_combined_cache.values())
+
+
+def shared_object_ids() -> set:
+    """Return ids of the cached entries, questions, combined banks and tag map shared by every session."""
+    with _cache_lock:
+        entries = list(_bank_cache.values())
+        combined_banks = list(_combined_cache.values())
+        tag_map = _tag_cache.get("tag_map")
+    ids = {id(tag_map)} if tag_map is not None else set()
+    for entry in entries:
+        ids.add(id(entry))
+        ids.update(id(q) for q in entry["questions"])
+    for combined in combined_banks:
+        # Sessions hold references to the combined bank's lists and indexes too
+        ids.add(id(combined))
+        ids.update(id(value) for value in combined.values())
+    return ids
+
+
+def start_watcher(bank_dir: str = BANK_DIR, interval: float = 2.0) -> None:
+    """
+    Start (once per process) a daemon thread that polls bank_dir and the tag
+    CSV and re-parses changed files in the background, so edits are live for
+    the next session without a user's rerun paying the parse.
+    """
+    global _watcher
+    with _cache_lock:
+        if _watcher is not None:
+            return
+        _watcher = threading.Thread(
+            target=_watch, args=(bank_dir, interval), name="bank-watcher", daemon=True
+        )
+    _watcher.start()
+
+
+def _watch(bank_dir: str, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        _poll(bank_dir)
+
+
+def _poll(bank_dir: str) -> None:
+    """One watcher pass: reload changed banks and the tag CSV, and forget deleted banks."""
+    try:
+        paths = discover_banks(bank_dir)
+        for path in paths:
+            try:
+                load_banks([path])
+            except ValueError:
+                continue  # invalid edit: keep serving the last good version
+        _prune_removed(bank_dir, paths)
+    except OSError:
+        pass  # bank_dir missing or a file vanished mid-pass; retry next pass
+    try:
+        load_tag_map()
+    except (OSError, ValueError):
+        pass
+
+
+def _prune_removed(bank_dir: str, paths: list) -> None:
+    """
+    Drop cached versions, validation failures and near-duplicate index entries
+    of bank files in bank_dir that are no longer discovered there. Sessions
+    holding the dropped entries keep them; combined banks age out of their LRU.
+    """
+    present = set(paths)
+    bank_dir = os.path.abspath(bank_dir)
+    with _cache_lock:
+        removed = {
+            key[0]
+            for key in list(_bank_cache) + list(_failed_keys)
+            if key[0] not in present and os.path.dirname(os.path.abspath(key[0])) == bank_dir
+        }
+        for path in removed:
+            for key in [k for k in _bank_cache if k[0] == path]:
+                _index_near_duplicates(_bank_cache.pop(key), None)
+            for key in [k for k in _failed_keys if k[0] == path]:
+                del _failed_keys[key]
+
+
+def get_search_index(entry: dict) -> dict:
+    """Return the entry's full-text index, building it on first use."""
+    if "search_index" not in entry:
+        with _cache_lock:
+            if "search_index" not in entry:
+                _stats["search_index_misses"] += 1
+                entry["search_index"] = build_search_index(entry["questions"])
+                return entry["search_index"]
+    _stats["search_index_hits"] += 1
+    return entry["search_index"]
+
+
+def combined_bank(entries: list) -> dict:
+    """
+    Return the combined bank of entries (in order), built once per selection
+    of bank versions and shared read-only by every session and prefetch pool
+    selecting them. Each bank's cached tag index is shifted into place
+    instead of re-reading tags; a re-parsed bank has a new version and so a
+    new combined bank.
+    """
+    key = tuple((entry["name"], entry["version"]) for entry in entries)
+    with _cache_lock:
+        combined = _combined_cache.get(key)
+        if combined is not None:
+            _combined_cache.move_to_end(key)
+            _stats["combined_hits"] += 1
+            return combined
+        _stats["combined_misses"] += 1
+
+    combined = {
+        "banks": [],  # bank names in position order
+        "spans": {},  # bank name -> (start, end) positions in questions
+        "entries": {},  # bank name -> catalog entry
+        "questions": [],
+        "by_id": {},
+        "tag_index": {},
+        "near_duplicates": {},
+    }
+    for entry in entries:
+        if entry["name"] in combined["spans"]:
+            continue
+        start = len(combined["questions"])
+        combined["questions"].extend(entry["questions"])
+        combined["spans"][entry["name"]] = (start, len(combined["questions"]))
+        combined["banks"].append(entry["name"])
+        combined["entries"][entry["name"]] = entry
+        combined["by_id"].update((q["id"], q) for q in entry["questions"])
+        for tag_id, positions in entry["tag_index"].items():
+            combined["tag_index"].setdefault(tag_id, []).extend(p + start for p in positions)
+        if entry["near_duplicates"] is not None:
+            combined["near_duplicates"].update(entry["near_duplicates"])
+
+    shared_keys = [
+        (entry["path"], q["id"])
+        for entry in combined["entries"].values()
+        if entry["near_duplicates"] is None
+        for q in entry["questions"]
+    ]
+    with _cache_lock:
+        # Clusters may span banks; questions linked only outside the selection are not clustered
+        clusters = linked_clusters(_dup_links, shared_keys)
+    combined["near_duplicates"].update(
+        (q_id, cluster) for (_, q_id), cluster in cluster_lookup(clusters).items()
+    )
+    with _cache_lock:
+        combined = _combined_cache.setdefault(key, combined)
+        while len(_combined_cache) > MAX_COMBINED_BANKS:
+            _combined_cache.popitem(last=False)
+    return combined
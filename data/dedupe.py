@@ -0,0 +1,256 @@
+"""data/dedupe.py — Near-duplicate question detection with MinHash and LSH.
+
+Each question's scenario, stem and option texts are split into word
+shingles and reduced to a MinHash signature. Signatures are indexed by
+locality-sensitive hashing (banded signature buckets), so checking a new
+question only compares it with the few questions sharing a bucket, not with
+the whole bank. Candidates are confirmed by their estimated Jaccard
+similarity.
+
+Usage:
+    python -m data.dedupe bank/Q1.json [bank/Q2.json ...] --threshold 0.5
+
+MUST NOT import streamlit.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import zlib
+
+import numpy as np
+
+from data.loader import is_json_lines, load_question_bank
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32  # BANDS * ROWS == NUM_PERM; candidate threshold ≈ (1/BANDS) ** (1/ROWS)
+ROWS = 4
+DEFAULT_THRESHOLD = 0.5
+
+_PRIME = (1 << 31) - 1
+_perm_rng = np.random.default_rng(20240601)
+_PERM_A = _perm_rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _perm_rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingle_question(question: dict) -> set:
+    """Return the set of word shingles over scenario, stem and option texts."""
+    shingles = set()
+    texts = [question.get("scenario", ""), question["question"], *question["options"].values()]
+    for text in texts:
+        words = _WORD_RE.findall(text.lower())
+        for i in range(max(1, len(words) - SHINGLE_WORDS + 1)):
+            shingles.add(" ".join(words[i : i + SHINGLE_WORDS]))
+    return shingles
+
+
+def minhash_signature(shingles: set) -> np.ndarray:
+    """Return the NUM_PERM-value MinHash signature of a shingle set."""
+    if not shingles:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+    ) % np.uint64(_PRIME)
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % np.uint64(_PRIME)).min(axis=1)
+
+
+def new_lsh_index() -> dict:
+    """Return an empty LSH index: per-band bucket maps plus stored signatures."""
+    return {"buckets": [{} for _ in range(BANDS)], "signatures": {}}
+
+
+def lsh_add(index: dict, key, signature: np.ndarray) -> None:
+    """Add a signature under key (any hashable question key)."""
+    index["signatures"][key] = signature
+    for band, bucket in enumerate(index["buckets"]):
+        bucket.setdefault(signature[band * ROWS : (band + 1) * ROWS].tobytes(), []).append(key)
+
+
+def lsh_remove(index: dict, key) -> None:
+    """Remove key's signature from the index (no-op if absent)."""
+    signature = index["signatures"].pop(key, None)
+    if signature is None:
+        return
+    for band, bucket in enumerate(index["buckets"]):
+        band_key = signature[band * ROWS : (band + 1) * ROWS].tobytes()
+        members = bucket[band_key]
+        members.remove(key)
+        if not members:
+            del bucket[band_key]
+
+
+def lsh_query(index: dict, signature: np.ndarray, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Return [(key, estimated_jaccard), ...] for indexed questions whose
+    estimated Jaccard similarity with signature is at least threshold.
+    """
+    candidates = set()
+    for band, bucket in enumerate(index["buckets"]):
+        candidates.update(bucket.get(signature[band * ROWS : (band + 1) * ROWS].tobytes(), ()))
+    matches = []
+    for key in candidates:
+        similarity = float(np.mean(index["signatures"][key] == signature))
+        if similarity >= threshold:
+            matches.append((key, similarity))
+    return matches
+
+
+def question_signature(question: dict, signatures: dict | None = None) -> np.ndarray:
+    """
+    Return a question's MinHash signature, reusing and filling signatures
+    (a cache by question 'content_hash') when given.
+    """
+    content_hash = question.get("content_hash")
+    if signatures is not None and content_hash in signatures:
+        return signatures[content_hash]
+    signature = minhash_signature(shingle_question(question))
+    if signatures is not None and content_hash is not None:
+        signatures[content_hash] = signature
+    return signature
+
+
+def find_near_duplicate_clusters(
+    keyed_questions: list,
+    threshold: float = DEFAULT_THRESHOLD,
+    signatures: dict | None = None,
+) -> list:
+    """
+    Return clusters (lists of keys, size >= 2) of near-duplicate questions.
+
+    keyed_questions is [(key, question), ...]; keys identify questions across
+    banks. Each question is queried against the index before being added, so
+    the whole pass stays sub-quadratic.
+
+    signatures optionally caches MinHash signatures by question
+    'content_hash': cached ones are reused and new ones are added, so an
+    edited bank only re-signs the questions that changed.
+    """
+    index = new_lsh_index()
+    parent = {}
+
+    def _find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key, question in keyed_questions:
+        signature = question_signature(question, signatures)
+        parent[key] = key
+        for match, _ in lsh_query(index, signature, threshold):
+            parent[_find(match)] = _find(key)
+        lsh_add(index, key, signature)
+
+    clusters = {}
+    for key in parent:
+        clusters.setdefault(_find(key), []).append(key)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def linked_clusters(links: dict, keys: list) -> list:
+    """
+    Return clusters (lists of keys, size >= 2) of keys connected through
+    links ({key: set of near-duplicate keys}), ignoring keys not in keys.
+    """
+    selected = set(keys)
+    clusters, seen = [], set()
+    for key in keys:
+        if key in seen or key not in links:
+            continue
+        seen.add(key)
+        members, stack = [], [key]
+        while stack:
+            member = stack.pop()
+            members.append(member)
+            for other in links[member]:
+                if other in selected and other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        if len(members) > 1:
+            clusters.append(members)
+    return clusters
+
+
+def cluster_lookup(clusters: list) -> dict:
+    """Return {key: cluster_number} for every key that has a near-duplicate."""
+    return {key: i for i, members in enumerate(clusters) for key in members}
+
+
+def exclude_near_duplicates(
+    drawn: list, cluster_of: dict, get_pool, rng: random.Random | None = None
+) -> list:
+    """
+    Return drawn with near-duplicates of earlier picks replaced from a pool.
+
+    cluster_of maps question id to its near-duplicate cluster (see
+    cluster_lookup). get_pool is a zero-argument callable returning the
+    candidate replacements; it is only called when drawn holds a duplicate,
+    so the common case costs O(len(drawn)). Replacements are taken at random,
+    skipping questions already drawn or in a cluster already represented.
+    Raises ValueError if the pool cannot supply enough distinct questions.
+    """
+    rng = rng or random.Random()
+    used_clusters = set()
+    used_ids = {q["id"] for q in drawn}
+    kept = []
+    for q in drawn:
+        cluster = cluster_of.get(q["id"])
+        if cluster is None or cluster not in used_clusters:
+            kept.append(q)
+            if cluster is not None:
+                used_clusters.add(cluster)
+    if len(kept) == len(drawn):
+        return drawn
+
+    pool = get_pool()
+    for q in rng.sample(pool, len(pool)):
+        if len(kept) == len(drawn):
+            break
+        cluster = cluster_of.get(q["id"])
+        if q["id"] in used_ids or cluster in used_clusters:
+            continue
+        kept.append(q)
+        used_ids.add(q["id"])
+        if cluster is not None:
+            used_clusters.add(cluster)
+    if len(kept) < len(drawn):
+        raise ValueError(
+            f"Need {len(drawn)} questions but only {len(kept)} remain once "
+            "near-duplicates are excluded"
+        )
+    return kept
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Report near-duplicate questions across banks.")
+    parser.add_argument("banks", nargs="+", help="JSON or JSON Lines question bank paths")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Minimum estimated Jaccard similarity",
+    )
+    parser.add_argument("--out", default=None, help="Write clusters as JSON to this path")
+    args = parser.parse_args(argv)
+
+    keyed = []
+    for path in args.banks:
+        with open(path, "rb") as f:
+            # Same "bank:id" keys as the app's namespaced question ids
+            bank_name = os.path.splitext(os.path.basename(path))[0]
+            keyed.extend((f"{bank_name}:{q['id']}", q) for q in load_question_bank(f, is_json_lines(path)))
+
+    clusters = find_near_duplicate_clusters(keyed, args.threshold)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(clusters, f, indent=2)
+    for members in clusters:
+        print(", ".join(members))
+    print(f"{len(clusters)} near-duplicate clusters in {len(keyed)} questions")
+
+
+if __name__ == "__main__":
+    main()
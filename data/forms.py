@@ -0,0 +1,243 @@
+"""data/forms.py — Batch exam-form generator for proctored sittings.
+
+Produces many distinct, category-balanced exam forms from one question bank
+and writes them to a compact JSON manifest that the setup page loads by form
+id. Every form meets the same per-category quotas (proportional to each
+primary tag's share of the bank), and no two forms share more than
+max_overlap questions.
+
+Candidate forms are drawn in batches: each batch is one NumPy permutation per
+category stratum across all forms in the batch, and batches are generated in
+a process pool. The overlap check runs in the parent process against
+per-question postings of the forms accepted so far.
+
+Usage:
+    python -m data.forms bank/Q1.json --forms 500 --size 8 --max-overlap 4
+
+MUST NOT import streamlit.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data.catalog import bank_name_for, namespace_questions
+from data.loader import is_json_lines, load_question_bank
+
+MANIFEST_VERSION = 1
+FORMS_DIR = "forms"
+
+# Candidate forms generated per worker task.
+_BATCH_SIZE = 256
+# Give up once this many candidates per requested form have been rejected.
+_MAX_CANDIDATES_PER_FORM = 50
+
+
+def build_strata(questions: list) -> list:
+    """Return [(primary_tag_id, np.ndarray of positions), ...] grouped by first tag."""
+    groups = {}
+    for pos, q in enumerate(questions):
+        groups.setdefault(q["tags"][0], []).append(pos)
+    return [(tag_id, np.array(positions)) for tag_id, positions in sorted(groups.items())]
+
+
+def proportional_quotas(strata: list, size: int) -> list:
+    """Return per-stratum quotas proportional to stratum size, summing to size."""
+    sizes = np.array([len(positions) for _, positions in strata], dtype=float)
+    exact = sizes * size / sizes.sum()
+    quotas = np.floor(exact).astype(int)
+    order = np.argsort(-(exact - quotas), kind="stable")
+    quotas[order[: size - quotas.sum()]] += 1
+    return quotas.tolist()
+
+
+def _sample_stratum(rng: np.random.Generator, positions: np.ndarray, k: int, batch_size: int) -> np.ndarray:
+    """Return a (batch_size, k) array; each row is k distinct positions from the stratum."""
+    m = len(positions)
+    if m <= 4 * k:
+        # Small stratum: one independent permutation per form in a single call.
+        return rng.permuted(np.broadcast_to(positions, (batch_size, m)), axis=1)[:, :k]
+    # Large stratum: draw with replacement and redraw the few rows with repeats,
+    # so cost scales with k rather than with the stratum size.
+    idx = rng.integers(0, m, size=(batch_size, k))
+    has_repeat = (np.diff(np.sort(idx, axis=1), axis=1) == 0).any(axis=1)
+    for row in np.flatnonzero(has_repeat):
+        idx[row] = rng.choice(m, size=k, replace=False)
+    return positions[idx]
+
+
+def _generate_batch(strata_positions: list, quotas: list, batch_size: int, seed: int) -> np.ndarray:
+    """Return a (batch_size, sum(quotas)) array of candidate forms (bank positions)."""
+    rng = np.random.default_rng(seed)
+    parts = [
+        _sample_stratum(rng, positions, k, batch_size)
+        for positions, k in zip(strata_positions, quotas)
+        if k > 0
+    ]
+    return np.concatenate(parts, axis=1)
+
+
+def generate_forms(
+    questions: list,
+    n_forms: int,
+    size: int,
+    max_overlap: int,
+    seed: int = 0,
+    workers: int | None = None,
+) -> list:
+    """
+    Return n_forms forms as [{"seed": int, "positions": [int, ...]}, ...].
+
+    Each form holds size questions meeting the proportional category quotas,
+    and shares at most max_overlap questions with every other form. The
+    per-form seed is recorded for reproducible option shuffles.
+
+    Raises ValueError if the bank is too small for size, or if the overlap
+    limit cannot be met after a bounded number of candidates.
+    """
+    if size > len(questions):
+        raise ValueError(f"Need {size} questions per form but the bank has {len(questions)}")
+    strata = build_strata(questions)
+    quotas = proportional_quotas(strata, size)
+    strata_positions = [positions for _, positions in strata]
+    batch_size = _BATCH_SIZE
+
+    seed_seq = np.random.SeedSequence(seed)
+    form_seeds = seed_seq.generate_state(n_forms).tolist()
+    postings = [[] for _ in questions]  # bank position -> accepted form indexes
+    accepted = []
+    max_candidates = n_forms * _MAX_CANDIDATES_PER_FORM
+    candidates_seen = 0
+    workers = workers or os.cpu_count() or 1
+
+    def _accept(batch: np.ndarray) -> None:
+        nonlocal candidates_seen
+        for form in batch:
+            if len(accepted) == n_forms:
+                return
+            candidates_seen += 1
+            form_list = form.tolist()
+            hits = [f for pos in form_list for f in postings[pos]]
+            if hits and np.bincount(hits).max() > max_overlap:
+                continue
+            for pos in form_list:
+                postings[pos].append(len(accepted))
+            accepted.append(sorted(form_list))
+
+    task_seeds = iter(seed_seq.spawn(max_candidates // batch_size + workers + 1))
+    if workers == 1:
+        while len(accepted) < n_forms and candidates_seen < max_candidates:
+            child = next(task_seeds).generate_state(1)[0]
+            _accept(_generate_batch(strata_positions, quotas, batch_size, child))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while len(accepted) < n_forms and candidates_seen < max_candidates:
+                futures = [
+                    pool.submit(
+                        _generate_batch,
+                        strata_positions,
+                        quotas,
+                        batch_size,
+                        next(task_seeds).generate_state(1)[0],
+                    )
+                    for _ in range(workers)
+                ]
+                for future in futures:
+                    _accept(future.result())
+
+    if len(accepted) < n_forms:
+        raise ValueError(
+            f"Only {len(accepted)} of {n_forms} forms could be built with at most "
+            f"{max_overlap} shared questions; raise --max-overlap or add questions"
+        )
+    return [
+        {"seed": form_seed, "positions": positions}
+        for form_seed, positions in zip(form_seeds, accepted)
+    ]
+
+
+def build_manifest(bank_name: str, questions: list, forms: list, max_overlap: int) -> dict:
+    """Return the manifest dict: form ids mapped to per-form seed and question ids."""
+    width = len(str(len(forms)))
+    return {
+        "version": MANIFEST_VERSION,
+        "bank": bank_name,
+        "question_count": len(forms[0]["positions"]) if forms else 0,
+        "max_overlap": max_overlap,
+        "forms": {
+            f"F{i + 1:0{width}d}": {
+                "seed": form["seed"],
+                "ids": [questions[pos]["id"] for pos in form["positions"]],
+            }
+            for i, form in enumerate(forms)
+        },
+    }
+
+
+def load_manifest(file_obj) -> dict:
+    """Load and validate a forms manifest from a file-like object."""
+    manifest = json.load(file_obj)
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError("Forms manifest has an unsupported format")
+    if not isinstance(manifest.get("forms"), dict):
+        raise ValueError("Forms manifest is missing 'forms'")
+    return manifest
+
+
+def get_form(manifest: dict, form_id: str, questions: list) -> tuple:
+    """
+    Return (form_questions, seed) for form_id, in the form's printed order.
+
+    Raises ValueError if the form id is unknown or references questions
+    missing from the loaded bank.
+    """
+    form = manifest["forms"].get(form_id)
+    if form is None:
+        raise ValueError(f"Unknown exam form: '{form_id}'")
+    by_id = {q["id"]: q for q in questions}
+    missing = [q_id for q_id in form["ids"] if q_id not in by_id]
+    if missing:
+        raise ValueError(f"Form {form_id} references questions not in the bank: {missing}")
+    return [by_id[q_id] for q_id in form["ids"]], form["seed"]
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate balanced exam forms from a bank.")
+    parser.add_argument("bank", help="Path to a JSON or JSON Lines question bank")
+    parser.add_argument("--forms", type=int, required=True, help="Number of forms")
+    parser.add_argument("--size", type=int, default=8, help="Questions per form")
+    parser.add_argument(
+        "--max-overlap", type=int, required=True, help="Max questions shared by any two forms"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Base seed")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--out", default=None, help=f"Manifest path (default {FORMS_DIR}/<bank>)")
+    args = parser.parse_args(argv)
+
+    bank_name = os.path.basename(args.bank)
+    started = time.perf_counter()
+    try:
+        with open(args.bank, "rb") as f:
+            # Same namespaced ids ("Q1:3") the app uses, so forms resolve by id
+            questions = namespace_questions(
+                load_question_bank(f, is_json_lines(args.bank)), bank_name_for(args.bank)
+            )
+        forms = generate_forms(
+            questions, args.forms, args.size, args.max_overlap, args.seed, args.workers
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    manifest = build_manifest(bank_name, questions, forms, args.max_overlap)
+
+    out = args.out or os.path.join(FORMS_DIR, bank_name)
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    print(f"Wrote {len(forms)} forms to {out} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
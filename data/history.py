@@ -0,0 +1,183 @@
+"""data/history.py — Optional SQLite attempt-history store.
+
+Keeps every submitted attempt, its per-question answers, and per-user and
+per-user/per-category running totals. The totals are updated incrementally
+in the same transaction as the attempt, so loading a user's history is one
+indexed lookup instead of a re-scan of past attempts.
+
+The store is enabled by pointing QUIZLIT_HISTORY_DB at a database file
+(self-hosted deployments). The database runs in WAL mode so concurrent
+sessions can commit while others read.
+
+MUST NOT import streamlit.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+HISTORY_DB_ENV = "QUIZLIT_HISTORY_DB"
+
+# Milliseconds a writer waits for another session's transaction before failing.
+_BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    attempt_id   INTEGER PRIMARY KEY,
+    user         TEXT    NOT NULL,
+    submitted_at REAL    NOT NULL,
+    exam_profile TEXT    NOT NULL,
+    total_score  INTEGER NOT NULL,
+    max_score    INTEGER NOT NULL,
+    passed       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_user ON attempts (user, submitted_at);
+
+CREATE TABLE IF NOT EXISTS answers (
+    attempt_id      INTEGER NOT NULL REFERENCES attempts (attempt_id),
+    question_id     TEXT    NOT NULL,
+    selected_option TEXT,
+    points          INTEGER NOT NULL,
+    PRIMARY KEY (attempt_id, question_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS user_totals (
+    user         TEXT    PRIMARY KEY,
+    attempts     INTEGER NOT NULL,
+    passes       INTEGER NOT NULL,
+    total_points INTEGER NOT NULL,
+    total_max    INTEGER NOT NULL,
+    last_attempt REAL    NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS category_totals (
+    user              TEXT    NOT NULL,
+    category          TEXT    NOT NULL,
+    cumulative_points INTEGER NOT NULL,
+    cumulative_max    INTEGER NOT NULL,
+    PRIMARY KEY (user, category)
+) WITHOUT ROWID;
+"""
+
+# One connection per (thread, path): sqlite3 connections must not be shared
+# across threads, and Streamlit runs each session's script on its own thread.
+_local = threading.local()
+_initialised: set = set()
+_init_lock = threading.Lock()
+
+
+def history_db_path() -> str | None:
+    """Return the configured database path, or None if the store is disabled."""
+    return os.environ.get(HISTORY_DB_ENV) or None
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Return this thread's connection to path, creating the schema on first use."""
+    connections = _local.__dict__.setdefault("connections", {})
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with _init_lock:
+            if path not in _initialised:
+                conn.executescript(_SCHEMA)
+                _initialised.add(path)
+        connections[path] = conn
+    return conn
+
+
+def record_attempt(conn: sqlite3.Connection, results: dict) -> int:
+    """
+    Store a submitted session and fold it into the user's running totals.
+
+    results is the dict built by the quiz page on submit; the session (not
+    cumulative) values of its category breakdown are added to the totals.
+    Everything is written in one transaction. Returns the new attempt id.
+    """
+    user = results["user_name"]
+    now = time.time()
+    passed = int(bool(results["passed"]))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        attempt_id = conn.execute(
+            "INSERT INTO attempts (user, submitted_at, exam_profile, total_score, max_score, passed)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (user, now, results["exam_profile"], results["total_score"], results["max_score"], passed),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO answers (attempt_id, question_id, selected_option, points) VALUES (?, ?, ?, ?)",
+            [
+                (attempt_id, pq["question_id"], pq["selected_option_id"], pq["points_earned"])
+                for pq in results["per_question"]
+            ],
+        )
+        conn.execute(
+            "INSERT INTO user_totals (user, attempts, passes, total_points, total_max, last_attempt)"
+            " VALUES (?, 1, ?, ?, ?, ?)"
+            " ON CONFLICT (user) DO UPDATE SET"
+            " attempts = attempts + 1, passes = passes + excluded.passes,"
+            " total_points = total_points + excluded.total_points,"
+            " total_max = total_max + excluded.total_max, last_attempt = excluded.last_attempt",
+            (user, passed, results["total_score"], results["max_score"], now),
+        )
+        conn.executemany(
+            "INSERT INTO category_totals (user, category, cumulative_points, cumulative_max)"
+            " VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (user, category) DO UPDATE SET"
+            " cumulative_points = cumulative_points + excluded.cumulative_points,"
+            " cumulative_max = cumulative_max + excluded.cumulative_max",
+            [
+                (user, category, data["session_points"], data["session_max"])
+                for category, data in results["category_breakdown"].items()
+                if data["session_max"] > 0
+            ],
+        )
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return attempt_id
+
+
+def load_history(conn: sqlite3.Connection, user: str) -> dict | None:
+    """
+    Return the user's cumulative category totals in the scorecard shape
+    returned by logic.importer.load_scorecard, or None if the user has no
+    recorded attempts.
+    """
+    rows = conn.execute(
+        "SELECT category, cumulative_points, cumulative_max FROM category_totals WHERE user = ?",
+        (user,),
+    ).fetchall()
+    if not rows:
+        return None
+    return {
+        "category_summary": {
+            category: {"cumulative_points": points, "cumulative_max": max_points}
+            for category, points, max_points in rows
+        }
+    }
+
+
+def user_summary(conn: sqlite3.Connection, user: str) -> dict | None:
+    """Return {"attempts", "passes", "total_points", "total_max", "last_attempt"} or None."""
+    row = conn.execute(
+        "SELECT attempts, passes, total_points, total_max, last_attempt FROM user_totals WHERE user = ?",
+        (user,),
+    ).fetchone()
+    if row is None:
+        return None
+    return dict(zip(("attempts", "passes", "total_points", "total_max", "last_attempt"), row))
+
+
+def recent_attempts(conn: sqlite3.Connection, user: str, limit: int = 10) -> list:
+    """Return the user's latest attempts, newest first."""
+    rows = conn.execute(
+        "SELECT attempt_id, submitted_at, exam_profile, total_score, max_score, passed"
+        " FROM attempts WHERE user = ? ORDER BY submitted_at DESC LIMIT ?",
+        (user, limit),
+    ).fetchall()
+    keys = ("attempt_id", "submitted_at", "exam_profile", "total_score", "max_score", "passed")
+    return [dict(zip(keys, row)) for row in rows]
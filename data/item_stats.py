@@ -0,0 +1,297 @@
+"""data/item_stats.py — Answer event log and streaming item analysis.
+
+When QUIZLIT_EVENT_LOG names a file, every submitted session appends one
+fixed-size binary record per question to it. Records are queued and written
+in batches by a background thread, so submitting never waits on disk.
+
+The aggregator keeps a constant-size row of running sums per question
+(responses, picks per option, score as a fraction of the question's
+maximum, and the sums needed for the
+point-biserial correlation) plus the log offset it has read up to, so a
+refresh only reads the records appended since the last one. Both are stored
+next to the log.
+
+Usage:
+    python -m data.item_stats [--log events/answers.bin] [--out item_stats.csv]
+
+MUST NOT import streamlit.
+"""
+import argparse
+import atexit
+import csv
+import os
+import queue
+import threading
+
+import numpy as np
+
+EVENT_LOG_ENV = "QUIZLIT_EVENT_LOG"
+DEFAULT_EVENT_LOG = os.path.join("events", "answers.bin")
+
+# Question ids longer than this many UTF-8 bytes are truncated in the log.
+QUESTION_ID_BYTES = 48
+OPTIONS = ["A", "B", "C", "D"]
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("question_id", f"S{QUESTION_ID_BYTES}"),
+        ("option", "u1"),  # 0 = unanswered, 1..4 = original option A..D
+        ("points", "u1"),
+        ("max_points", "u1"),  # the session's points for the best option
+        ("best", "u1"),  # 1 if the best-tier option was chosen
+        ("rest_score", "f4"),  # rest of the session's score as a fraction of its max
+    ]
+)
+
+# Accumulator columns per question.
+_N, _UNANSWERED = 0, 1  # option picks occupy columns 1..5 (unanswered, A..D)
+_SCORE, _BEST, _Y, _YY, _XY = 6, 7, 8, 9, 10  # _SCORE sums points / max_points
+_COLUMNS = 11
+
+# Report thresholds for bank authors.
+TOO_EASY_BEST_RATE = 0.9
+TOO_HARD_BEST_RATE = 0.2
+DEAD_OPTION_RATE = 0.02
+LOW_DISCRIMINATION = 0.1
+MIN_RESPONSES = 30
+
+# Writer: batches are flushed at most this often (seconds).
+_FLUSH_INTERVAL = 0.5
+
+_queue: queue.Queue = queue.Queue()
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+
+def event_log_path() -> str | None:
+    """Return the event log path, or None (logging off) if QUIZLIT_EVENT_LOG is unset or ''."""
+    return os.environ.get(EVENT_LOG_ENV) or None
+
+
+def build_events(results: dict) -> np.ndarray:
+    """
+    Return one EVENT_DTYPE record per question of a submitted session. The
+    best flag comes from the chosen option's tier, so it holds under every
+    points scheme.
+    """
+    per_question = results["per_question"]
+    max_points = results["max_points_per_question"]
+    rest_max = results["max_score"] - max_points
+    events = np.zeros(len(per_question), dtype=EVENT_DTYPE)
+    for i, pq in enumerate(per_question):
+        selected = pq["selected_option_id"]
+        events[i] = (
+            pq["question_id"].encode("utf-8")[:QUESTION_ID_BYTES],
+            0 if selected is None else OPTIONS.index(selected) + 1,
+            pq["points_earned"],
+            max_points,
+            selected is not None and pq["tier_for_option"].get(selected) == "best",
+            (results["total_score"] - pq["points_earned"]) / rest_max if rest_max > 0 else 0.0,
+        )
+    return events
+
+
+def log_events(path: str, events: np.ndarray) -> None:
+    """Queue events for appending to path; returns immediately."""
+    _start_writer()
+    _queue.put((path, events))
+
+
+def _start_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="event-writer", daemon=True)
+            _writer.start()
+            atexit.register(flush_events)
+
+
+def _write_loop() -> None:
+    while True:
+        batches = [_queue.get()]
+        # Gather whatever else arrives within the flush interval into one write
+        try:
+            while True:
+                batches.append(_queue.get(timeout=_FLUSH_INTERVAL))
+        except queue.Empty:
+            pass
+        _write_batches(batches)
+        for _ in batches:
+            _queue.task_done()
+
+
+def _write_batches(batches: list) -> None:
+    by_path = {}
+    for path, events in batches:
+        by_path.setdefault(path, []).append(events)
+    for path, chunks in by_path.items():
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "ab") as f:
+                f.write(np.concatenate(chunks).tobytes())
+        except OSError:
+            continue  # analytics must never take the app down; drop the batch
+
+
+def flush_events() -> None:
+    """Block until every queued event has been written."""
+    if _writer is not None:
+        _queue.join()
+
+
+def _stats_path(log_path: str) -> str:
+    return log_path + ".stats.npz"
+
+
+def new_stats() -> dict:
+    """Return empty aggregator state."""
+    return {
+        "offset": 0,
+        "question_ids": np.array([], dtype=f"S{QUESTION_ID_BYTES}"),
+        "acc": np.zeros((0, _COLUMNS)),
+    }
+
+
+def load_stats(log_path: str) -> dict:
+    """Return the saved aggregator state for log_path, or empty state."""
+    try:
+        with np.load(_stats_path(log_path)) as saved:
+            return {
+                "offset": int(saved["offset"]),
+                "question_ids": saved["question_ids"],
+                "acc": saved["acc"],
+            }
+    except FileNotFoundError:
+        return new_stats()
+
+
+def save_stats(log_path: str, stats: dict) -> None:
+    """Persist aggregator state next to the log (atomic replace)."""
+    tmp = _stats_path(log_path) + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, offset=stats["offset"], question_ids=stats["question_ids"], acc=stats["acc"])
+    os.replace(tmp, _stats_path(log_path))
+
+
+def accumulate(events: np.ndarray) -> tuple:
+    """Return (sorted unique question ids, per-question accumulator rows) for events."""
+    question_ids, inverse = np.unique(events["question_id"], return_inverse=True)
+    k = len(question_ids)
+    acc = np.zeros((k, _COLUMNS))
+    best = events["best"].astype(float)
+    y = events["rest_score"].astype(float)
+    acc[:, _N] = np.bincount(inverse, minlength=k)
+    picks = np.bincount(inverse * 5 + events["option"], minlength=k * 5).reshape(k, 5)
+    acc[:, _UNANSWERED : _UNANSWERED + 5] = picks
+    score = events["points"] / np.maximum(events["max_points"], 1)
+    acc[:, _SCORE] = np.bincount(inverse, weights=score, minlength=k)
+    acc[:, _BEST] = np.bincount(inverse, weights=best, minlength=k)
+    acc[:, _Y] = np.bincount(inverse, weights=y, minlength=k)
+    acc[:, _YY] = np.bincount(inverse, weights=y * y, minlength=k)
+    acc[:, _XY] = np.bincount(inverse, weights=best * y, minlength=k)
+    return question_ids, acc
+
+
+def merge_stats(stats: dict, question_ids: np.ndarray, acc: np.ndarray) -> None:
+    """Add accumulator rows for question_ids into stats in place."""
+    all_ids = np.union1d(stats["question_ids"], question_ids)
+    merged = np.zeros((len(all_ids), _COLUMNS))
+    merged[np.searchsorted(all_ids, stats["question_ids"])] += stats["acc"]
+    merged[np.searchsorted(all_ids, question_ids)] += acc
+    stats["question_ids"], stats["acc"] = all_ids, merged
+
+
+def refresh_stats(log_path: str, chunk_records: int = 1_000_000) -> dict:
+    """
+    Fold every record appended to log_path since the last refresh into the
+    saved state, save it, and return it. Reads in chunks of chunk_records so
+    memory stays bounded however far behind the state is.
+    """
+    stats = load_stats(log_path)
+    try:
+        size = os.path.getsize(log_path)
+    except FileNotFoundError:
+        return stats
+    # Only whole records; a batch still being written is picked up next time
+    end = size - size % EVENT_DTYPE.itemsize
+    with open(log_path, "rb") as f:
+        while stats["offset"] < end:
+            count = min(chunk_records, (end - stats["offset"]) // EVENT_DTYPE.itemsize)
+            f.seek(stats["offset"])
+            events = np.fromfile(f, dtype=EVENT_DTYPE, count=count)
+            merge_stats(stats, *accumulate(events))
+            stats["offset"] += count * EVENT_DTYPE.itemsize
+    save_stats(log_path, stats)
+    return stats
+
+
+def item_report(stats: dict, max_points: int = 5) -> list:
+    """
+    Return one row per question: responses, pick rate per option, mean
+    points (rescaled to max_points, as sessions may use different points
+    schemes), best-option rate, point-biserial discrimination (best option
+    chosen vs. rest-of-session score) and review flags.
+    """
+    acc = stats["acc"]
+    n = acc[:, _N]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        picks = acc[:, _UNANSWERED : _UNANSWERED + 5] / n[:, None]
+        mean_score = acc[:, _SCORE] / n
+        best_rate = acc[:, _BEST] / n
+        cov = n * acc[:, _XY] - acc[:, _BEST] * acc[:, _Y]
+        var_x = n * acc[:, _BEST] - acc[:, _BEST] ** 2  # best is 0/1, so sum(x^2) == sum(x)
+        var_y = n * acc[:, _YY] - acc[:, _Y] ** 2
+        point_biserial = np.where((var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+
+    rows = []
+    for i, question_id in enumerate(stats["question_ids"]):
+        flags = []
+        if n[i] >= MIN_RESPONSES:
+            if best_rate[i] >= TOO_EASY_BEST_RATE:
+                flags.append("too easy")
+            if best_rate[i] <= TOO_HARD_BEST_RATE:
+                flags.append("too hard")
+            flags.extend(
+                f"option {opt} rarely chosen"
+                for j, opt in enumerate(OPTIONS)
+                if picks[i, j + 1] < DEAD_OPTION_RATE
+            )
+            if not np.isnan(point_biserial[i]) and point_biserial[i] < LOW_DISCRIMINATION:
+                flags.append("low discrimination")
+        rows.append(
+            {
+                "question_id": question_id.decode("utf-8", errors="replace"),
+                "responses": int(n[i]),
+                **{f"pct_{opt}": round(float(picks[i, j + 1]) * 100, 1) for j, opt in enumerate(OPTIONS)},
+                "pct_unanswered": round(float(picks[i, 0]) * 100, 1),
+                "mean_points": round(float(mean_score[i]) * max_points, 2),
+                "mean_points_pct": round(float(mean_score[i]) * 100, 1),
+                "best_rate": round(float(best_rate[i]), 3),
+                "point_biserial": None if np.isnan(point_biserial[i]) else round(float(point_biserial[i]), 3),
+                "flags": "; ".join(flags),
+            }
+        )
+    return rows
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh and export per-question item statistics.")
+    parser.add_argument(
+        "--log", default=event_log_path() or DEFAULT_EVENT_LOG, help="Answer event log path"
+    )
+    parser.add_argument("--out", default="item_stats.csv", help="CSV report path")
+    args = parser.parse_args(argv)
+
+    stats = refresh_stats(args.log)
+    rows = item_report(stats)
+    with open(args.out, "w", newline="", encoding="utf-8") as f:
+        if rows:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    flagged = sum(1 for row in rows if row["flags"])
+    print(f"Wrote {len(rows)} questions ({flagged} flagged) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
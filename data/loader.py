@@ -1,5 +1,7 @@
+import hashlib
 import json
 import random
+import re
 
 _REQUIRED_RATIONALE_KEYS = {
     "why_best",
@@ -13,83 +15,206 @@ _REQUIRED_RATIONALE_KEYS = {
 _REQUIRED_TIER_KEYS = {"best", "second_best", "third_best", "distractor"}
 _VALID_OPTION_IDS = {"A", "B", "C", "D"}
 _VALID_POINTS = {5, 3, 1, 0}
+JSON_LINES_SUFFIX = ".jsonl"
+# Images are referenced by the SHA-256 of the file (see data/assets.py)
+_ASSET_ID_RE = re.compile(r"[0-9a-f]{64}")
+_MEDIA_TEXT_KEYS = ("caption", "alt")
 
 
-def load_question_bank(file_obj) -> list:
-    """Load and validate a JSON question bank from a file-like object."""
+def case_study_id_for(scenario: str) -> str | None:
+    """Return the content-derived case study id for a scenario text (None if empty)."""
+    if not scenario:
+        return None
+    return "cs-" + hashlib.sha1(scenario.encode("utf-8")).hexdigest()[:12]
+
+
+def is_json_lines(path: str) -> bool:
+    """Return True if a bank path holds JSON Lines (one question per line)."""
+    return path.endswith(JSON_LINES_SUFFIX)
+
+
+def read_bank_json(file_obj, json_lines: bool = False) -> tuple:
+    """
+    Parse bank JSON from a file-like object; return (raw_questions, case_studies).
+
+    Accepts either a JSON array of questions, each carrying its own
+    'scenario', or an object {"case_studies": {id: text}, "questions": [...]}
+    whose questions reference a shared scenario by 'case_study_id'. A case
+    study may also be {"text": ..., "media": [...]} to attach images to its
+    scenario. With json_lines, the file holds one question object per line instead (as
+    written by data.bulk_import); blank lines are ignored.
+    """
+    if json_lines:
+        questions = []
+        for line_no, line in enumerate(file_obj, 1):
+            if line.strip():
+                try:
+                    questions.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Line {line_no}: {e}") from None
+        return questions, {}
     data = json.load(file_obj)
+    case_studies = {}
+    if isinstance(data, dict):
+        case_studies = data.get("case_studies", {})
+        if not isinstance(case_studies, dict) or not all(
+            isinstance(cs, str) and cs
+            or isinstance(cs, dict) and isinstance(cs.get("text"), str) and cs["text"]
+            for cs in case_studies.values()
+        ):
+            raise ValueError(
+                "Field 'case_studies' must map ids to non-empty strings or {'text', 'media'} objects"
+            )
+        for cs_id, cs in case_studies.items():
+            if isinstance(cs, dict):
+                check_media(cs.get("media", []), f"Case study '{cs_id}'")
+        data = data.get("questions")
     if not isinstance(data, list):
         raise ValueError("Question bank must be a JSON array")
+    return data, case_studies
 
-    questions = []
-    seen_ids = set()
 
-    for q in data:
-        q_id = q.get("id")
-        if not isinstance(q_id, int):
-            raise ValueError(f"Question {q_id}: field 'id' must be an integer")
-        if q_id in seen_ids:
-            raise ValueError(f"Question {q_id}: duplicate id")
-        seen_ids.add(q_id)
+def question_content_hash(q: dict, case_studies: dict) -> str:
+    """Return a hash of a raw question's content, including a referenced scenario."""
+    payload = json.dumps(q, sort_keys=True, ensure_ascii=False)
+    if "scenario" not in q and "case_study_id" in q:
+        cs = case_studies.get(q["case_study_id"], "")
+        payload += cs if isinstance(cs, str) else json.dumps(cs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-        if "scenario" not in q or not isinstance(q["scenario"], str):
-            raise ValueError(f"Question {q_id}: field 'scenario' must be a string")
 
-        if "question" not in q:
-            raise ValueError(f"Question {q_id}: field 'question' is missing")
-        if not isinstance(q["question"], str) or not q["question"]:
-            raise ValueError(f"Question {q_id}: field 'question' must be a non-empty string")
+def check_question_id(q: dict, seen_ids: set) -> None:
+    """Validate a raw question's integer id and record it in seen_ids."""
+    if not isinstance(q, dict):
+        raise ValueError("Each question must be a JSON object")
+    q_id = q.get("id")
+    if not isinstance(q_id, int):
+        raise ValueError(f"Question {q_id}: field 'id' must be an integer")
+    if q_id in seen_ids:
+        raise ValueError(f"Question {q_id}: duplicate id")
+    seen_ids.add(q_id)
 
-        options = q.get("options", {})
-        if not isinstance(options, dict) or set(options.keys()) != _VALID_OPTION_IDS:
-            raise ValueError(
-                f"Question {q_id}: field 'options' must have exactly 4 keys A/B/C/D"
-            )
-        for key, val in options.items():
-            if not isinstance(val, str) or not val:
-                raise ValueError(
-                    f"Question {q_id}: option '{key}' must be a non-empty string"
-                )
-
-        scoring = q.get("scoring", {})
-        if not isinstance(scoring, dict) or set(scoring.keys()) != _REQUIRED_TIER_KEYS:
+
+def check_media(refs, where: str) -> None:
+    """
+    Validate a list of image references [{"asset": id, "caption", "alt"}];
+    where names the owner in error messages ("Question 3").
+    """
+    if not isinstance(refs, list):
+        raise ValueError(f"{where}: media must be a list")
+    for ref in refs:
+        if not isinstance(ref, dict) or not _ASSET_ID_RE.fullmatch(str(ref.get("asset", ""))):
+            raise ValueError(f"{where}: each media item needs an 'asset' id (64 hex digits)")
+        for key in _MEDIA_TEXT_KEYS:
+            if not isinstance(ref.get(key, ""), str):
+                raise ValueError(f"{where}: media '{key}' must be a string")
+
+
+def prepare_question(q: dict, case_studies: dict, scenario_texts: dict) -> dict:
+    """
+    Validate one raw question in place and return it.
+
+    Resolves a referenced case study (and its images, as 'scenario_media'),
+    and replaces the scenario with the canonical shared string from
+    scenario_texts (text -> string), adding it there if new.
+    """
+    q_id = q.get("id")
+    if "case_study_id" in q and "scenario" not in q:
+        if q["case_study_id"] not in case_studies:
             raise ValueError(
-                f"Question {q_id}: field 'scoring' must have exactly keys "
-                f"{_REQUIRED_TIER_KEYS}"
+                f"Question {q_id}: unknown case_study_id '{q['case_study_id']}'"
             )
-        option_vals = set()
-        points_vals = set()
-        for tier_name, tier in scoring.items():
-            if "option" not in tier or "points" not in tier:
-                raise ValueError(
-                    f"Question {q_id}: scoring tier '{tier_name}' missing 'option' or 'points'"
-                )
-            option_vals.add(tier["option"])
-            points_vals.add(tier["points"])
-        if option_vals != _VALID_OPTION_IDS:
+        cs = case_studies[q["case_study_id"]]
+        if isinstance(cs, dict):
+            if cs.get("media"):
+                q.setdefault("scenario_media", cs["media"])
+            cs = cs["text"]
+        q["scenario"] = cs
+    if "scenario" not in q or not isinstance(q["scenario"], str):
+        raise ValueError(f"Question {q_id}: field 'scenario' must be a string")
+    q["scenario"] = scenario_texts.setdefault(q["scenario"], q["scenario"])
+    q.setdefault("case_study_id", case_study_id_for(q["scenario"]))
+
+    if "question" not in q:
+        raise ValueError(f"Question {q_id}: field 'question' is missing")
+    if not isinstance(q["question"], str) or not q["question"]:
+        raise ValueError(f"Question {q_id}: field 'question' must be a non-empty string")
+
+    options = q.get("options", {})
+    if not isinstance(options, dict) or set(options.keys()) != _VALID_OPTION_IDS:
+        raise ValueError(
+            f"Question {q_id}: field 'options' must have exactly 4 keys A/B/C/D"
+        )
+    for key, val in options.items():
+        if not isinstance(val, str) or not val:
             raise ValueError(
-                f"Question {q_id}: scoring option values must be exactly "
-                f"{{'A','B','C','D'}}"
+                f"Question {q_id}: option '{key}' must be a non-empty string"
             )
-        if points_vals != _VALID_POINTS:
+
+    scoring = q.get("scoring", {})
+    if not isinstance(scoring, dict) or set(scoring.keys()) != _REQUIRED_TIER_KEYS:
+        raise ValueError(
+            f"Question {q_id}: field 'scoring' must have exactly keys "
+            f"{_REQUIRED_TIER_KEYS}"
+        )
+    option_vals = set()
+    points_vals = set()
+    for tier_name, tier in scoring.items():
+        if "option" not in tier or "points" not in tier:
             raise ValueError(
-                f"Question {q_id}: scoring points must be exactly {{5,3,1,0}}"
+                f"Question {q_id}: scoring tier '{tier_name}' missing 'option' or 'points'"
             )
+        option_vals.add(tier["option"])
+        points_vals.add(tier["points"])
+    if option_vals != _VALID_OPTION_IDS:
+        raise ValueError(
+            f"Question {q_id}: scoring option values must be exactly "
+            f"{{'A','B','C','D'}}"
+        )
+    if points_vals != _VALID_POINTS:
+        raise ValueError(
+            f"Question {q_id}: scoring points must be exactly {{5,3,1,0}}"
+        )
 
-        tags = q.get("tags", [])
-        if not isinstance(tags, list) or len(tags) == 0:
-            raise ValueError(f"Question {q_id}: field 'tags' must be a non-empty list")
+    tags = q.get("tags", [])
+    if not isinstance(tags, list) or len(tags) == 0:
+        raise ValueError(f"Question {q_id}: field 'tags' must be a non-empty list")
 
-        rationale = q.get("rationale", {})
-        if not isinstance(rationale, dict) or not _REQUIRED_RATIONALE_KEYS.issubset(
-            set(rationale.keys())
-        ):
-            raise ValueError(
-                f"Question {q_id}: field 'rationale' is missing required keys"
-            )
+    for field in ("media", "scenario_media"):
+        if field in q:
+            check_media(q[field], f"Question {q_id}")
+
+    rationale = q.get("rationale", {})
+    if not isinstance(rationale, dict) or not _REQUIRED_RATIONALE_KEYS.issubset(
+        set(rationale.keys())
+    ):
+        raise ValueError(
+            f"Question {q_id}: field 'rationale' is missing required keys"
+        )
+
+    return q
 
-        questions.append(q)
 
+def load_question_bank(file_obj, json_lines: bool = False, on_progress=None) -> list:
+    """
+    Load and validate a JSON (or, with json_lines, JSON Lines) question bank
+    from a file-like object. on_progress, if given, is called as
+    on_progress(validated, total) every few hundred questions.
+
+    See read_bank_json for the accepted formats. Either way, each returned
+    question has a 'case_study_id' and a 'scenario' that is the single shared
+    string for its case study, so a scenario used by several questions is
+    held in memory once.
+    """
+    raw_questions, case_studies = read_bank_json(file_obj, json_lines)
+    questions = []
+    seen_ids = set()
+    scenario_texts = {}  # scenario text -> canonical shared string
+    for i, q in enumerate(raw_questions):
+        check_question_id(q, seen_ids)
+        questions.append(prepare_question(q, case_studies, scenario_texts))
+        if on_progress is not None and i % 250 == 0:
+            on_progress(i, len(raw_questions))
     return questions
 
 
@@ -99,10 +224,111 @@ def filter_by_tags(questions: list, tag_ids: list) -> list:
     return [q for q in questions if set(q["tags"]) & tag_set]
 
 
-def draw_session_questions(questions: list, n: int = 8) -> list:
-    """Return a random sample of n questions. Raises ValueError if insufficient."""
+def get_case_studies(questions: list) -> dict:
+    """Return {case_study_id: scenario} for the distinct case studies in questions."""
+    return {
+        q["case_study_id"]: q["scenario"] for q in questions if q["case_study_id"] is not None
+    }
+
+
+def build_tag_index(questions: list) -> dict:
+    """
+    Return {tag_id: [position, ...]} mapping each tag to the positions of the
+    questions carrying it. Built once per bank; positions index into questions.
+    """
+    index = {}
+    for pos, q in enumerate(questions):
+        for tag_id in set(q["tags"]):
+            index.setdefault(tag_id, []).append(pos)
+    return index
+
+
+def update_tag_index(tag_index: dict, remap, questions: list, added: list) -> dict:
+    """
+    Return the tag index of questions, patched from the index of a previous
+    version of the same bank. remap[old position] is the new position (-1 if
+    the question was removed or edited); added lists the new positions whose
+    tags are read.
+    """
+    index = {}
+    for tag_id, positions in tag_index.items():
+        kept = [remap[p] for p in positions if remap[p] >= 0]
+        if kept:
+            index[tag_id] = kept
+    for pos in added:
+        for tag_id in set(questions[pos]["tags"]):
+            index.setdefault(tag_id, []).append(pos)
+    for positions in index.values():
+        positions.sort()
+    return index
+
+
+def draw_session_questions(questions: list, n: int = 8, cluster_of: dict | None = None) -> list:
+    """
+    Return a random sample of n questions. With cluster_of ({question id:
+    near-duplicate cluster}, see data/dedupe.py), at most one question per
+    cluster is drawn. Raises ValueError if insufficient.
+    """
     if len(questions) < n:
         raise ValueError(
             f"Need {n} questions but only {len(questions)} match the selected categories"
         )
-    return random.sample(questions, n)
+    if not cluster_of:
+        return random.sample(questions, n)
+    drawn, used_clusters = [], set()
+    for q in random.sample(questions, len(questions)):
+        if admit_question(q, cluster_of, used_clusters):
+            drawn.append(q)
+            if len(drawn) == n:
+                return drawn
+    raise ValueError(near_duplicate_shortfall(n, len(drawn)))
+
+
+def draw_by_case_study(
+    questions: list, n: int, rng: random.Random | None = None, cluster_of: dict | None = None
+) -> list:
+    """
+    Return n questions drawn as whole case studies, as in the real exam.
+
+    Case studies are taken in random order until n questions are reached
+    (the last one may be partial). Questions of a case study are returned
+    contiguously; questions without a scenario form their own group. With
+    cluster_of, a near-duplicate of an earlier pick is skipped within its
+    case study. Raises ValueError if insufficient.
+    """
+    if len(questions) < n:
+        raise ValueError(
+            f"Need {n} questions but only {len(questions)} match the selected categories"
+        )
+    rng = rng or random.Random()
+    cluster_of = cluster_of or {}
+    groups = {}
+    for q in questions:
+        groups.setdefault(q["case_study_id"] or ("q", q["id"]), []).append(q)
+    drawn, used_clusters = [], set()
+    for key in rng.sample(list(groups), len(groups)):
+        group = groups[key]
+        for q in rng.sample(group, len(group)):
+            if len(drawn) == n:
+                break
+            if admit_question(q, cluster_of, used_clusters):
+                drawn.append(q)
+        if len(drawn) == n:
+            return drawn
+    raise ValueError(near_duplicate_shortfall(n, len(drawn)))
+
+
+def admit_question(q: dict, cluster_of: dict, used_clusters: set) -> bool:
+    """Return False if q's near-duplicate cluster is already drawn; otherwise record it."""
+    cluster = cluster_of.get(q["id"])
+    if cluster is None:
+        return True
+    if cluster in used_clusters:
+        return False
+    used_clusters.add(cluster)
+    return True
+
+
+def near_duplicate_shortfall(n: int, available: int) -> str:
+    """Return the error message for a draw cut short by near-duplicate exclusion."""
+    return f"Need {n} questions but only {available} remain once near-duplicates are excluded"
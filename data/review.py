@@ -0,0 +1,114 @@
+"""data/review.py — Spaced-repetition review scheduler (SM-2).
+
+Every question seen in a session gets a review card. Its next due time is
+set by the SM-2 algorithm from the share of points earned, so questions
+scored 0 or 1 come back the next day, while well-answered ones are pushed
+out further each time.
+
+Cards are kept in a dict, and a min-heap of (due, question_id) holds them
+in due order. Updated cards are pushed again and their old heap entries are
+skipped when popped (lazy deletion), so picking a drill of k questions costs
+O(k log n). The stored form is just the card rows; the heap is rebuilt in
+O(n) on load.
+
+MUST NOT import streamlit.
+"""
+import heapq
+import time
+
+SECONDS_PER_DAY = 86_400
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# SM-2 quality at or above this counts as recalled.
+PASS_QUALITY = 3
+
+CARD_FIELDS = ("question_id", "due", "interval_days", "ease", "repetitions", "lapses")
+
+
+def new_schedule() -> dict:
+    """Return an empty schedule: {"cards": {q_id: [due, interval, ease, reps, lapses]}, "heap": []}."""
+    return {"cards": {}, "heap": []}
+
+
+def quality_for(points: int, max_points: int) -> int:
+    """Map points earned to SM-2 quality 0..5 (5/3/1/0 tiers map to 5/3/1/0)."""
+    return round(5 * points / max_points) if max_points else 0
+
+
+def review_card(schedule: dict, question_id: str, quality: int, now: float | None = None) -> None:
+    """Apply one SM-2 review to a question's card and push its new due time."""
+    now = time.time() if now is None else now
+    due, interval, ease, reps, lapses = schedule["cards"].get(
+        question_id, [now, 0.0, INITIAL_EASE, 0, 0]
+    )
+    if quality >= PASS_QUALITY:
+        reps += 1
+        interval = 1.0 if reps == 1 else 6.0 if reps == 2 else round(interval * ease, 1)
+    else:
+        reps, interval, lapses = 0, 1.0, lapses + 1
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    due = int(now + interval * SECONDS_PER_DAY)
+    schedule["cards"][question_id] = [due, interval, round(ease, 3), reps, lapses]
+    heapq.heappush(schedule["heap"], (due, question_id))
+    # Drop stale entries once they outnumber live cards
+    if len(schedule["heap"]) > 2 * len(schedule["cards"]):
+        _rebuild_heap(schedule)
+
+
+def record_session(schedule: dict, per_question: list, max_points: int, now: float | None = None) -> None:
+    """Review every question of a submitted session; unanswered ones earned 0 points."""
+    now = time.time() if now is None else now
+    for pq in per_question:
+        review_card(schedule, pq["question_id"], quality_for(pq["points_earned"], max_points), now)
+
+
+def _rebuild_heap(schedule: dict) -> None:
+    schedule["heap"] = [(card[0], q_id) for q_id, card in schedule["cards"].items()]
+    heapq.heapify(schedule["heap"])
+
+
+def next_reviews(schedule: dict, k: int, eligible=None, now: float | None = None) -> list:
+    """
+    Return up to k ids of the questions due at now, most overdue first.
+    Cards not yet due are never returned; the caller fills the rest of a
+    drill from other questions.
+
+    eligible is an optional predicate on question id (e.g. membership in the
+    loaded banks and selected categories); ineligible cards are skipped but
+    kept. The heap is left unchanged apart from discarding stale entries.
+    """
+    now = time.time() if now is None else now
+    heap = schedule["heap"]
+    picked, popped, seen = [], [], set()
+    while heap and len(picked) < k and heap[0][0] <= now:
+        due, q_id = heapq.heappop(heap)
+        card = schedule["cards"].get(q_id)
+        if card is None or card[0] != due or q_id in seen:
+            continue  # stale entry superseded by a later review (possibly with the same due time)
+        seen.add(q_id)
+        popped.append((due, q_id))
+        if eligible is None or eligible(q_id):
+            picked.append(q_id)
+    for item in popped:
+        heapq.heappush(heap, item)
+    return picked
+
+
+def due_count(schedule: dict, now: float | None = None) -> int:
+    """Return how many cards are due at now."""
+    now = time.time() if now is None else now
+    return sum(1 for card in schedule["cards"].values() if card[0] <= now)
+
+
+def to_rows(schedule: dict) -> list:
+    """Return the cards as rows in CARD_FIELDS order (the stored form)."""
+    return [[q_id, *card] for q_id, card in schedule["cards"].items()]
+
+
+def from_rows(rows) -> dict:
+    """Return a schedule from rows in CARD_FIELDS order."""
+    schedule = new_schedule()
+    for q_id, due, interval, ease, reps, lapses in rows:
+        schedule["cards"][str(q_id)] = [int(due), float(interval), float(ease), int(reps), int(lapses)]
+    _rebuild_heap(schedule)
+    return schedule
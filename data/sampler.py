@@ -0,0 +1,218 @@
+"""data/sampler.py — Weighted session draws over the bank's tag index.
+
+Draws work on per-tag strata (data.loader.build_tag_index) rather than on
+the whole bank, so their cost depends on the number of categories and the
+session size, not on how many questions the bank holds.
+
+MUST NOT import streamlit.
+"""
+import random
+
+from data.loader import admit_question, near_duplicate_shortfall
+
+# Draw attempts per requested question before falling back to an exhaustive
+# pass over the selected strata (only reached when the pool is nearly used up).
+_ATTEMPTS_PER_QUESTION = 20
+
+
+def build_alias_table(weights: list) -> tuple:
+    """
+    Build a Vose alias table for O(1) sampling from a discrete distribution.
+
+    Returns:
+        (prob, alias) lists of len(weights). Raises ValueError if no weight
+        is positive.
+    """
+    total = float(sum(weights))
+    if not weights or total <= 0:
+        raise ValueError("At least one weight must be positive")
+    n = len(weights)
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        g = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = g
+        scaled[g] = scaled[g] + scaled[s] - 1.0
+        (small if scaled[g] < 1.0 else large).append(g)
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+
+def alias_draw(prob: list, alias: list, rng: random.Random) -> int:
+    """Return one index sampled from an alias table."""
+    i = rng.randrange(len(prob))
+    return i if rng.random() < prob[i] else alias[i]
+
+
+def weakness_weight(points: int, max_points: int) -> float:
+    """
+    Return a sampling weight in (0, 1) that grows as a category gets weaker.
+
+    Uses a Laplace-smoothed score, so a category with no history weighs 0.5
+    and no category ever drops to zero weight.
+    """
+    return 1.0 - (points + 1) / (max_points + 2)
+
+
+def draw_adaptive(
+    questions: list,
+    tag_index: dict,
+    tag_ids: list,
+    n: int,
+    category_scores: dict | None,
+    tag_map: dict,
+    rng: random.Random | None = None,
+    cluster_of: dict | None = None,
+) -> list:
+    """
+    Return n distinct questions drawn with weight toward weak categories.
+
+    Each selected tag is a stratum weighted by weakness_weight of its
+    cumulative score (category_scores is the "category_summary" dict of a
+    historical scorecard, keyed by tag name). A draw picks a stratum from an
+    alias table, then a question uniformly within it, so a question's chance
+    grows with the weakness of every selected category it carries. With
+    cluster_of ({question id: near-duplicate cluster}, see data/dedupe.py),
+    a near-duplicate of an earlier pick is rejected and the draw repeated.
+
+    Raises ValueError if fewer than n questions match the selected tags.
+    """
+    rng = rng or random.Random()
+    category_scores = category_scores or {}
+    cluster_of = cluster_of or {}
+
+    strata = []
+    weights = []
+    for tag_id in dict.fromkeys(tag_ids):
+        positions = tag_index.get(tag_id)
+        if not positions or tag_id not in tag_map:
+            continue
+        hist = category_scores.get(tag_map[tag_id]["name"], {})
+        strata.append(positions)
+        weights.append(
+            weakness_weight(hist.get("cumulative_points", 0), hist.get("cumulative_max", 0))
+        )
+    if not strata:
+        raise ValueError(f"Need {n} questions but only 0 match the selected categories")
+
+    prob, alias = build_alias_table(weights)
+    chosen = {}
+    used_clusters = set()
+    for _ in range(n * _ATTEMPTS_PER_QUESTION):
+        if len(chosen) == n:
+            break
+        stratum = strata[alias_draw(prob, alias, rng)]
+        pos = stratum[rng.randrange(len(stratum))]
+        if pos not in chosen and admit_question(questions[pos], cluster_of, used_clusters):
+            chosen[pos] = None
+
+    if len(chosen) < n:
+        # Pool nearly exhausted: fill the remainder uniformly from what is left.
+        remaining = list(
+            {pos for stratum in strata for pos in stratum}.difference(chosen)
+        )
+        if len(chosen) + len(remaining) < n:
+            raise ValueError(
+                f"Need {n} questions but only {len(chosen) + len(remaining)} match "
+                "the selected categories"
+            )
+        for pos in rng.sample(remaining, len(remaining)):
+            if len(chosen) == n:
+                break
+            if admit_question(questions[pos], cluster_of, used_clusters):
+                chosen[pos] = None
+        if len(chosen) < n:
+            raise ValueError(near_duplicate_shortfall(n, len(chosen)))
+
+    return [questions[pos] for pos in chosen]
+
+
+def compute_blueprint_quotas(tag_ids: list, tag_map: dict, n: int) -> dict:
+    """
+    Split n questions across the selected tags by their syllabus weights.
+
+    Weights are the midpoints of the tag CSV's syllabus_weight ranges,
+    normalised over the selected tags that have one; seats are allotted by
+    largest remainder so quotas always sum to n. Tags without a weight get no
+    quota. Returns {tag_id: quota} for tags with quota > 0.
+
+    Raises ValueError if none of the selected tags carries a syllabus weight.
+    """
+    weighted = {
+        tag_id: tag_map[tag_id]["syllabus_weight"]
+        for tag_id in dict.fromkeys(tag_ids)
+        if tag_id in tag_map and tag_map[tag_id].get("syllabus_weight")
+    }
+    if not weighted:
+        raise ValueError(
+            "None of the selected categories has a syllabus weight, so no "
+            "blueprint can be built"
+        )
+    total = sum(weighted.values())
+    exact = {tag_id: w * n / total for tag_id, w in weighted.items()}
+    quotas = {tag_id: int(x) for tag_id, x in exact.items()}
+    by_remainder = sorted(exact, key=lambda t: exact[t] - quotas[t], reverse=True)
+    for tag_id in by_remainder[: n - sum(quotas.values())]:
+        quotas[tag_id] += 1
+    return {tag_id: q for tag_id, q in quotas.items() if q > 0}
+
+
+def draw_blueprint(
+    questions: list,
+    tag_index: dict,
+    quotas: dict,
+    tag_map: dict,
+    rng: random.Random | None = None,
+    cluster_of: dict | None = None,
+) -> list:
+    """
+    Return questions meeting per-tag quotas, drawn from precomputed strata.
+
+    Tags are filled scarcest-stratum first; each drawn question counts toward
+    the quota of the tag it was drawn for only. A question already drawn for
+    another tag is skipped, and so, with cluster_of, is a near-duplicate of
+    an earlier pick: the replacement comes from the same stratum.
+
+    Raises ValueError naming every tag whose stratum cannot meet its quota.
+    """
+    rng = rng or random.Random()
+    cluster_of = cluster_of or {}
+    chosen = {}
+    used_clusters = set()
+    shortfalls = []
+    for tag_id in sorted(quotas, key=lambda t: len(tag_index.get(t, ()))):
+        need = quotas[tag_id]
+        stratum = tag_index.get(tag_id, [])
+        picked = 0
+        for _ in range(need * _ATTEMPTS_PER_QUESTION if stratum else 0):
+            if picked == need:
+                break
+            pos = stratum[rng.randrange(len(stratum))]
+            if pos not in chosen and admit_question(questions[pos], cluster_of, used_clusters):
+                chosen[pos] = None
+                picked += 1
+        if picked < need:
+            available = [pos for pos in stratum if pos not in chosen]
+            for pos in rng.sample(available, len(available)):
+                if picked == need:
+                    break
+                if admit_question(questions[pos], cluster_of, used_clusters):
+                    chosen[pos] = None
+                    picked += 1
+        if picked < need:
+            excluded = any(pos not in chosen for pos in stratum)
+            shortfalls.append(
+                f"{tag_map[tag_id]['name']} needs {need}, only {picked} available"
+                + (" once near-duplicates are excluded" if excluded else "")
+            )
+
+    if shortfalls:
+        raise ValueError("; ".join(shortfalls))
+    return [questions[pos] for pos in chosen]
+
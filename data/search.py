@@ -0,0 +1,216 @@
+"""data/search.py — Inverted full-text index with BM25 ranking.
+
+The index is built once per bank over scenario, stem, option and rationale
+text; a re-parsed bank patches the previous version's index, tokenizing
+only the questions that changed. Postings are stored as NumPy arrays (positions, term frequencies) so a
+query scores only the postings of its terms, and only the requested page of
+hits is sorted and returned.
+
+MUST NOT import streamlit.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it of on or that the this to was "
+    "which with would you your".split()
+)
+_RATIONALE_FIELDS = (
+    "why_best",
+    "why_second_best",
+    "why_third_best",
+    "why_distractor",
+    "concept_tested",
+    "common_mistakes",
+    "togaf_reference",
+)
+
+
+def tokenize(text: str) -> list:
+    """Return lowercase word tokens of text, without stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _question_terms(question: dict, scenario_terms: dict) -> Counter:
+    """Return term frequencies for a question; scenario tokens are cached per case study."""
+    case_id = question.get("case_study_id")
+    if case_id not in scenario_terms:
+        scenario_terms[case_id] = Counter(tokenize(question.get("scenario", "")))
+    terms = Counter(scenario_terms[case_id])
+    texts = [question["question"], *question["options"].values()]
+    texts.extend(question["rationale"].get(field, "") for field in _RATIONALE_FIELDS)
+    for text in texts:
+        terms.update(tokenize(text))
+    return terms
+
+
+def build_search_index(questions: list) -> dict:
+    """
+    Return a BM25 index over questions (positions index into questions).
+
+    {"postings": {term: (positions int32[], tfs float32[])},
+     "doc_len": float32[], "avg_len": float, "size": int}
+    """
+    raw = {}
+    doc_len = np.zeros(len(questions), dtype=np.float32)
+    scenario_terms = {}
+    for pos, q in enumerate(questions):
+        terms = _question_terms(q, scenario_terms)
+        doc_len[pos] = sum(terms.values())
+        for term, tf in terms.items():
+            raw.setdefault(term, ([], []))
+            raw[term][0].append(pos)
+            raw[term][1].append(tf)
+    return {
+        "postings": {
+            term: (np.array(p, dtype=np.int32), np.array(t, dtype=np.float32))
+            for term, (p, t) in raw.items()
+        },
+        "doc_len": doc_len,
+        "avg_len": float(doc_len.mean()) if len(questions) else 0.0,
+        "size": len(questions),
+    }
+
+
+def update_search_index(index: dict, remap: np.ndarray, questions: list, added: list) -> dict:
+    """
+    Return the index of questions, patched from the index of a previous
+    version of the same bank. remap maps each old position to its new one
+    (-1 if the question was removed or edited); only the questions at the
+    new positions in added are tokenized.
+    """
+    doc_len = np.zeros(len(questions), dtype=np.float32)
+    kept = remap >= 0
+    doc_len[remap[kept]] = index["doc_len"][kept]
+    raw = {}
+    scenario_terms = {}
+    for pos in added:
+        terms = _question_terms(questions[pos], scenario_terms)
+        doc_len[pos] = sum(terms.values())
+        for term, tf in terms.items():
+            raw.setdefault(term, ([], []))
+            raw[term][0].append(pos)
+            raw[term][1].append(tf)
+
+    postings = {}
+    for term, (positions, tfs) in index["postings"].items():
+        positions = remap[positions]
+        keep = positions >= 0
+        if keep.any():
+            postings[term] = (positions[keep], tfs[keep])
+    for term, (p, t) in raw.items():
+        p, t = np.array(p, dtype=np.int32), np.array(t, dtype=np.float32)
+        if term in postings:
+            p, t = np.concatenate((postings[term][0], p)), np.concatenate((postings[term][1], t))
+        postings[term] = (p, t)
+    return {
+        "postings": postings,
+        "doc_len": doc_len,
+        "avg_len": float(doc_len.mean()) if len(questions) else 0.0,
+        "size": len(questions),
+    }
+
+
+def search(index: dict, query: str, allowed: np.ndarray | None = None, corpus: dict | None = None) -> tuple:
+    """
+    Return (positions, scores) of every question matching any query term,
+    BM25-scored and unsorted. allowed is an optional boolean mask over
+    positions (e.g. from a tag filter); masked-out questions are dropped.
+    corpus overrides the index's own statistics ({"size", "avg_len", "df"};
+    see corpus_stats) so several banks' indexes score as one collection.
+
+    With an empty query, every allowed question is returned with score 0
+    (browse mode).
+    """
+    n = index["size"]
+    tokens = tokenize(query)
+    if not tokens:
+        positions = np.flatnonzero(allowed) if allowed is not None else np.arange(n)
+        return positions, np.zeros(len(positions), dtype=np.float32)
+    terms = [t for t in dict.fromkeys(tokens) if t in index["postings"]]
+    if corpus is None:
+        corpus = {
+            "size": n,
+            "avg_len": index["avg_len"],
+            "df": {term: len(index["postings"][term][0]) for term in terms},
+        }
+
+    scores = np.zeros(n, dtype=np.float32)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * index["doc_len"] / max(corpus["avg_len"], 1e-9))
+    for term in terms:
+        positions, tfs = index["postings"][term]
+        df = corpus["df"][term]
+        idf = np.log(1 + (corpus["size"] - df + 0.5) / (df + 0.5))
+        scores[positions] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[positions])
+    if allowed is not None:
+        scores[~allowed] = 0
+    hits = np.flatnonzero(scores)
+    return hits, scores[hits]
+
+
+def corpus_stats(indexes: list, terms: list) -> dict:
+    """Return the size, average length and document frequency of terms over indexes taken together."""
+    size = sum(index["size"] for index in indexes)
+    total_len = sum(index["avg_len"] * index["size"] for index in indexes)
+    return {
+        "size": size,
+        "avg_len": total_len / size if size else 0.0,
+        "df": {
+            term: sum(len(index["postings"][term][0]) for index in indexes if term in index["postings"])
+            for term in terms
+        },
+    }
+
+
+def search_banks(indexes: list, query: str, allowed: list) -> tuple:
+    """
+    Return (bank numbers, positions, scores) of the hits of query across
+    several banks' indexes, scored as one collection so scores compare
+    across banks. allowed holds one optional mask per index (see search).
+    """
+    corpus = corpus_stats(indexes, list(dict.fromkeys(tokenize(query))))
+    banks, positions, scores = [np.arange(0)], [np.arange(0)], [np.zeros(0, dtype=np.float32)]
+    for i, (index, mask) in enumerate(zip(indexes, allowed)):
+        hits, hit_scores = search(index, query, mask, corpus)
+        banks.append(np.full(len(hits), i))
+        positions.append(hits)
+        scores.append(hit_scores)
+    return np.concatenate(banks), np.concatenate(positions), np.concatenate(scores)
+
+
+def tag_mask(tag_index: dict, tag_ids: list, size: int) -> np.ndarray:
+    """Return a boolean mask of the positions carrying any of tag_ids."""
+    mask = np.zeros(size, dtype=bool)
+    for tag_id in tag_ids:
+        if tag_id in tag_index:
+            mask[tag_index[tag_id]] = True
+    return mask
+
+
+def page_of(scores: np.ndarray, page: int, page_size: int) -> np.ndarray:
+    """
+    Return indexes into scores for page (0-based), best score first and
+    earlier hits first on ties.
+
+    Only the hits up to the end of the requested page are sorted
+    (argpartition), so deep result lists cost little more than the page.
+    """
+    start = page * page_size
+    end = min(start + page_size, len(scores))
+    if start >= end:
+        return np.arange(0)
+    if not scores.any():
+        # Browse mode: hits are already in bank order
+        return np.arange(start, end)
+    if end < len(scores):
+        top = np.argpartition(-scores, end - 1)[:end]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.lexsort((top, -scores[top]))]
+    return top[start:end]
@@ -0,0 +1,278 @@
+"""data/seen.py — Seen-question record and no-repeat session draws.
+
+A user's record says which questions they have already been given, per
+bank, as compact bitsets: bit i stands for the question with id i in that
+bank (its "source_id", which stays put when the bank file is edited or
+reordered). The record keeps one bitset per recent session, newest first;
+past MAX_GENERATIONS sessions the oldest two are merged, so the record never
+holds more than MAX_GENERATIONS bits per question.
+
+An "unseen first" draw takes the selected categories' questions in tiers:
+never seen, then those last seen longest ago, ending with the most recent
+session. Each tier is a few bitwise operations on 64-bit words (the tag
+bitset AND NOT the union of newer sessions), and questions are sampled from
+a tier by rank using per-word popcounts. So the draw costs O(n/64) plus
+O(64) per question drawn, however large the bank is.
+
+The record travels in the scorecard ("Seen Questions" sheet) and in session
+snapshots as rows of (bank, generation, packed bits). The bits are
+zlib-compressed and base64-encoded, and split across rows to fit
+spreadsheet cells.
+
+MUST NOT import streamlit.
+"""
+import base64
+import collections
+import random
+import threading
+import zlib
+
+import numpy as np
+
+MAX_GENERATIONS = 8
+# Source ids at or above this (or negative) are not tracked; such questions
+# are left out of unseen-first draws.
+MAX_SOURCE_ID = 1_000_000
+SEEN_FIELDS = ("bank", "generation", "bits")
+# Characters of encoded bits per row; spreadsheet cells hold at most 32,767.
+_CHUNK_CHARS = 32_000
+
+_index_lock = threading.Lock()
+_stats: collections.Counter = collections.Counter()
+
+
+def new_record() -> dict:
+    """Return an empty record: {bank name: [uint64 bitset per session, newest first]}."""
+    return {}
+
+
+def _words_for(size: int) -> int:
+    return (size + 63) // 64
+
+
+def _bits_of(source_ids, n_words: int) -> np.ndarray:
+    """Return a uint64 bitset of n_words words with the given source ids set."""
+    flags = np.zeros(n_words * 64, dtype=bool)
+    flags[np.asarray(source_ids, dtype=np.int64)] = True
+    # A copy owns its buffer, so memory estimates (sys.getsizeof) see the bits
+    return np.packbits(flags, bitorder="little").view("<u8").copy()
+
+
+def _fit(bits: np.ndarray, n_words: int) -> np.ndarray:
+    """Return bits truncated or zero-padded to n_words words."""
+    if len(bits) >= n_words:
+        return bits[:n_words]
+    return np.concatenate([bits, np.zeros(n_words - len(bits), dtype="<u8")])
+
+
+def get_seen_index(entry: dict) -> dict:
+    """
+    Return the bank entry's {"n_words", "positions", "all", "tags"}: positions
+    maps a source id to the question's position (-1 if none), and "all" and
+    "tags" ({tag id: bitset}) are bitsets over source ids. Built once per
+    bank version and shared by every session.
+    """
+    index = entry.get("seen_index")
+    if index is None:
+        _stats["misses"] += 1
+        with _index_lock:
+            index = entry.get("seen_index")
+            if index is None:
+                index = _build_index(entry["questions"])
+                entry["seen_index"] = index
+    else:
+        _stats["hits"] += 1
+    return index
+
+
+def cache_stats(entries: list) -> dict:
+    """Return {"entries", "hits", "misses"} of the seen index over catalog entries."""
+    return {
+        "entries": sum(1 for entry in entries if "seen_index" in entry),
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+    }
+
+
+def _build_index(questions: list) -> dict:
+    tracked = [
+        (pos, q["source_id"])
+        for pos, q in enumerate(questions)
+        if 0 <= q["source_id"] < MAX_SOURCE_ID
+    ]
+    n_words = _words_for(max((s for _, s in tracked), default=-1) + 1)
+    positions = np.full(n_words * 64, -1, dtype=np.int32)
+    by_tag = {}
+    for pos, source_id in tracked:
+        positions[source_id] = pos
+        for tag_id in set(questions[pos]["tags"]):
+            by_tag.setdefault(tag_id, []).append(source_id)
+    return {
+        "n_words": n_words,
+        "positions": positions,
+        "all": _bits_of([s for _, s in tracked], n_words),
+        "tags": {tag_id: _bits_of(ids, n_words) for tag_id, ids in by_tag.items()},
+    }
+
+
+def _pool_bits(index: dict, tag_ids: list) -> np.ndarray:
+    if not tag_ids:
+        return index["all"]
+    pool = np.zeros(index["n_words"], dtype="<u8")
+    for tag_id in tag_ids:
+        if tag_id in index["tags"]:
+            pool |= index["tags"][tag_id]
+    return pool
+
+
+def _tiers(pool: np.ndarray, generations: list) -> list:
+    """Return pool split into [never seen, seen longest ago, ..., seen last session]."""
+    newer = np.zeros_like(pool)
+    by_recency = []
+    for bits in generations:  # newest first
+        bits = _fit(bits, len(pool))
+        by_recency.append(pool & bits & ~newer)
+        newer |= bits
+    return [pool & ~newer, *reversed(by_recency)]
+
+
+def _set_bit_at_rank(word: int, rank: int) -> int:
+    """Return the index of the rank-th (0-based) set bit of a 64-bit word."""
+    for bit in range(64):
+        if word >> bit & 1:
+            if rank == 0:
+                return bit
+            rank -= 1
+    raise ValueError("rank exceeds the word's set bits")
+
+
+def _sample_tier(tiers: list, k: int, rng: random.Random) -> list:
+    """
+    Return k (bank number, source id) pairs sampled uniformly from the union
+    of one tier's bitsets (one per bank, in bank order).
+    """
+    counts = [np.cumsum(np.bitwise_count(bits), dtype=np.int64) for bits in tiers]
+    totals = [int(c[-1]) if len(c) else 0 for c in counts]
+    offsets = np.cumsum([0, *totals])
+    picked = []
+    for rank in rng.sample(range(int(offsets[-1])), k):
+        b = int(np.searchsorted(offsets, rank, side="right")) - 1
+        rank -= int(offsets[b])
+        word = int(np.searchsorted(counts[b], rank, side="right"))
+        before = int(counts[b][word - 1]) if word else 0
+        picked.append((b, word * 64 + _set_bit_at_rank(int(tiers[b][word]), rank - before)))
+    return picked
+
+
+def draw_unseen_first(
+    combined: dict,
+    tag_ids: list,
+    n: int,
+    record: dict | None,
+    cluster_of: dict | None = None,
+    rng: random.Random | None = None,
+) -> list:
+    """
+    Return n questions of the combined bank (see data.catalog.combined_bank)
+    carrying any of tag_ids (all if empty): never-seen ones first, then those
+    seen longest ago. With cluster_of ({question id: cluster id}, see
+    data/dedupe.py), at most one question per near-duplicate cluster is
+    drawn; a rejected pick is replaced from the same tier. Raises ValueError
+    if fewer than n are eligible.
+    """
+    rng = rng or random.Random()
+    record = record or {}
+    cluster_of = cluster_of or {}
+    entries = [combined["entries"][name] for name in combined["banks"]]
+    indexes = [get_seen_index(entry) for entry in entries]
+    pools = [_pool_bits(index, tag_ids) for index in indexes]
+    eligible = sum(int(np.bitwise_count(pool).sum()) for pool in pools)
+    if eligible < n:
+        raise ValueError(f"Need {n} questions but only {eligible} match the selected categories")
+
+    per_bank = [_tiers(pool, record.get(entry["name"], [])) for entry, pool in zip(entries, pools)]
+    drawn, used_clusters = [], set()
+    for t in range(max(len(tiers) for tiers in per_bank)):
+        tier = [tiers[t] if t < len(tiers) else tiers[0][:0] for tiers in per_bank]
+        size = sum(int(np.bitwise_count(bits).sum()) for bits in tier)
+        while size and len(drawn) < n:
+            picks = _sample_tier(tier, min(size, n - len(drawn)), rng)
+            for b, source_id in picks:
+                # Taken out of the tier so a redraw cannot pick it again
+                tier[b][source_id // 64] &= ~np.uint64(1 << source_id % 64)
+                q = entries[b]["questions"][indexes[b]["positions"][source_id]]
+                cluster = cluster_of.get(q["id"])
+                if cluster is not None:
+                    if cluster in used_clusters:
+                        continue
+                    used_clusters.add(cluster)
+                drawn.append(q)
+            size -= len(picks)
+        if len(drawn) == n:
+            break
+    if len(drawn) < n:
+        raise ValueError(
+            f"Need {n} questions but only {len(drawn)} remain once near-duplicates are excluded"
+        )
+    return drawn
+
+
+def record_session(record: dict, questions: list) -> None:
+    """Add a session's questions to the record as the newest generation of each bank it used."""
+    by_bank = {}
+    for q in questions:
+        if 0 <= q["source_id"] < MAX_SOURCE_ID:
+            by_bank.setdefault(q["bank"], []).append(q["source_id"])
+    for bank, ids in by_bank.items():
+        generations = record.setdefault(bank, [])
+        n_words = max([_words_for(max(ids) + 1), *(len(g) for g in generations)])
+        generations.insert(0, _bits_of(ids, n_words))
+        if len(generations) > MAX_GENERATIONS:
+            oldest = generations.pop()
+            generations[-1] = _fit(generations[-1], n_words) | _fit(oldest, n_words)
+
+
+def seen_count(record: dict | None) -> int:
+    """Return how many distinct questions the record has seen."""
+    total = 0
+    for generations in (record or {}).values():
+        if generations:
+            n_words = max(len(g) for g in generations)
+            union = np.zeros(n_words, dtype="<u8")
+            for bits in generations:
+                union |= _fit(bits, n_words)
+            total += int(np.bitwise_count(union).sum())
+    return total
+
+
+def to_rows(record: dict) -> list:
+    """Return the record as rows in SEEN_FIELDS order (the stored form)."""
+    rows = []
+    for bank, generations in record.items():
+        for generation, bits in enumerate(generations):
+            encoded = base64.b64encode(zlib.compress(bits.tobytes())).decode("ascii")
+            for start in range(0, max(len(encoded), 1), _CHUNK_CHARS):
+                rows.append([bank, generation, encoded[start : start + _CHUNK_CHARS]])
+    return rows
+
+
+def from_rows(rows) -> dict:
+    """
+    Return a record from rows in SEEN_FIELDS order; a bitset split over rows
+    is rejoined. Raises ValueError if a bitset does not decode.
+    """
+    encoded = {}
+    for bank, generation, chunk in rows:
+        encoded.setdefault(str(bank), {}).setdefault(int(generation), []).append(chunk or "")
+    record = new_record()
+    try:
+        for bank, generations in encoded.items():
+            record[bank] = [
+                np.frombuffer(
+                    zlib.decompress(base64.b64decode("".join(generations[g]))), dtype="<u8"
+                ).copy()
+                for g in sorted(generations)
+            ][:MAX_GENERATIONS]
+    except zlib.error as e:
+        raise ValueError(f"Seen-question record does not decode: {e}") from None
+    return record
@@ -0,0 +1,260 @@
+"""data/session_store.py — Pluggable store for exam session snapshots.
+
+A running exam's snapshot (see logic/snapshot.py) is written here so the
+session can be resumed after a reload, a container restart, or on another
+replica. The store is chosen by QUIZLIT_SESSION_STORE:
+
+    dir:/var/lib/quizlit/sessions    one JSON file per session
+    sqlite:/var/lib/quizlit/s.db     one row per session (WAL mode)
+    redis://host:6379/0              any Redis-compatible server
+
+A store is a dict of three functions: get(session_id) -> bytes | None,
+put(session_id, data) and delete(session_id). Session ids come from URLs,
+so the module functions accept only ids made like secrets.token_urlsafe
+output; an id can never name a file outside a directory store.
+
+Saves are coalesced: save_snapshot only records the latest snapshot per
+session, and a background thread writes whatever is pending at most every
+_FLUSH_INTERVAL seconds, so a burst of answer commits costs one write.
+
+MUST NOT import streamlit.
+"""
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+SESSION_STORE_ENV = "QUIZLIT_SESSION_STORE"
+
+# Snapshots of abandoned sessions expire after this long (Redis; other
+# stores drop them on the next read).
+SNAPSHOT_TTL_SECONDS = 24 * 3600
+_FLUSH_INTERVAL = 0.5
+# The alphabet and length of secrets.token_urlsafe(12) ids, with headroom.
+_SESSION_ID_RE = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+_pending: dict = {}  # (store id, session id) -> (store, data | None for delete)
+_pending_lock = threading.Lock()
+_wakeup = threading.Event()
+_writer: threading.Thread | None = None
+_stores: dict = {}
+
+
+def configured_store() -> dict | None:
+    """Return the store named by QUIZLIT_SESSION_STORE (one per spec), or None."""
+    spec = os.environ.get(SESSION_STORE_ENV)
+    if not spec:
+        return None
+    with _pending_lock:
+        if spec not in _stores:
+            _stores[spec] = open_store(spec)
+        return _stores[spec]
+
+
+def open_store(spec: str) -> dict:
+    """Return a store for a 'dir:', 'sqlite:' or 'redis://' spec. Raises ValueError."""
+    if spec.startswith("dir:"):
+        return directory_store(spec[len("dir:") :])
+    if spec.startswith("sqlite:"):
+        return sqlite_store(spec[len("sqlite:") :])
+    if spec.startswith("redis://"):
+        return redis_store(spec)
+    raise ValueError(f"Unsupported session store: '{spec}'")
+
+
+def directory_store(path: str) -> dict:
+    """Return a store keeping one file per session under path."""
+    os.makedirs(path, exist_ok=True)
+
+    def _file(session_id):
+        return os.path.join(path, f"{session_id}.json")
+
+    def get(session_id):
+        try:
+            if time.time() - os.path.getmtime(_file(session_id)) > SNAPSHOT_TTL_SECONDS:
+                return None
+            with open(_file(session_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(session_id, data):
+        tmp = _file(session_id) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, _file(session_id))  # readers never see a partial file
+
+    def delete(session_id):
+        try:
+            os.remove(_file(session_id))
+        except FileNotFoundError:
+            pass
+
+    return {"name": f"dir:{path}", "get": get, "put": put, "delete": delete}
+
+
+def sqlite_store(path: str) -> dict:
+    """Return a store keeping one row per session in an SQLite database."""
+    local = threading.local()
+
+    def _conn():
+        if not hasattr(local, "conn"):
+            local.conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+            local.conn.execute("PRAGMA journal_mode=WAL")
+            local.conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots"
+                " (session_id TEXT PRIMARY KEY, data BLOB NOT NULL, saved_at REAL NOT NULL)"
+                " WITHOUT ROWID"
+            )
+        return local.conn
+
+    def get(session_id):
+        row = _conn().execute(
+            "SELECT data FROM snapshots WHERE session_id = ? AND saved_at > ?",
+            (session_id, time.time() - SNAPSHOT_TTL_SECONDS),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(session_id, data):
+        _conn().execute(
+            "INSERT OR REPLACE INTO snapshots (session_id, data, saved_at) VALUES (?, ?, ?)",
+            (session_id, data, time.time()),
+        )
+
+    def delete(session_id):
+        _conn().execute("DELETE FROM snapshots WHERE session_id = ?", (session_id,))
+
+    return {"name": f"sqlite:{path}", "get": get, "put": put, "delete": delete}
+
+
+def redis_store(url: str) -> dict:
+    """Return a store on a Redis-compatible server (GET/SET EX/DEL over RESP)."""
+    parsed = urlparse(url)
+    address = (parsed.hostname or "localhost", parsed.port or 6379)
+    db = (parsed.path or "/0").lstrip("/") or "0"
+    local = threading.local()
+
+    def _command(*args):
+        if not hasattr(local, "sock"):
+            local.sock = socket.create_connection(address, timeout=5)
+            local.reader = local.sock.makefile("rb")
+            if db != "0":
+                _send(("SELECT", db))
+        try:
+            return _send(args)
+        except OSError:
+            del local.sock  # reconnect on the next command
+            raise
+
+    def _send(args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        local.sock.sendall(b"".join(parts))
+        return _read_reply(local.reader)
+
+    def get(session_id):
+        return _command("GET", f"quizlit:session:{session_id}")
+
+    def put(session_id, data):
+        _command("SET", f"quizlit:session:{session_id}", data, "EX", SNAPSHOT_TTL_SECONDS)
+
+    def delete(session_id):
+        _command("DEL", f"quizlit:session:{session_id}")
+
+    return {"name": url, "get": get, "put": put, "delete": delete}
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise OSError("Session store closed the connection")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"-":
+        raise OSError(f"Session store error: {rest.decode('utf-8', 'replace')}")
+    if kind in (b"+", b":"):
+        return rest
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    raise OSError(f"Unexpected reply from session store: {line!r}")
+
+
+def check_session_id(session_id) -> None:
+    """Raise ValueError unless session_id looks like an id this app generates."""
+    if not isinstance(session_id, str) or not _SESSION_ID_RE.fullmatch(session_id):
+        raise ValueError("Invalid session id")
+
+
+def save_snapshot(store: dict, session_id: str, snapshot: dict) -> None:
+    """Queue the latest snapshot of a session; superseded snapshots are never written."""
+    check_session_id(session_id)
+    data = json.dumps(snapshot, separators=(",", ":")).encode("utf-8")
+    _queue(store, session_id, data)
+
+
+def delete_snapshot(store: dict, session_id: str) -> None:
+    """Queue removal of a finished session's snapshot."""
+    check_session_id(session_id)
+    _queue(store, session_id, None)
+
+
+def load_snapshot(store: dict, session_id: str) -> dict | None:
+    """
+    Return the stored snapshot, including one still waiting to be written.
+    Raises ValueError for an invalid session id or a snapshot that is not JSON.
+    """
+    check_session_id(session_id)
+    with _pending_lock:
+        pending = _pending.get((store["name"], session_id))
+    data = pending[1] if pending is not None else store["get"](session_id)
+    return json.loads(data) if data else None
+
+
+def _queue(store: dict, session_id: str, data: bytes | None) -> None:
+    global _writer
+    with _pending_lock:
+        _pending[(store["name"], session_id)] = (store, data)
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="snapshot-writer", daemon=True)
+            _writer.start()
+    _wakeup.set()
+
+
+def _write_loop() -> None:
+    while True:
+        _wakeup.wait()
+        time.sleep(_FLUSH_INTERVAL)  # let a burst of commits coalesce
+        _wakeup.clear()
+        flush_snapshots()
+
+
+def pending_count() -> int:
+    """Return the number of snapshot writes waiting for the writer."""
+    with _pending_lock:
+        return len(_pending)
+
+
+def flush_snapshots() -> None:
+    """Write every pending snapshot now."""
+    with _pending_lock:
+        batch = dict(_pending)
+        _pending.clear()
+    for (_, session_id), (store, data) in batch.items():
+        try:
+            if data is None:
+                store["delete"](session_id)
+            else:
+                store["put"](session_id, data)
+        except (OSError, sqlite3.Error):
+            # Keep it for the next flush unless a newer snapshot replaced it
+            with _pending_lock:
+                _pending.setdefault((store["name"], session_id), (store, data))
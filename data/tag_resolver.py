@@ -1,8 +1,43 @@
 import pandas as pd
 
+# Rollup levels, finest first: a tag, its tag_category, and that category's
+# parent_category (e.g. "Phase B: Business Architecture" < "ADM Phases" <
+# "Primary Category").
+LEVELS = ("tag", "category", "parent")
+LEVEL_LABELS = {"tag": "Topic", "category": "Category", "parent": "Category group"}
+
+
+def parse_syllabus_weight(value) -> float | None:
+    """Return the midpoint of a "30-40%" / "15%" weight as a fraction, or None for N/A."""
+    if not isinstance(value, str):
+        return None
+    text = value.strip().rstrip("%")
+    try:
+        bounds = [float(part) for part in text.split("-")]
+    except ValueError:
+        return None
+    return sum(bounds) / len(bounds) / 100
+
+
+def _text(value) -> str | None:
+    """Return a CSV cell as stripped text, or None if it is empty or missing."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip()
+
 
 def load_tags(file_obj) -> dict:
-    """Load togaf_tags_db.csv and return {tag_id (int): {"name": ..., "category": ...}}."""
+    """
+    Load togaf_tags_db.csv and return
+    {tag_id (int): {"name": ..., "category": ..., "syllabus_weight": float | None,
+                    "ancestors": {level: node name}}}.
+
+    syllabus_weight and parent_category are optional in the CSV; missing or
+    "N/A" weights load as None. "ancestors" is the tag's precomputed closure
+    over LEVELS, itself included ({"tag": name, "category": ..., "parent":
+    ...}); levels with no node are left out. Raises ValueError if a
+    category is given two different parents.
+    """
     df = pd.read_csv(file_obj)
     required = {"tag_id", "tag_name", "tag_category"}
     missing = required - set(df.columns)
@@ -10,10 +45,34 @@ def load_tags(file_obj) -> dict:
         # Report each missing column individually for clear error messages
         for col in sorted(missing):
             raise ValueError(f"Missing required column: '{col}'")
-    return {
-        int(row.tag_id): {"name": row.tag_name, "category": row.tag_category}
-        for row in df.itertuples()
-    }
+    has_weight = "syllabus_weight" in df.columns
+    has_parent = "parent_category" in df.columns
+
+    # The category tree, checked once; each tag's closure is then a lookup
+    parent_of = {}
+    for row in df.itertuples():
+        parent = _text(row.parent_category) if has_parent else None
+        if parent is None:
+            continue
+        if parent_of.setdefault(row.tag_category, parent) != parent:
+            raise ValueError(
+                f"Category '{row.tag_category}' has more than one parent_category"
+            )
+
+    tag_map = {}
+    for row in df.itertuples():
+        ancestors = {"tag": row.tag_name, "category": row.tag_category}
+        if row.tag_category in parent_of:
+            ancestors["parent"] = parent_of[row.tag_category]
+        tag_map[int(row.tag_id)] = {
+            "name": row.tag_name,
+            "category": row.tag_category,
+            "syllabus_weight": (
+                parse_syllabus_weight(row.syllabus_weight) if has_weight else None
+            ),
+            "ancestors": ancestors,
+        }
+    return tag_map
 
 
 def get_tag_names_for_question(question: dict, tag_map: dict) -> list:
@@ -29,6 +88,23 @@ def get_tag_names_for_question(question: dict, tag_map: dict) -> list:
     return result
 
 
+def get_level_names_for_question(question: dict, tag_map: dict) -> dict:
+    """
+    Return {level: [node name, ...]} for a question over LEVELS (deduped,
+    ordered): its tags, their categories and the categories' parents. A
+    question with two tags in one category appears under it once.
+    """
+    result = {level: [] for level in LEVELS}
+    seen = set()
+    for tag_id in question.get("tags", []):
+        if tag_id in tag_map:
+            for level, name in tag_map[tag_id]["ancestors"].items():
+                if (level, name) not in seen:
+                    seen.add((level, name))
+                    result[level].append(name)
+    return result
+
+
 def get_all_tag_names(questions: list, tag_map: dict) -> list:
     """Return sorted unique tag_names present across all questions."""
     return sorted(
@@ -0,0 +1,285 @@
+"""data/upload_sandbox.py — Validate uploaded banks in an isolated worker process.
+
+An uploaded bank is parsed, validated and indexed (catalog.build_entry) in a
+short-lived child process (this module run with -m, fed the file on stdin
+and reporting on stdout), never on a Streamlit script thread, under limits
+on size (checked before the worker starts), JSON nesting depth, wall-clock
+and CPU time, and memory. A hostile or huge upload can only exhaust its own
+worker, which is killed. At most MAX_CONCURRENT_VALIDATIONS workers run at
+once and they run at low priority, so other sessions' reruns keep their CPU.
+
+Jobs are keyed by the SHA-256 of the file and its format (JSON or JSON
+Lines): uploading the same file again, by any session, reuses the finished
+entry (or the known error) without a worker. The setup page polls a job for its stage and progress.
+Timeouts, crashed workers and uploads turned away while MAX_PENDING_VALIDATIONS
+jobs are already waiting are not cached, so uploading the file again retries.
+
+The worker is a fresh interpreter rather than a multiprocessing child:
+Streamlit replaces sys.modules["__main__"] with the page being run, and the
+spawn and forkserver start methods would re-run that page in the worker.
+
+MUST NOT import streamlit.
+"""
+import argparse
+import collections
+import hashlib
+import io
+import os
+import pickle
+import re
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+import data.catalog as catalog
+from data.loader import load_question_bank
+
+UPLOAD_MAX_MB_ENV = "QUIZLIT_UPLOAD_MAX_MB"
+DEFAULT_UPLOAD_MAX_MB = 20
+# Deepest JSON nesting a bank needs is 4 (object > questions > question > scoring tier).
+MAX_NESTING = 16
+TIME_LIMIT_SECONDS = 60
+# Memory a worker may allocate on top of what it holds after start-up.
+MEMORY_LIMIT_MB = 1024
+MAX_CONCURRENT_VALIDATIONS = 2
+# Queued and running jobs; further new uploads fail as busy until one finishes.
+MAX_PENDING_VALIDATIONS = 8
+# Finished jobs (validated entries and errors) kept for re-uploads.
+MAX_CACHED_UPLOADS = 16
+POLL_SECONDS = 0.5
+
+# Workers run "python -m data.upload_sandbox" from the project root.
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# content hash -> {"state": "queued" | "running" | "done" | "failed", "stage",
+#                  "progress", "entry", "error", "finished_at"}
+_jobs: collections.OrderedDict = collections.OrderedDict()
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_VALIDATIONS)
+_stats: collections.Counter = collections.Counter()
+# A JSON string (skipped whole) or a bracket.
+_TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+
+
+def max_upload_mb() -> int:
+    return int(os.environ.get(UPLOAD_MAX_MB_ENV) or DEFAULT_UPLOAD_MAX_MB)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def upload_key(data: bytes, json_lines: bool = False) -> str:
+    """Return the job key of an upload; the same bytes parse differently as JSON Lines."""
+    return f"{content_hash(data)}:{'jsonl' if json_lines else 'json'}"
+
+
+def check_nesting(data: bytes, max_depth: int = MAX_NESTING) -> None:
+    """Raise ValueError if JSON arrays and objects in data nest deeper than max_depth."""
+    depth = 0
+    for match in _TOKEN_RE.finditer(data):
+        token = match.group()
+        if token in (b"[", b"{"):
+            depth += 1
+            if depth > max_depth:
+                raise ValueError(f"JSON is nested more than {max_depth} levels deep")
+        elif token in (b"]", b"}"):
+            depth -= 1
+
+
+def validate_upload(data: bytes, json_lines: bool = False) -> dict:
+    """
+    Return the validation job for an uploaded bank, starting a worker if the
+    file has not been seen before. Poll it until its state is "done" (the
+    catalog entry is under "entry") or "failed" (message under "error").
+    """
+    key = upload_key(data, json_lines)
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None:
+            _jobs.move_to_end(key)
+            if job["state"] in ("done", "failed"):
+                _stats["hits"] += 1
+            return job
+        _stats["misses"] += 1
+        job = {
+            "state": "queued",
+            "stage": "Waiting for a validation worker",
+            "progress": 0.0,
+            "entry": None,
+            "error": None,
+            "finished_at": None,
+        }
+        pending = sum(1 for other in _jobs.values() if other["state"] in ("queued", "running"))
+        if pending >= MAX_PENDING_VALIDATIONS:
+            job.update(
+                state="failed",
+                stage="Failed",
+                progress=1.0,
+                error="Too many uploads are being validated; try again in a minute",
+                finished_at=time.time(),
+            )
+            return job
+        _jobs[key] = job
+        _prune()
+
+    limit = max_upload_mb()
+    if len(data) > limit * 1024 * 1024:
+        _finish(job, error=f"The file is larger than {limit} MB")
+    else:
+        threading.Thread(
+            target=_supervise, args=(key, job, data, json_lines), name="upload-validator", daemon=True
+        ).start()
+    return job
+
+
+def _prune() -> None:
+    finished = [key for key, job in _jobs.items() if job["state"] in ("done", "failed")]
+    for key in finished[: max(0, len(finished) - MAX_CACHED_UPLOADS)]:
+        del _jobs[key]
+
+
+def _finish(job: dict, entry: dict | None = None, error: str | None = None, key: str | None = None) -> None:
+    """Record a job's outcome; with key, also forget the job so the next upload retries it."""
+    with _lock:
+        if key is not None and _jobs.get(key) is job:
+            del _jobs[key]
+        job.update(
+            state="failed" if error else "done",
+            stage="Failed" if error else "Done",
+            progress=1.0,
+            entry=entry,
+            error=error,
+            finished_at=time.time(),
+        )
+
+
+def _supervise(key: str, job: dict, data: bytes, json_lines: bool) -> None:
+    """Run one worker for job (waiting for a free slot first) and record its outcome."""
+    with _slots:
+        with _lock:
+            job.update(state="running", stage="Starting validation")
+        worker = subprocess.Popen(
+            [sys.executable, "-m", __name__, *(["--json-lines"] if json_lines else [])],
+            cwd=_PROJECT_ROOT,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + TIME_LIMIT_SECONDS
+        killer = threading.Timer(TIME_LIMIT_SECONDS, worker.kill)
+        killer.start()
+        entry, error = None, None
+        try:
+            worker.stdin.write(data)
+            worker.stdin.close()
+            while True:
+                # Only this module's own worker writes to the stream
+                kind, *payload = pickle.load(worker.stdout)
+                if kind == "progress":
+                    with _lock:
+                        job.update(stage=payload[0], progress=payload[1])
+                elif kind == "done":
+                    entry = payload[0]
+                    break
+                else:
+                    error = payload[0]
+                    break
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass  # the worker died or was killed; reported below
+        finally:
+            killer.cancel()
+            if worker.poll() is None:
+                worker.kill()
+            worker.wait()
+            worker.stdout.close()
+    if entry is None and error is None:
+        # Not the file's fault for certain (a busy host, an OOM kill); don't cache it
+        if time.monotonic() >= deadline:
+            error = f"Validation took longer than {TIME_LIMIT_SECONDS} seconds"
+        else:
+            error = f"Validation worker stopped unexpectedly (exit code {worker.returncode})"
+        _finish(job, error=error, key=key)
+        return
+    _finish(job, entry, error)
+
+
+def _set_limits() -> None:
+    """Cap this worker's CPU time and memory and lower its priority (best effort; POSIX only)."""
+    if resource is None:
+        return
+    os.nice(10)
+    resource.setrlimit(resource.RLIMIT_CPU, (TIME_LIMIT_SECONDS, TIME_LIMIT_SECONDS + 5))
+    try:
+        with open("/proc/self/statm") as f:
+            in_use = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return  # no /proc; address-space usage unknown, so leave memory unlimited
+    cap = in_use + MEMORY_LIMIT_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (cap, cap))
+
+
+def _validate(data: bytes, json_lines: bool, send) -> None:
+    """Worker process: check, parse, validate and index one bank; report through send."""
+    try:
+        send(("progress", "Checking structure", 0.05))
+        check_nesting(data)
+        send(("progress", "Parsing JSON", 0.1))
+
+        def on_progress(done, total):
+            send(("progress", f"Validating question {done + 1} of {total}", 0.1 + 0.6 * done / total))
+
+        questions = load_question_bank(io.BytesIO(data), json_lines, on_progress)
+        send(("progress", "Indexing questions and finding near-duplicates", 0.7))
+        send(("done", catalog.build_entry("upload", questions)))
+    except MemoryError:
+        send(("error", f"Validation needed more than {MEMORY_LIMIT_MB} MB of memory"))
+    except ValueError as e:
+        send(("error", str(e)))
+    except Exception as e:  # hostile input may fail anywhere; report it instead of crashing
+        send(("error", f"Not a valid question bank ({type(e).__name__}: {e})"))
+
+
+def cache_stats() -> dict:
+    """Return {"entries": validated banks cached, "hits", "misses"} for diagnostics."""
+    with _lock:
+        validated = sum(1 for job in _jobs.values() if job["state"] == "done")
+        return {"entries": validated, "hits": _stats["hits"], "misses": _stats["misses"]}
+
+
+def shared_object_ids() -> set:
+    """Return ids of the validated upload entries and their questions (shared by uploaders)."""
+    with _lock:
+        entries = [job["entry"] for job in _jobs.values() if job["entry"] is not None]
+    ids = set()
+    for entry in entries:
+        ids.add(id(entry))
+        ids.update(id(q) for q in entry["questions"])
+    return ids
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Validation worker: read a bank on stdin, write pickled progress and the result on stdout."
+    )
+    parser.add_argument("--json-lines", action="store_true", help="The bank is JSON Lines")
+    args = parser.parse_args(argv)
+
+    _set_limits()
+    out = sys.stdout.buffer
+
+    def send(message: tuple) -> None:
+        pickle.dump(message, out)
+        out.flush()
+
+    _validate(sys.stdin.buffer.read(), args.json_lines, send)
+
+
+if __name__ == "__main__":
+    main()
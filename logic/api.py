@@ -0,0 +1,498 @@
+"""logic/api.py — Headless HTTP/JSON API for delivering exams without Streamlit.
+
+A small asyncio server over the logic layer, for LMS and mobile clients:
+
+    GET  /health
+    POST /sessions                         start a session (draw + shuffle)
+    GET  /sessions/{id}                    progress and deadline
+    GET  /sessions/{id}/questions/{n}      question n (1-based), options shuffled
+    PUT  /sessions/{id}/answers/{n}        {"display_idx": 0-3}
+    POST /sessions/{id}/submit             score and return the results
+    GET  /sessions/{id}/scorecard          Excel scorecard of a submitted session
+    GET  /assets/{asset}[?width=960]       a question image (see data/assets.py)
+
+A session is held as a snapshot (see logic/snapshot.py): question ids, the
+seed and answers as original option ids. Options are reshuffled from the
+seed when a question is fetched, and points are looked up when an answer is
+scored, so a running session costs a few hundred bytes plus one list of
+references into the shared banks. When QUIZLIT_SESSION_STORE is set,
+sessions are written through to it, so they survive a restart of the
+server and a session started here can also be resumed in the browser.
+
+Usage:
+    python -m logic.api [--host 127.0.0.1] [--port 8080]
+
+MUST NOT import streamlit.
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+import data.assets as assets
+import data.catalog as catalog
+import data.history as history
+import data.item_stats as item_stats
+import data.session_store as session_store
+import logic.exporter as exporter
+import logic.profiles as profiles
+import logic.scoring as scoring
+import logic.session_pool as session_pool
+import logic.shuffler as shuffler
+import logic.snapshot as snapshot
+from data.tag_resolver import get_tag_id_for_name
+
+API_DRAW_MODES = session_pool.POOLED_DRAW_MODES
+# Request bodies larger than this are rejected (413).
+MAX_BODY_BYTES = 64 * 1024
+# Submitted and expired sessions are dropped from memory this long after their deadline.
+RESULTS_TTL_SECONDS = 3600
+_SWEEP_INTERVAL = 60
+_IDLE_CONNECTION_SECONDS = 60
+
+_STATUS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# session id -> {"snapshot": dict, "questions": list, "results": dict | None}
+_sessions: dict = {}
+# Sessions are started and submitted on worker threads; one submit scores at a time
+_submit_lock = threading.RLock()
+
+# body field -> accepted type for POST /sessions (None is always accepted)
+_START_FIELDS = {
+    "user_name": str,
+    "exam_profile": str,
+    "draw_mode": str,
+    "banks": list,
+    "categories": list,
+    "avoid_near_duplicates": bool,
+}
+
+
+# ---------------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------------
+def _selection(bank_names: list | None) -> tuple:
+    """Return (combined bank, {question id: question}) for the named banks (all if None)."""
+    paths = catalog.discover_banks()
+    by_name = {catalog.bank_name_for(path): path for path in paths}
+    names = list(by_name) if bank_names is None else bank_names
+    unknown = [name for name in names if name not in by_name]
+    if unknown or not names:
+        raise ValueError(f"Unknown question bank: {', '.join(unknown) or '(none)'}")
+    entries = catalog.load_banks([by_name[name] for name in names])
+    bank = catalog.combined_bank([entries[name] for name in names])
+    return bank, bank["by_id"]
+
+
+def _check_start_body(body: dict) -> None:
+    """Raise ValueError unless every known field of a POST /sessions body has the right type."""
+    for field, kind in _START_FIELDS.items():
+        value = body.get(field)
+        if value is not None and not isinstance(value, kind):
+            raise ValueError(f"{field} must be a {kind.__name__}")
+    for field in ("banks", "categories"):
+        if not all(isinstance(name, str) for name in body.get(field) or []):
+            raise ValueError(f"{field} must be a list of names")
+
+
+def start_session(body: dict, now: float | None = None) -> dict:
+    """
+    Draw, order and register a new session; return its id and deadline.
+
+    body: {"user_name", "exam_profile", "draw_mode", "banks", "categories"},
+    all optional. Categories are tag names; all tags in the banks by default.
+    """
+    now = time.time() if now is None else now
+    _check_start_body(body)
+    profile = profiles.get_profile(body.get("exam_profile") or profiles.DEFAULT_PROFILE)
+    draw_mode = body.get("draw_mode") or "random"
+    if draw_mode not in API_DRAW_MODES:
+        raise ValueError(f"draw_mode must be one of {', '.join(API_DRAW_MODES)}")
+    bank, _ = _selection(body.get("banks"))
+    tag_map = catalog.load_tag_map()
+    if body.get("categories") is None:
+        tag_ids = list(bank["tag_index"])
+    else:
+        tag_ids = [get_tag_id_for_name(name, tag_map) for name in body["categories"]]
+        if None in tag_ids:
+            raise ValueError("Unknown category in categories")
+
+    drawn = session_pool.draw_questions(
+        bank, tag_ids, profile, draw_mode, bool(body.get("avoid_near_duplicates")), tag_map
+    )
+    seed = secrets.randbits(64)
+    if draw_mode == "case_study":
+        questions = shuffler.shuffle_case_study_groups(drawn, seed)
+    else:
+        questions = shuffler.shuffle_questions(drawn, seed)
+
+    session_id = secrets.token_urlsafe(12)
+    # Same fields as logic.snapshot.build_snapshot, so the browser can resume it
+    saved = {
+        "version": snapshot.SNAPSHOT_VERSION,
+        "session_id": session_id,
+        "user_name": str(body.get("user_name") or "").strip(),
+        "exam_profile": profile["name"],
+        "banks": list(bank["banks"]),
+        "seed": seed,
+        "question_ids": [q["id"] for q in questions],
+        "answers": {},
+        "flags": [],
+        "deadline": now + profile["time_limit_minutes"] * 60,
+        "time_extension_used": False,
+        "current_question_idx": 0,
+        "practice_mode": False,
+        "historical": None,
+        "cat": None,
+    }
+    _sessions[session_id] = {"snapshot": saved, "questions": questions, "results": None}
+    _write_through(saved)
+    return {
+        "session_id": session_id,
+        "question_count": len(questions),
+        "exam_profile": profile["name"],
+        "time_limit_seconds": profile["time_limit_minutes"] * 60,
+        "deadline": saved["deadline"],
+    }
+
+
+def _write_through(saved: dict) -> None:
+    store = session_store.configured_store()
+    if store is not None:
+        session_store.save_snapshot(store, saved["session_id"], saved)
+
+
+def get_session(session_id: str) -> dict:
+    """Return a registered session, loading it from the session store if configured."""
+    session = _sessions.get(session_id)
+    if session is not None:
+        return session
+    store = session_store.configured_store()
+    saved = session_store.load_snapshot(store, session_id) if store is not None else None
+    if saved is None or saved.get("version") != snapshot.SNAPSHOT_VERSION or saved["cat"] is not None:
+        raise LookupError("Unknown or expired session")
+    _, by_id = _selection(saved["banks"])
+    try:
+        questions = [by_id[q_id] for q_id in saved["question_ids"]]
+    except KeyError as e:
+        raise ValueError(f"Question {e.args[0]} is no longer in the bank") from None
+    session = {"snapshot": saved, "questions": questions, "results": None}
+    _sessions[session_id] = session
+    return session
+
+
+def _question(session: dict, number: int) -> dict:
+    if not 1 <= number <= len(session["questions"]):
+        raise LookupError(f"Question {number} is not in this session")
+    return session["questions"][number - 1]
+
+
+def _options(session: dict, q: dict) -> list:
+    opts, _ = shuffler.shuffle_options(q, session_pool.option_seed(session["snapshot"]["seed"], q["id"]))
+    return opts
+
+
+def session_status(session: dict, now: float | None = None) -> dict:
+    now = time.time() if now is None else now
+    saved = session["snapshot"]
+    return {
+        "session_id": saved["session_id"],
+        "exam_profile": saved["exam_profile"],
+        "question_count": len(saved["question_ids"]),
+        "answered": len(saved["answers"]),
+        "deadline": saved["deadline"],
+        "seconds_left": max(0, round(saved["deadline"] - now)),
+        "submitted": session["results"] is not None,
+    }
+
+
+def get_question(session: dict, number: int) -> dict:
+    """Return question number (1-based) with its options in this session's order."""
+    q = _question(session, number)
+    opts = _options(session, q)
+    selected = session["snapshot"]["answers"].get(q["id"])
+    return {
+        "number": number,
+        "of": len(session["questions"]),
+        "question_id": q["id"],
+        "case_study_id": q["case_study_id"],
+        "scenario": q["scenario"],
+        "question": q["question"],
+        "media": [
+            {**ref, "url": f"/assets/{ref['asset']}", "placement": placement}
+            for placement, field in (("scenario", "scenario_media"), ("question", "media"))
+            for ref in q.get(field, [])
+        ],
+        "options": [{"display_idx": o["display_idx"], "text": o["text"]} for o in opts],
+        "answer": next((o["display_idx"] for o in opts if o["option_id"] == selected), None),
+    }
+
+
+def closed_reason(session: dict, now: float | None = None) -> str | None:
+    """Return why the session no longer takes answers, or None if it does."""
+    now = time.time() if now is None else now
+    if session["results"] is not None:
+        return "Session already submitted"
+    if now >= session["snapshot"]["deadline"]:
+        return "Time is up; submit the session"
+    return None
+
+
+def answer_question(session: dict, number: int, body: dict) -> dict:
+    """Record the option at body["display_idx"] as the answer to question number."""
+    saved = session["snapshot"]
+    q = _question(session, number)
+    display_idx = body.get("display_idx")
+    opts = _options(session, q)
+    if not isinstance(display_idx, int) or isinstance(display_idx, bool) or not 0 <= display_idx < len(opts):
+        raise ValueError(f"display_idx must be an integer from 0 to {len(opts) - 1}")
+    saved["answers"][q["id"]] = opts[display_idx]["option_id"]
+    saved["current_question_idx"] = number - 1
+    _write_through(saved)
+    return {"number": number, "answer": display_idx, "answered": len(saved["answers"])}
+
+
+def submit_session(session: dict) -> dict:
+    """Score the session (once) and return its results."""
+    with _submit_lock:
+        if session["results"] is None:
+            _score(session)
+    return session["results"]
+
+
+def _score(session: dict) -> None:
+    saved = session["snapshot"]
+    profile = profiles.get_profile(saved["exam_profile"])
+    tag_map = catalog.load_tag_map()
+    questions = session["questions"]
+    points_lookups = {
+        q["id"]: scoring.build_points_lookup(q["scoring"], profile["points_scheme"]) for q in questions
+    }
+    live = scoring.new_live_score(questions, tag_map, profiles.max_points_per_question(profile))
+    answers = {}
+    for q_id, option_id in saved["answers"].items():
+        answers[q_id] = {"original_option_id": option_id, "points": points_lookups[q_id][option_id]}
+        scoring.apply_live_answer(live, q_id, answers[q_id]["points"])
+    session["results"] = scoring.build_results(
+        questions, answers, points_lookups, profile, tag_map, live, None, saved["user_name"]
+    )
+    if item_stats.event_log_path():
+        item_stats.log_events(item_stats.event_log_path(), item_stats.build_events(session["results"]))
+    store = session_store.configured_store()
+    if store is not None:
+        session_store.delete_snapshot(store, saved["session_id"])
+
+
+def _submit_and_record(session: dict) -> dict:
+    """submit_session, recording the attempt in history only on the submit that scored it."""
+    with _submit_lock:
+        first = session["results"] is None
+        results = submit_session(session)
+    if first and history.history_db_path() and results["user_name"]:
+        _record_history(results)
+    return results
+
+
+def _record_history(results: dict) -> None:
+    try:
+        history.record_attempt(history.connect(history.history_db_path()), results)
+    except sqlite3.Error as e:
+        results["history_error"] = str(e)
+
+
+def sweep(now: float | None = None) -> int:
+    """Drop sessions whose deadline passed more than RESULTS_TTL_SECONDS ago; return how many."""
+    now = time.time() if now is None else now
+    expired = [
+        session_id
+        for session_id, session in list(_sessions.items())
+        if now - session["snapshot"]["deadline"] >= RESULTS_TTL_SECONDS
+    ]
+    for session_id in expired:
+        del _sessions[session_id]
+    return len(expired)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+def _error(status: int, message: str) -> tuple:
+    return status, {"error": message}
+
+
+async def route(method: str, path: str, body: dict) -> tuple:
+    """
+    Return (status, payload) for a request; payload is a dict (sent as JSON)
+    or a (content type, bytes) pair. Raises ValueError for a bad request and
+    LookupError for an unknown session or question.
+    """
+    path, _, query = path.partition("?")
+    parts = [part for part in path.split("/") if part]
+    if parts == ["health"] and method == "GET":
+        return 200, {"status": "ok", "sessions": len(_sessions)}
+    if len(parts) == 2 and parts[0] == "assets" and method == "GET":
+        width = urllib.parse.parse_qs(query).get("width", [None])[0]
+        if width is not None and not width.isdigit():
+            raise ValueError("width must be a whole number of pixels")
+        return 200, await asyncio.to_thread(
+            assets.read_asset, parts[1], int(width) if width else None
+        )
+    if parts == ["sessions"] and method == "POST":
+        # Drawing and the session store write can block; keep the event loop serving
+        return 201, await asyncio.to_thread(start_session, body)
+    if len(parts) < 2 or parts[0] != "sessions":
+        return _error(404, f"No such endpoint: {path}")
+
+    session = get_session(parts[1])
+    rest = parts[2:]
+    if not rest and method == "GET":
+        return 200, session_status(session)
+    if len(rest) == 2 and rest[0] in ("questions", "answers") and rest[1].isdigit():
+        number = int(rest[1])
+        if rest[0] == "questions" and method == "GET":
+            return 200, get_question(session, number)
+        if rest[0] == "answers" and method == "PUT":
+            reason = closed_reason(session)
+            if reason is not None:
+                return _error(409, reason)
+            return 200, answer_question(session, number, body)
+    if rest == ["submit"] and method == "POST":
+        # Scoring, the event log and history writes block; keep the event loop serving
+        return 200, await asyncio.to_thread(_submit_and_record, session)
+    if rest == ["scorecard"] and method == "GET":
+        if session["results"] is None:
+            return _error(409, "Submit the session first")
+        # openpyxl takes tens of milliseconds; keep the event loop serving
+        xlsx = await asyncio.to_thread(exporter.build_scorecard, session["results"], None)
+        return 200, (XLSX_TYPE, xlsx)
+    known = rest in ([], ["submit"], ["scorecard"]) or (
+        len(rest) == 2 and rest[0] in ("questions", "answers") and rest[1].isdigit()
+    )
+    return _error(405 if known else 404, f"{method} {path} is not supported")
+
+
+async def _read_head(reader: asyncio.StreamReader):
+    """Return (method, path, headers) of the next request, or None once the client has closed."""
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ValueError("Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+    if isinstance(payload, tuple):
+        content_type, body = payload
+    else:
+        content_type, body = "application/json", json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {_STATUS[status]}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Serve requests on one connection until either side closes it (HTTP/1.1 keep-alive)."""
+    try:
+        while True:
+            try:
+                request = await asyncio.wait_for(_read_head(reader), _IDLE_CONNECTION_SECONDS)
+            except ValueError as e:
+                writer.write(_response(*_error(400, str(e)), keep_alive=False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+            method, path, headers = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            length = headers.get("content-length", "0")
+            if not length.isdigit() or int(length) > MAX_BODY_BYTES:
+                message = f"Content-Length must be at most {MAX_BODY_BYTES} bytes"
+                writer.write(_response(*_error(413, message), keep_alive=False))
+                await writer.drain()
+                break
+            raw = await reader.readexactly(int(length)) if int(length) else b""
+            try:
+                body = json.loads(raw) if raw else {}
+                if not isinstance(body, dict):
+                    raise ValueError("Request body must be a JSON object")
+                status, payload = await route(method, path, body)
+            except (TypeError, KeyError) as e:
+                # A body of the wrong shape that slipped past validation
+                status, payload = _error(400, f"Malformed request body: {e}")
+            except LookupError as e:
+                status, payload = _error(404, str(e.args[0]) if e.args else "Not found")
+            except ValueError as e:
+                # Bad JSON, unknown profiles or categories, impossible draws
+                status, payload = _error(400, str(e))
+            except (OSError, sqlite3.Error) as e:
+                status, payload = _error(500, str(e))
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _sweep_loop() -> None:
+    while True:
+        await asyncio.sleep(_SWEEP_INTERVAL)
+        sweep()
+
+
+async def serve(host: str, port: int, ready: asyncio.Event | None = None) -> None:
+    """Serve the API until cancelled; sets ready (if given) once listening."""
+    server = await asyncio.start_server(handle_connection, host, port, backlog=1024)
+    sweeper = asyncio.create_task(_sweep_loop())
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sweeper.cancel()
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve QuizLit exams over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    args = parser.parse_args(argv)
+    print(f"QuizLit API listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
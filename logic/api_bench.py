@@ -0,0 +1,160 @@
+"""logic/api_bench.py — Throughput benchmark for the headless API (logic/api.py).
+
+Runs many simulated candidates at once, each over its own keep-alive
+connection: start a session, fetch and answer every question, submit.
+Reports requests per second, completed sessions per second and latency
+percentiles per endpoint. Without --url a server is started in a
+subprocess on a free port and stopped afterwards.
+
+Usage:
+    python -m logic.api_bench [--url http://127.0.0.1:8080] [--clients 500] [--sessions 2000]
+
+MUST NOT import streamlit.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+
+
+async def _request(reader, writer, method: str, path: str, body: dict | None = None) -> tuple:
+    """Send one request on a keep-alive connection; return (status, parsed JSON body)."""
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode()
+        + data
+    )
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = await reader.readexactly(length)
+    return status, json.loads(payload) if payload.startswith(b"{") else payload
+
+
+async def _candidate(host: str, port: int, queue: asyncio.Queue, latencies: dict, profile: str) -> int:
+    """Take sessions from queue until it is empty; return how many were completed."""
+    reader, writer = await asyncio.open_connection(host, port)
+    completed = 0
+
+    async def timed(endpoint, method, path, body=None):
+        start = time.perf_counter()
+        status, payload = await _request(reader, writer, method, path, body)
+        latencies[endpoint].append(time.perf_counter() - start)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path}: {status} {payload}")
+        return payload
+
+    try:
+        while True:
+            try:
+                n = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            started = await timed("start", "POST", "/sessions", {"user_name": f"bench-{n}", "exam_profile": profile})
+            sid = started["session_id"]
+            for number in range(1, started["question_count"] + 1):
+                question = await timed("question", "GET", f"/sessions/{sid}/questions/{number}")
+                choice = (n + number) % len(question["options"])
+                await timed("answer", "PUT", f"/sessions/{sid}/answers/{number}", {"display_idx": choice})
+            await timed("submit", "POST", f"/sessions/{sid}/submit")
+            completed += 1
+    finally:
+        writer.close()
+    return completed
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def run(host: str, port: int, clients: int, sessions: int, profile: str) -> dict:
+    """Run the benchmark against a running server; return the summary numbers."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for n in range(sessions):
+        queue.put_nowait(n)
+    latencies = collections.defaultdict(list)
+    start = time.perf_counter()
+    completed = await asyncio.gather(
+        *(_candidate(host, port, queue, latencies, profile) for _ in range(clients))
+    )
+    elapsed = time.perf_counter() - start
+    requests = sum(len(values) for values in latencies.values())
+    summary = {
+        "clients": clients,
+        "sessions": sum(completed),
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(requests / elapsed),
+        "sessions_per_second": round(sum(completed) / elapsed, 1),
+        "latency_ms": {},
+    }
+    for endpoint, values in latencies.items():
+        values.sort()
+        summary["latency_ms"][endpoint] = {
+            f"p{pct}": round(_percentile(values, pct) * 1000, 2) for pct in (50, 95, 99)
+        }
+    return summary
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"API server did not start on {host}:{port}")
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the QuizLit headless API.")
+    parser.add_argument("--url", help="Running server to benchmark (default: start one)")
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent candidates")
+    parser.add_argument("--sessions", type=int, default=2000, help="Sessions to complete in total")
+    parser.add_argument("--profile", default="practitioner", help="Exam profile of every session")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "logic.api", "--host", host, "--port", str(port)],
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        _wait_for(host, port)
+        summary = asyncio.run(run(host, port, args.clients, args.sessions, args.profile))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(
+        f"{summary['sessions']} sessions by {summary['clients']} concurrent clients "
+        f"in {summary['seconds']} s: {summary['requests_per_second']} requests/s, "
+        f"{summary['sessions_per_second']} sessions/s"
+    )
+    for endpoint, pcts in summary["latency_ms"].items():
+        print(f"  {endpoint:<9} " + "  ".join(f"{name} {value} ms" for name, value in pcts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""logic/diagnostics.py — On-demand memory diagnostics for the admin page.
+
+Nothing here runs unless the diagnostics page asks for it: session sizes and
+cache sizes are measured when requested, and tracemalloc is only started
+(and its overhead paid) between start_tracing() and stop_tracing().
+
+MUST NOT import streamlit.
+"""
+import os
+import time
+import tracemalloc
+
+import data.assets as assets
+import data.cat as cat
+import data.catalog as catalog
+import data.seen as seen
+import data.session_store as session_store
+import data.upload_sandbox as upload_sandbox
+import logic.session_pool as session_pool
+import logic.session_registry as session_registry
+
+ADMIN_TOKEN_ENV = "QUIZLIT_ADMIN_TOKEN"
+
+# Allocation sites inside these files are tracemalloc's own bookkeeping.
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+
+def admin_token() -> str | None:
+    """Return the token guarding the diagnostics page, or None (page disabled)."""
+    return os.environ.get(ADMIN_TOKEN_ENV) or None
+
+
+def session_report(now: float | None = None) -> list:
+    """
+    Return one row per registered session: idle seconds, whether an exam is
+    running, estimated total bytes and bytes per state key (largest first).
+    Objects shared by every session (cached banks, tag map) are not counted.
+    """
+    now = time.time() if now is None else now
+    overview = session_registry.session_overview()
+    rows = []
+    for key, size in session_registry.session_sizes().items():
+        info = overview.get(key, {"last_seen": now, "exam": False})
+        rows.append(
+            {
+                "session": key,
+                "idle_seconds": round(now - info["last_seen"]),
+                "exam_running": info["exam"],
+                "total_bytes": size["total"],
+                "keys": dict(sorted(size["keys"].items(), key=lambda kv: -kv[1])),
+            }
+        )
+    rows.sort(key=lambda row: -row["total_bytes"])
+    return rows
+
+
+def cache_report(measure_bytes: bool = False) -> list:
+    """
+    Return one row per process-wide cache: entries, hits, misses, hit rate
+    and, if measure_bytes, its estimated size (walks every cached object).
+    """
+    entries = catalog.cached_entries()
+    stats = {f"catalog.{name}": s for name, s in catalog.cache_stats().items()}
+    stats["cat.information_index"] = cat.cache_stats(entries)
+    stats["seen.index"] = seen.cache_stats(entries)
+    stats["session_pool.ready"] = session_pool.cache_stats()
+    stats["upload_sandbox.validated"] = upload_sandbox.cache_stats()
+    stats["assets.images"] = assets.cache_stats()
+    stats["session_store.pending"] = {"entries": session_store.pending_count(), "hits": 0, "misses": 0}
+
+    # Cached image bytes are counted as they are stored; no walk needed
+    sizes = {"assets.images": stats["assets.images"]["bytes"]}
+    if measure_bytes:
+        sizes |= {
+            "catalog.banks": sum(
+                session_registry.deep_size({k: v for k, v in e.items() if k not in ("search_index", "information_index", "seen_index")})
+                for e in entries
+            ),
+            "catalog.tag_map": session_registry.deep_size(catalog.load_tag_map()),
+            # Only the combined lists and indexes; the questions belong to catalog.banks
+            "catalog.combined": sum(
+                session_registry.deep_size(
+                    {k: v for k, v in c.items() if k != "entries"},
+                    exclude={id(q) for q in c["questions"]},
+                )
+                for c in catalog.cached_combined_banks()
+            ),
+            "catalog.search_index": sum(_index_bytes(e.get("search_index")) for e in entries),
+            "cat.information_index": sum(
+                _index_bytes(e["information_index"][1]) for e in entries if "information_index" in e
+            ),
+            "seen.index": sum(_index_bytes(e["seen_index"]) for e in entries if "seen_index" in e),
+        }
+
+    rows = []
+    for name, s in stats.items():
+        lookups = s["hits"] + s["misses"]
+        rows.append(
+            {
+                "cache": name,
+                "entries": s["entries"],
+                "hits": s["hits"],
+                "misses": s["misses"],
+                "hit_rate": round(s["hits"] / lookups, 3) if lookups else None,
+                "bytes": sizes.get(name),
+            }
+        )
+    return rows
+
+
+def _index_bytes(index) -> int:
+    if index is None:
+        return 0
+    # numpy arrays report their buffer through nbytes
+    return sum(
+        getattr(value, "nbytes", None) or session_registry.deep_size(value)
+        for value in index.values()
+    )
+
+
+def is_tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def start_tracing(frames: int = 1) -> None:
+    """Start recording allocations (costs memory and CPU until stopped)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    tracemalloc.stop()
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    """Return a snapshot of live allocations, without tracemalloc's own."""
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES]
+    )
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int = 20) -> list:
+    """Return the limit source lines holding the most memory in snapshot."""
+    return [
+        {"location": _location(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def compare_snapshots(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, limit: int = 20) -> list:
+    """Return the limit source lines whose memory changed most from old to new."""
+    return [
+        {
+            "location": _location(stat.traceback),
+            "bytes_diff": stat.size_diff,
+            "blocks_diff": stat.count_diff,
+            "bytes": stat.size,
+        }
+        for stat in new.compare_to(old, "lineno")[:limit]
+    ]
+
+
+def _location(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
@@ -7,26 +7,40 @@ import io
 
 import openpyxl
 
-from logic.scoring import PASS_MARK
+from data.review import CARD_FIELDS as REVIEW_COLUMNS
+from data.seen import SEEN_FIELDS as SEEN_COLUMNS
+from data.tag_resolver import LEVELS
+from logic.scoring import breakdown_at_level
 
 
-def build_scorecard(session_results: dict, historical_scorecard) -> bytes:
+def build_scorecard(session_results: dict, historical_scorecard, levels: tuple = LEVELS) -> bytes:
     """
-    Build a 3-sheet Excel scorecard from session results.
+    Build an Excel scorecard (three sheets, up to five) from session results.
 
     Sheets:
         1. Session Metadata — one data row with session summary.
-        2. Question Results — one row per question (8 total).
-        3. Category Summary — one row per TOGAF category in this session.
+        2. Question Results — one row per question in the session, with the
+           time spent on it, visits and answer changes (blank without
+           pacing telemetry, e.g. for API sessions).
+        3. Category Summary — one row per TOGAF category in this session at
+           each of levels (topic tags, categories, category groups; see
+           data.tag_resolver.LEVELS), marked in the "level" column.
+        4. Review Schedule — spaced-repetition cards (only when present).
+        5. Seen Questions — the seen-question record for unseen-first
+           draws (only when present).
 
     The category_breakdown in session_results already contains cumulative
     values (merged with historical by logic.scoring.merge_historical before
     this function is called). The historical_scorecard parameter is accepted
     for API compatibility but is not used for computation here.
 
+    Max score, pass mark, time limit and per-question max points are taken
+    from the exam profile numbers recorded in session_results at submit time.
+
     Args:
         session_results:     The results dict from st.session_state.results.
         historical_scorecard: Accepted for signature compatibility; unused.
+        levels:              Rollup levels to write to Category Summary.
 
     Returns:
         Raw bytes of the .xlsx workbook (suitable for st.download_button).
@@ -47,6 +61,7 @@ def build_scorecard(session_results: dict, historical_scorecard) -> bytes:
             "pass_fail",
             "pass_mark",
             "time_limit_minutes",
+            "exam_profile",
         ]
     )
     ws_meta.append(
@@ -54,16 +69,18 @@ def build_scorecard(session_results: dict, historical_scorecard) -> bytes:
             session_results["user_name"],
             datetime.date.today().isoformat(),
             session_results["total_score"],
-            40,
+            session_results["max_score"],
             "PASS" if session_results["passed"] else "FAIL",
-            PASS_MARK,
-            90,
+            session_results["pass_mark"],
+            session_results["time_limit_minutes"],
+            session_results["exam_profile"],
         ]
     )
 
     # -----------------------------------------------------------------------
     # Sheet 2: Question Results
     # -----------------------------------------------------------------------
+    max_points = session_results["max_points_per_question"]
     ws_qs = wb.create_sheet("Question Results")
     ws_qs.append(
         [
@@ -74,19 +91,32 @@ def build_scorecard(session_results: dict, historical_scorecard) -> bytes:
             "points_earned",
             "max_points",
             "category",
+            "case_study_id",
+            "seconds_on_question",
+            "visits",
+            "answer_changes",
         ]
     )
+    # One snippet per distinct case study, shared by every row that uses it
+    snippets = {
+        cs_id: text[:100] for cs_id, text in session_results["case_studies"].items()
+    }
+    pacing = session_results.get("pacing", {}).get("per_question", {})
     for pq in session_results["per_question"]:
-        scenario_snippet = (pq["scenario"][:100] if pq["scenario"] else "")
+        p = pacing.get(pq["question_id"], {})
         ws_qs.append(
             [
                 pq["question_id"],
-                scenario_snippet,
+                snippets.get(pq["case_study_id"], ""),
                 pq["question"],
                 pq["selected_option_id"] or "",
                 pq["points_earned"],
-                5,
+                max_points,
                 pq["primary_category"],
+                pq["case_study_id"] or "",
+                p.get("dwell_seconds", ""),
+                p.get("visits", ""),
+                p.get("answer_changes", ""),
             ]
         )
 
@@ -103,18 +133,40 @@ def build_scorecard(session_results: dict, historical_scorecard) -> bytes:
             "cumulative_points",
             "cumulative_max",
             "cumulative_pct",
+            "level",
         ]
     )
-    for cat, data in session_results["category_breakdown"].items():
-        s_max = data["session_max"]
-        s_pts = data["session_points"]
-        c_max = data["cumulative_max"]
-        c_pts = data["cumulative_points"]
-        s_pct = 0.0 if s_max == 0 else round(s_pts / s_max * 100, 2)
-        c_pct = 0.0 if c_max == 0 else round(c_pts / c_max * 100, 2)
-        ws_cat.append(
-            [cat, s_pts, s_max, s_pct, c_pts, c_max, c_pct]
-        )
+    for level in levels:
+        for cat, data in breakdown_at_level(session_results, level).items():
+            s_max = data["session_max"]
+            s_pts = data["session_points"]
+            c_max = data["cumulative_max"]
+            c_pts = data["cumulative_points"]
+            s_pct = 0.0 if s_max == 0 else round(s_pts / s_max * 100, 2)
+            c_pct = 0.0 if c_max == 0 else round(c_pts / c_max * 100, 2)
+            ws_cat.append(
+                [cat, s_pts, s_max, s_pct, c_pts, c_max, c_pct, level]
+            )
+
+    # -----------------------------------------------------------------------
+    # Sheet 4 (optional): Review Schedule — spaced-repetition cards, read
+    # back by logic.importer so reviews carry over between sessions
+    # -----------------------------------------------------------------------
+    if session_results.get("review_schedule"):
+        ws_review = wb.create_sheet("Review Schedule")
+        ws_review.append(list(REVIEW_COLUMNS))
+        for row in session_results["review_schedule"]:
+            ws_review.append(row)
+
+    # -----------------------------------------------------------------------
+    # Sheet 5 (optional): Seen Questions — read back by logic.importer so
+    # unseen-first draws remember earlier sessions
+    # -----------------------------------------------------------------------
+    if session_results.get("seen_questions"):
+        ws_seen = wb.create_sheet("Seen Questions")
+        ws_seen.append(list(SEEN_COLUMNS))
+        for row in session_results["seen_questions"]:
+            ws_seen.append(row)
 
     buf = io.BytesIO()
     wb.save(buf)
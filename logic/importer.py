@@ -4,6 +4,10 @@ MUST NOT import streamlit.
 """
 import openpyxl
 
+import data.seen as seen
+from data.review import CARD_FIELDS, from_rows
+from data.tag_resolver import LEVELS
+
 
 def load_scorecard(file_obj) -> dict:
     """
@@ -24,7 +28,12 @@ def load_scorecard(file_obj) -> dict:
                     "cumulative_points": int,
                     "cumulative_max": int,
                 }
-            }
+            },
+            "category_rollups": {      # rows of the coarser levels, if any
+                "<level>": {"<category_name>": {...}},
+            },
+            "review_schedule": {...},  # only if the sheet exists; see data.review
+            "seen_questions": {...},   # only if the sheet exists; see data.seen
         }
 
     Raises:
@@ -56,15 +65,47 @@ def load_scorecard(file_obj) -> dict:
 
     col_idx = {h: i for i, h in enumerate(headers)}
 
-    # Parse category data rows
-    cat_dict = {}
+    # Parse category data rows; scorecards without a "level" column hold
+    # topic tags only. Rows of unknown levels are ignored.
+    by_level = {level: {} for level in LEVELS}
     for row in ws_cat.iter_rows(min_row=2, values_only=True):
         category = row[col_idx["category"]]
         if category is None:
             continue
-        cat_dict[str(category)] = {
+        level = (row[col_idx["level"]] if "level" in col_idx else None) or "tag"
+        if level not in by_level:
+            continue
+        by_level[level][str(category)] = {
             "cumulative_points": int(row[col_idx["cumulative_points"]]),
             "cumulative_max": int(row[col_idx["cumulative_max"]]),
         }
 
-    return {"category_summary": cat_dict}
+    scorecard = {"category_summary": by_level.pop("tag")}
+    if any(by_level.values()):
+        scorecard["category_rollups"] = {
+            level: summary for level, summary in by_level.items() if summary
+        }
+
+    # Optional spaced-repetition cards (older scorecards have no such sheet)
+    if "Review Schedule" in wb.sheetnames:
+        rows = wb["Review Schedule"].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        if header != list(CARD_FIELDS):
+            raise ValueError("Incompatible scorecard schema: unexpected 'Review Schedule' columns")
+        try:
+            scorecard["review_schedule"] = from_rows(row for row in rows if row[0] is not None)
+        except (TypeError, ValueError):
+            raise ValueError("Incompatible scorecard schema: invalid 'Review Schedule' row")
+
+    # Optional seen-question record for unseen-first draws
+    if "Seen Questions" in wb.sheetnames:
+        rows = wb["Seen Questions"].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        if header != list(seen.SEEN_FIELDS):
+            raise ValueError("Incompatible scorecard schema: unexpected 'Seen Questions' columns")
+        try:
+            scorecard["seen_questions"] = seen.from_rows(row for row in rows if row[0] is not None)
+        except (TypeError, ValueError):
+            raise ValueError("Incompatible scorecard schema: invalid 'Seen Questions' row")
+
+    return scorecard
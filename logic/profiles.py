@@ -0,0 +1,69 @@
+"""logic/profiles.py — Exam profiles (question count, time limit, pass mark, points).
+
+A profile is the single source of truth for every number that shapes a
+session: how many questions are drawn, how long the timer runs, what
+percentage is needed to pass, and how many points each scoring tier earns.
+
+MUST NOT import streamlit.
+"""
+import math
+
+DEFAULT_PROFILE = "practitioner"
+
+# Tier points used by the bundled banks (TOGAF 10 Practitioner gradient).
+PRACTITIONER_POINTS = {"best": 5, "second_best": 3, "third_best": 1, "distractor": 0}
+# Right-or-wrong scoring: only the best option earns a point.
+FOUNDATION_POINTS = {"best": 1, "second_best": 0, "third_best": 0, "distractor": 0}
+
+EXAM_PROFILES: dict = {
+    "practitioner": {
+        "label": "Practitioner — 8 questions, 90 min",
+        "question_count": 8,
+        "time_limit_minutes": 90,
+        "pass_pct": 60,
+        "points_scheme": PRACTITIONER_POINTS,
+    },
+    "foundation": {
+        "label": "Foundation style — 40 questions, 60 min",
+        "question_count": 40,
+        "time_limit_minutes": 60,
+        "pass_pct": 55,
+        "points_scheme": FOUNDATION_POINTS,
+    },
+    "foundation_mock": {
+        "label": "Full-length Foundation mock — 80 questions, 120 min",
+        "question_count": 80,
+        "time_limit_minutes": 120,
+        "pass_pct": 55,
+        "points_scheme": FOUNDATION_POINTS,
+    },
+    "practitioner_mock": {
+        "label": "Full-length Practitioner mock — 200 questions, 300 min",
+        "question_count": 200,
+        "time_limit_minutes": 300,
+        "pass_pct": 60,
+        "points_scheme": PRACTITIONER_POINTS,
+    },
+}
+
+
+def get_profile(name: str) -> dict:
+    """Return the profile dict for name (with its key under "name")."""
+    if name not in EXAM_PROFILES:
+        raise ValueError(f"Unknown exam profile: '{name}'")
+    return {"name": name, **EXAM_PROFILES[name]}
+
+
+def max_points_per_question(profile: dict) -> int:
+    """Return the points awarded for the best answer under the profile."""
+    return max(profile["points_scheme"].values())
+
+
+def max_score(profile: dict) -> int:
+    """Return the maximum attainable session score under the profile."""
+    return profile["question_count"] * max_points_per_question(profile)
+
+
+def pass_mark(profile: dict) -> int:
+    """Return the minimum passing score (pass_pct of max_score, rounded up)."""
+    return math.ceil(max_score(profile) * profile["pass_pct"] / 100)
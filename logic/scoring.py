@@ -1,11 +1,21 @@
-from data.tag_resolver import get_tag_names_for_question
+from data.loader import get_case_studies
+from data.tag_resolver import LEVELS, get_level_names_for_question, get_tag_names_for_question
+import logic.profiles as profiles
 
 # TOGAF 10 Practitioner: 60% of 40 points required to pass.
+# Sessions run under a non-default exam profile use logic.profiles.pass_mark.
 PASS_MARK: int = 24
 
 
-def build_points_lookup(scoring: dict) -> dict:
-    """Convert hierarchical scoring block to flat {option_id: points}."""
+def build_points_lookup(scoring: dict, points_scheme: dict | None = None) -> dict:
+    """
+    Convert hierarchical scoring block to flat {option_id: points}.
+
+    If points_scheme ({tier_name: points}) is given, it overrides the points
+    stored in the bank so the same questions can be scored under any profile.
+    """
+    if points_scheme is not None:
+        return {tier["option"]: points_scheme[name] for name, tier in scoring.items()}
     return {tier["option"]: tier["points"] for tier in scoring.values()}
 
 
@@ -19,61 +29,143 @@ def build_tier_lookup(scoring: dict) -> dict:
     return {tier["option"]: tier_name for tier_name, tier in scoring.items()}
 
 
-def score_session(
+def compute_level_breakdowns(
     questions: list,
-    points_lookups: dict,
-    shuffle_maps: dict,
     answers: dict,
-) -> int:
-    """Sum points across all answered questions; unanswered questions score 0."""
-    total = 0
+    tag_map: dict,
+    max_points: int = 5,
+    levels: tuple = LEVELS,
+) -> dict:
+    """
+    Return {level: {node: {session_points, session_max}}} for each of levels
+    (see data.tag_resolver.LEVELS), all built in one pass over questions.
+
+    Nodes come from each tag's precomputed ancestor closure, so a question
+    counts once towards a category however many of its tags fall under it.
+    """
+    result = {level: {} for level in levels}
     for q in questions:
-        q_id = q["id"]
-        if q_id in answers:
-            total += answers[q_id]["points"]
-    return total
+        points = answers[q["id"]]["points"] if q["id"] in answers else 0
+        for level, names in get_level_names_for_question(q, tag_map).items():
+            if level not in result:
+                continue
+            for name in names:
+                data = result[level].setdefault(name, {"session_points": 0, "session_max": 0})
+                data["session_points"] += points
+                data["session_max"] += max_points
+    return result
 
 
-def compute_category_breakdown(
-    questions: list,
-    points_lookups: dict,
-    shuffle_maps: dict,
-    answers: dict,
-    tag_map: dict,
-) -> dict:
+def new_live_score(questions: list, tag_map: dict, max_points: int = 5) -> dict:
     """
-    Return {tag_name: {session_points, session_max}} for every tag present in questions.
-    Questions with multiple tags contribute to all their categories.
-    Unanswered questions contribute 0 to session_points and 5 to session_max.
+    Return a running score for a session, kept up to date answer by answer.
+
+    The breakdown is {tag_name: {session_points, session_max}} (the "tag"
+    level of compute_level_breakdowns), and "rollups" holds one per level
+    above "tag"; every question's max is counted up front, and
+    apply_live_answer only touches the nodes of the answered question, so
+    the totals never need recomputing. "answered_max" and
+    "category_answered_max" count only answered questions, for the
+    practice-mode live panel.
     """
-    breakdown = {}
+    live = {
+        "max_points": max_points,
+        "total": 0,
+        "answered_max": 0,
+        "points": {},  # q_id -> points currently counted
+        "tag_names": {},  # q_id -> category names
+        "rollup_names": {},  # q_id -> {level: node names} above "tag"
+        "tier_for_option": {},  # q_id -> {option_id: tier name}
+        "breakdown": {},
+        "rollups": {level: {} for level in LEVELS[1:]},
+        "category_answered_max": {},
+    }
     for q in questions:
-        q_id = q["id"]
-        tag_names = get_tag_names_for_question(q, tag_map)
-        points = answers[q_id]["points"] if q_id in answers else 0
-        for name in tag_names:
-            if name not in breakdown:
-                breakdown[name] = {"session_points": 0, "session_max": 0}
-            breakdown[name]["session_points"] += points
-            breakdown[name]["session_max"] += 5
-    return breakdown
-
-
-def merge_historical(breakdown: dict, historical_scorecard) -> dict:
+        add_live_question(live, q, tag_map)
+    return live
+
+
+def add_live_question(live: dict, question: dict, tag_map: dict) -> None:
+    """Count a question added to the session (e.g. the next adaptive-test question)."""
+    q_id = question["id"]
+    tag_names = get_tag_names_for_question(question, tag_map)
+    live["tag_names"][q_id] = tag_names
+    live["tier_for_option"][q_id] = build_tier_lookup(question["scoring"])
+    for name in tag_names:
+        data = live["breakdown"].setdefault(name, {"session_points": 0, "session_max": 0})
+        data["session_max"] += live["max_points"]
+    level_names = get_level_names_for_question(question, tag_map)
+    live["rollup_names"][q_id] = {level: level_names[level] for level in live["rollups"]}
+    for level, names in live["rollup_names"][q_id].items():
+        for name in names:
+            data = live["rollups"][level].setdefault(name, {"session_points": 0, "session_max": 0})
+            data["session_max"] += live["max_points"]
+
+
+def apply_live_answer(live: dict, q_id, points: int) -> None:
+    """Record a new or changed answer; costs O(number of the question's tags and their ancestors)."""
+    previous = live["points"].get(q_id)
+    delta = points - (previous or 0)
+    live["points"][q_id] = points
+    live["total"] += delta
+    if previous is None:
+        live["answered_max"] += live["max_points"]
+    for name in live["tag_names"][q_id]:
+        live["breakdown"][name]["session_points"] += delta
+        if previous is None:
+            answered = live["category_answered_max"]
+            answered[name] = answered.get(name, 0) + live["max_points"]
+    for level, names in live["rollup_names"][q_id].items():
+        for name in names:
+            live["rollups"][level][name]["session_points"] += delta
+
+
+def historical_summary(historical_scorecard, level: str = "tag") -> dict:
+    """Return a historical scorecard's {node: cumulative scores} at one rollup level."""
+    if historical_scorecard is None:
+        return {}
+    if level == "tag":
+        return historical_scorecard.get("category_summary", {})
+    return historical_scorecard.get("category_rollups", {}).get(level, {})
+
+
+def derive_rollups(category_summary: dict, tag_map: dict) -> dict:
+    """
+    Return {level: {node: cumulative scores}} for the levels above "tag",
+    summed from a tag-level summary through each tag's ancestors. For
+    scorecards saved before rollups existed and for the attempt history,
+    which only record tags; a question with two tags in one category was
+    counted under both tags, so it counts twice towards the category here.
+    """
+    ancestors = {info["name"]: info["ancestors"] for info in tag_map.values()}
+    rollups = {level: {} for level in LEVELS[1:]}
+    for tag_name, data in category_summary.items():
+        for level, nodes in rollups.items():
+            node = ancestors.get(tag_name, {}).get(level)
+            if node is None:
+                continue
+            total = nodes.setdefault(node, {"cumulative_points": 0, "cumulative_max": 0})
+            total["cumulative_points"] += data.get("cumulative_points", 0)
+            total["cumulative_max"] += data.get("cumulative_max", 0)
+    return rollups
+
+
+def merge_historical(breakdown: dict, historical_scorecard, level: str = "tag") -> dict:
     """
     Merge session breakdown with optional historical scorecard data.
 
     If historical_scorecard is None, cumulative == session values.
     Categories present only in historical appear with session_points=0, session_max=0.
+    level names the rollup level of breakdown (see data.tag_resolver.LEVELS);
+    scorecards saved before rollups existed only have the "tag" level.
     """
+    summary = historical_summary(historical_scorecard, level)
     result = {}
     for category, data in breakdown.items():
         cumulative_points = data["session_points"]
         cumulative_max = data["session_max"]
         if historical_scorecard is not None:
-            hist = (
-                historical_scorecard.get("category_summary", {}).get(category, {})
-            )
+            hist = summary.get(category, {})
             cumulative_points += hist.get("cumulative_points", 0)
             cumulative_max += hist.get("cumulative_max", 0)
         result[category] = {
@@ -85,7 +177,7 @@ def merge_historical(breakdown: dict, historical_scorecard) -> dict:
 
     # Include historical-only categories
     if historical_scorecard is not None:
-        for category, hist in historical_scorecard.get("category_summary", {}).items():
+        for category, hist in summary.items():
             if category not in result:
                 result[category] = {
                     "session_points": 0,
@@ -97,6 +189,107 @@ def merge_historical(breakdown: dict, historical_scorecard) -> dict:
     return result
 
 
+def _cumulative(breakdown: dict) -> dict:
+    return {
+        category: {
+            "cumulative_points": data["cumulative_points"],
+            "cumulative_max": data["cumulative_max"],
+        }
+        for category, data in breakdown.items()
+    }
+
+
+def carry_forward(category_breakdown: dict, category_rollups: dict | None = None) -> dict:
+    """
+    Return the cumulative scores of a merged breakdown (and of its rollups,
+    {level: merged breakdown}) as a historical scorecard.
+    """
+    scorecard = {"category_summary": _cumulative(category_breakdown)}
+    if category_rollups:
+        scorecard["category_rollups"] = {
+            level: _cumulative(breakdown) for level, breakdown in category_rollups.items()
+        }
+    return scorecard
+
+
+def breakdown_at_level(results: dict, level: str = "tag") -> dict:
+    """Return a results dict's merged category breakdown at one rollup level."""
+    if level == "tag":
+        return results["category_breakdown"]
+    return results.get("category_rollups", {}).get(level, {})
+
+
+def build_results(
+    questions: list,
+    answers: dict,
+    points_lookups: dict,
+    profile: dict,
+    tag_map: dict,
+    live: dict,
+    historical_scorecard,
+    user_name: str,
+) -> dict:
+    """
+    Return the results of a submitted session.
+
+    answers is {question_id: {"original_option_id", "points", ...}}; live is
+    the session's live score (see new_live_score), which already holds the
+    total, the category breakdown and its rollups for the latest answers, and
+    each question's tag names and tier lookup, so nothing is recomputed here.
+    A historical scorecard without rollups (saved before they existed, or
+    loaded from the attempt history) has them derived from its tags.
+    """
+    max_points = profiles.max_points_per_question(profile)
+    pass_mark = profiles.pass_mark(profile)
+    if historical_scorecard is not None and "category_rollups" not in historical_scorecard:
+        historical_scorecard = {
+            **historical_scorecard,
+            "category_rollups": derive_rollups(
+                historical_scorecard.get("category_summary", {}), tag_map
+            ),
+        }
+
+    per_question = []
+    for q in questions:
+        qid = q["id"]
+        tag_names = live["tag_names"][qid]
+        per_question.append(
+            {
+                "question_id": qid,
+                "case_study_id": q["case_study_id"],
+                "question": q["question"],
+                "selected_option_id": answers[qid]["original_option_id"] if qid in answers else None,
+                "points_earned": answers[qid]["points"] if qid in answers else 0,
+                "points_lookup": points_lookups[qid],
+                "tier_for_option": live["tier_for_option"][qid],
+                "rationale": q["rationale"],
+                "tag_names": tag_names,
+                "primary_category": tag_names[0] if tag_names else "",
+            }
+        )
+
+    return {
+        "total_score": live["total"],
+        "max_score": profiles.max_score(profile),
+        "pass_mark": pass_mark,
+        "pass_pct": profile["pass_pct"],
+        "max_points_per_question": max_points,
+        "time_limit_minutes": profile["time_limit_minutes"],
+        "exam_profile": profile["name"],
+        "passed": is_passing(live["total"], pass_mark),
+        "per_question": per_question,
+        # Each distinct scenario once; per_question rows reference it by id
+        "case_studies": get_case_studies(questions),
+        "category_breakdown": merge_historical(live["breakdown"], historical_scorecard),
+        # {level: merged breakdown} for the levels above "tag"
+        "category_rollups": {
+            level: merge_historical(level_breakdown, historical_scorecard, level)
+            for level, level_breakdown in live["rollups"].items()
+        },
+        "user_name": user_name,
+    }
+
+
 def is_passing(total_score: int, pass_mark: int = PASS_MARK) -> bool:
     """Return True if total_score meets or exceeds pass_mark."""
     return total_score >= pass_mark
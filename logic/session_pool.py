@@ -0,0 +1,247 @@
+"""logic/session_pool.py — Session preparation and a background prefetch pool.
+
+prepare_session turns drawn questions into everything a quiz needs (question
+order, shuffled options, shuffle maps, points lookups, live score). For
+draws that do not depend on who is taking the exam (random, blueprint and
+case-study draws), take_session serves a session prepared ahead of time by a
+worker thread, so Start Session costs a dict pop even when a whole class
+starts at once.
+
+Pools are keyed by bank versions, tag map version, categories, exam
+profile, draw mode and the near-duplicate setting. Each prepared session is
+handed out exactly once, and every one is drawn and shuffled independently,
+so users never share a draw. Only the most recently used selections are kept
+topped up.
+
+MUST NOT import streamlit.
+"""
+import collections
+import logging
+import queue
+import secrets
+import threading
+
+import data.catalog as catalog
+import data.loader as loader
+import data.sampler as sampler
+import logic.profiles as profiles
+import logic.scoring as scoring
+import logic.shuffler as shuffler
+
+POOLED_DRAW_MODES = ("random", "blueprint", "case_study")
+# Ready sessions kept per selection.
+POOL_DEPTH = 4
+# Selections kept topped up (least recently used are dropped).
+MAX_POOLED_SELECTIONS = 16
+
+# key -> {"spec": dict, "ready": deque of prepared sessions}
+_pools: collections.OrderedDict = collections.OrderedDict()
+_pool_lock = threading.Lock()
+_refills: queue.Queue = queue.Queue()
+# Sessions served ready from a pool (hits) vs. built on the calling thread (misses).
+_stats: collections.Counter = collections.Counter()
+_worker: threading.Thread | None = None
+_log = logging.getLogger(__name__)
+
+
+def prepare_session(
+    drawn: list, profile: dict, tag_map: dict, seed=None, group_case_studies: bool = False
+) -> dict:
+    """
+    Return the prepared state of a new session from its drawn questions.
+
+    seed makes question and option order reproducible (exam forms); without
+    one a random seed is generated, and returned as "seed" so the session can
+    be rebuilt from a snapshot. group_case_studies keeps questions sharing a
+    scenario together.
+    """
+    if seed is None:
+        seed = secrets.randbits(64)
+    if group_case_studies:
+        questions = shuffler.shuffle_case_study_groups(drawn, seed)
+    else:
+        questions = shuffler.shuffle_questions(drawn, seed)
+    return {"seed": seed, **prepare_questions(questions, profile, tag_map, seed)}
+
+
+def prepare_questions(questions: list, profile: dict, tag_map: dict, seed) -> dict:
+    """Return shuffled options, shuffle maps, points lookups and live score for questions in order."""
+    shuffled_options, shuffle_maps, points_lookups = {}, {}, {}
+    for q in questions:
+        q_id = q["id"]
+        opts, smap = shuffler.shuffle_options(q, option_seed(seed, q_id))
+        shuffled_options[q_id] = opts
+        shuffle_maps[q_id] = smap
+        points_lookups[q_id] = scoring.build_points_lookup(q["scoring"], profile["points_scheme"])
+    return {
+        "questions": questions,
+        "shuffled_options": shuffled_options,
+        "shuffle_maps": shuffle_maps,
+        "points_lookups": points_lookups,
+        "live_score": scoring.new_live_score(
+            questions, tag_map, profiles.max_points_per_question(profile)
+        ),
+    }
+
+
+def option_seed(seed, question_id: str) -> str:
+    """Return the option-shuffle seed of one question in a session."""
+    return f"{seed}:{question_id}"
+
+
+def draw_questions(
+    bank: dict, tag_ids: list, profile: dict, draw_mode: str, avoid_near_duplicates: bool, tag_map: dict
+) -> list:
+    """
+    Draw a session for one of POOLED_DRAW_MODES from a combined bank
+    (see data.catalog.combined_bank). Raises ValueError if the bank
+    cannot supply the draw.
+    """
+    n = profile["question_count"]
+    # Each draw rejects near-duplicates itself, so quotas and case-study groups hold
+    cluster_of = bank["near_duplicates"] if avoid_near_duplicates else None
+    if draw_mode == "blueprint":
+        quotas = sampler.compute_blueprint_quotas(tag_ids, tag_map, n)
+        return sampler.draw_blueprint(
+            bank["questions"], bank["tag_index"], quotas, tag_map, cluster_of=cluster_of
+        )
+    filtered = loader.filter_by_tags(bank["questions"], tag_ids)
+    if draw_mode == "case_study":
+        return loader.draw_by_case_study(filtered, n, cluster_of=cluster_of)
+    return loader.draw_session_questions(filtered, n, cluster_of)
+
+
+def session_key(
+    entries: list, tag_ids: list, profile: dict, draw_mode: str, avoid_near_duplicates: bool, tag_map: dict
+) -> tuple:
+    """
+    Return the pool key for a selection; bank versions make reloaded banks a
+    new key. A reloaded tag CSV is a new tag map object (see
+    data.catalog.load_tag_map), so its identity versions the key too; a
+    pooled spec keeps its tag map alive, so the id is not reused meanwhile.
+    """
+    return (
+        tuple((entry["name"], entry["version"]) for entry in entries),
+        tuple(sorted(tag_ids)),
+        profile["name"],
+        draw_mode,
+        avoid_near_duplicates,
+        id(tag_map),
+    )
+
+
+def _build(spec: dict) -> dict:
+    drawn = draw_questions(
+        spec["bank"],
+        spec["tag_ids"],
+        spec["profile"],
+        spec["draw_mode"],
+        spec["avoid_near_duplicates"],
+        spec["tag_map"],
+    )
+    return prepare_session(
+        drawn, spec["profile"], spec["tag_map"], group_case_studies=spec["draw_mode"] == "case_study"
+    )
+
+
+def take_session(
+    entries: list,
+    tag_ids: list,
+    profile: dict,
+    draw_mode: str,
+    avoid_near_duplicates: bool,
+    tag_map: dict,
+) -> dict:
+    """
+    Return a prepared session for the selection: a ready one from the pool
+    if there is one, otherwise one built now. Either way the selection's pool
+    is refilled in the background.
+
+    Raises ValueError (on the calling thread) if the draw is impossible.
+    """
+    key = session_key(entries, tag_ids, profile, draw_mode, avoid_near_duplicates, tag_map)
+    with _pool_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            if pool["ready"]:
+                prepared = pool["ready"].popleft()
+                _stats["hits"] += 1
+                _refills.put(key)
+                return prepared
+        _stats["misses"] += 1
+
+    if pool is None:
+        spec = {
+            "bank": catalog.combined_bank(entries),
+            "tag_ids": list(tag_ids),
+            "profile": profile,
+            "draw_mode": draw_mode,
+            "avoid_near_duplicates": avoid_near_duplicates,
+            "tag_map": tag_map,
+        }
+    else:
+        spec = pool["spec"]
+    prepared = _build(spec)
+
+    with _pool_lock:
+        if key not in _pools:
+            _pools[key] = {"spec": spec, "ready": collections.deque()}
+            while len(_pools) > MAX_POOLED_SELECTIONS:
+                _pools.popitem(last=False)
+    _start_worker()
+    _refills.put(key)
+    return prepared
+
+
+def _start_worker() -> None:
+    global _worker
+    with _pool_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_refill_loop, name="session-prefetch", daemon=True)
+            _worker.start()
+
+
+def _refill_loop() -> None:
+    while True:
+        _refill(_refills.get())
+
+
+def _refill(key) -> None:
+    """
+    Top up one selection's pool to POOL_DEPTH. A selection that can no longer
+    be drawn, or whose build fails unexpectedly (logged), is dropped so the
+    worker moves on to the other selections.
+    """
+    while True:
+        with _pool_lock:
+            pool = _pools.get(key)
+            if pool is None or len(pool["ready"]) >= POOL_DEPTH:
+                return
+        try:
+            prepared = _build(pool["spec"])
+        except Exception as e:
+            if not isinstance(e, ValueError):
+                _log.exception(
+                    "Dropping the %s/%s session pool after a failed build",
+                    pool["spec"]["profile"]["name"],
+                    pool["spec"]["draw_mode"],
+                )
+            with _pool_lock:
+                _pools.pop(key, None)
+            return
+        with _pool_lock:
+            pool["ready"].append(prepared)
+
+
+def cache_stats() -> dict:
+    """Return {"entries": ready sessions, "hits", "misses"} for diagnostics."""
+    with _pool_lock:
+        ready = sum(len(pool["ready"]) for pool in _pools.values())
+        return {"entries": ready, "hits": _stats["hits"], "misses": _stats["misses"]}
+
+
+def pool_sizes() -> dict:
+    """Return {key: ready sessions} for diagnostics."""
+    with _pool_lock:
+        return {key: len(pool["ready"]) for key, pool in _pools.items()}
@@ -0,0 +1,312 @@
+"""logic/session_registry.py — Process-wide registry of browser sessions.
+
+Every rerun touches its session here (see app.py), which lets the process:
+
+- estimate how much memory each session's state holds (objects shared by
+  every session, such as cached banks and the tag map, are not counted);
+- evict sessions idle for longer than QUIZLIT_IDLE_SESSION_MINUTES, and,
+  when QUIZLIT_SESSION_MEMORY_MB is set, idle finished sessions oldest first
+  until the estimate is back under budget. Cumulative scores of an evicted
+  session are carried forward first, so its next exam keeps them;
+- cap the number of exams running at once (QUIZLIT_MAX_ACTIVE_EXAMS). Setup
+  pages that find every place taken wait in a first-come, first-served queue.
+
+A session's state is any mapping; Streamlit's per-session state object is
+passed in by app.py. Only idle sessions are ever changed from another
+session's thread.
+
+MUST NOT import streamlit.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+
+import data.catalog as catalog
+import data.upload_sandbox as upload_sandbox
+import logic.scoring as scoring
+
+MAX_ACTIVE_EXAMS_ENV = "QUIZLIT_MAX_ACTIVE_EXAMS"
+IDLE_TTL_ENV = "QUIZLIT_IDLE_SESSION_MINUTES"
+MEMORY_BUDGET_ENV = "QUIZLIT_SESSION_MEMORY_MB"
+DEFAULT_IDLE_TTL_MINUTES = 60
+
+# A running quiz reruns every second, so one silent this long has lost its
+# tab; its exam place is freed (and taken back if the tab returns).
+ABANDONED_EXAM_SECONDS = 120
+# Queued setup pages rerun this often; waiters silent for a few polls left.
+QUEUE_POLL_SECONDS = 2
+_QUEUE_STALE_SECONDS = 5 * QUEUE_POLL_SECONDS
+# An admitted session has this long to start its exam before its place lapses.
+_RESERVATION_SECONDS = 30
+# Sessions idle for less than this are never evicted to meet the memory budget.
+_BUDGET_MIN_IDLE_SECONDS = 300
+_SWEEP_INTERVAL = 30
+
+# Quiz and results state, dropped when a session starts over or is evicted.
+EXAM_KEYS = [
+    "session_active",
+    "session_submitted",
+    "questions",
+    "shuffled_options",
+    "shuffle_maps",
+    "points_lookups",
+    "answers",
+    "flags",
+    "current_question_idx",
+    "start_time",
+    "time_extension_used",
+    "exam_profile",
+    "cat",
+    "practice_mode",
+    "live_score",
+    "results",
+    "historical_scorecard",
+    "session_id",
+    "session_seed",
+    "session_banks",
+    "_snapshot_start_time",
+    "telemetry",
+]
+# Bank selection state the setup page rebuilds on its next render.
+BANK_KEYS = [
+    "question_bank",
+    "_combined_bank",
+    "_bank_source_key",
+    "_bank_tag_index",
+    "_bank_near_duplicates",
+    "_bank_tag_names",
+]
+
+_sessions: dict = {}  # key -> {"state": mapping, "last_seen": float, "exam": bool}
+_reserved: dict = {}  # key -> time admitted from the queue, until its exam starts
+_waiting: collections.OrderedDict = collections.OrderedDict()  # key -> last poll
+_lock = threading.Lock()
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def max_active_exams() -> int | None:
+    """Return the cap on concurrent exams, or None if unlimited."""
+    return int(os.environ.get(MAX_ACTIVE_EXAMS_ENV) or 0) or None
+
+
+def idle_ttl_seconds() -> float:
+    return float(os.environ.get(IDLE_TTL_ENV) or DEFAULT_IDLE_TTL_MINUTES) * 60
+
+
+def memory_budget_bytes() -> int | None:
+    """Return the session-state memory budget, or None if unset."""
+    budget = float(os.environ.get(MEMORY_BUDGET_ENV) or 0)
+    return int(budget * 1024 * 1024) or None
+
+
+def _get(state, key, default=None):
+    return state[key] if key in state else default
+
+
+def _items(state) -> dict:
+    # Streamlit's session state object lists user keys via its filtered_state property
+    return state.filtered_state if hasattr(state, "filtered_state") else dict(state)
+
+
+def touch(key: str, state, now: float | None = None) -> None:
+    """Record that a session just reran; sweeps idle sessions every so often."""
+    now = time.time() if now is None else now
+    exam = bool(_get(state, "session_active"))
+    # The exam's own id, so a tab that resumed it does not count twice
+    exam_id = _get(state, "session_id") if exam else None
+    with _lock:
+        _sessions[key] = {"state": state, "last_seen": now, "exam": exam, "exam_id": exam_id}
+        # An admitted session starts its exam in the run that was admitted
+        _reserved.pop(key, None)
+    if now - _last_sweep >= _SWEEP_INTERVAL:
+        sweep(now)
+
+
+def _active_exams(now: float, exclude_exam: str | None = None) -> int:
+    running = {
+        entry["exam_id"] or key
+        for key, entry in _sessions.items()
+        if entry["exam"]
+        and now - entry["last_seen"] < ABANDONED_EXAM_SECONDS
+        and (exclude_exam is None or entry["exam_id"] != exclude_exam)
+    }
+    for key, admitted in list(_reserved.items()):
+        if now - admitted >= _RESERVATION_SECONDS:
+            del _reserved[key]
+    return len(running | set(_reserved))
+
+
+def session_overview() -> dict:
+    """Return {session key: {"last_seen", "exam"}} for every registered session."""
+    with _lock:
+        return {
+            key: {"last_seen": entry["last_seen"], "exam": entry["exam"]}
+            for key, entry in _sessions.items()
+        }
+
+
+def active_exam_count(now: float | None = None) -> int:
+    """Return the number of exams running (or about to start) in this process."""
+    with _lock:
+        return _active_exams(time.time() if now is None else now)
+
+
+def acquire_exam_slot(key: str, now: float | None = None) -> bool:
+    """
+    Return True if the session may start an exam now. Otherwise it joins (or
+    keeps its place in) the queue; call again every QUEUE_POLL_SECONDS.
+    """
+    limit = max_active_exams()
+    if limit is None:
+        return True
+    now = time.time() if now is None else now
+    with _lock:
+        for waiter, polled in list(_waiting.items()):
+            if now - polled >= _QUEUE_STALE_SECONDS:
+                del _waiting[waiter]  # closed the tab or left the page
+        _waiting[key] = now
+        if _active_exams(now) < limit and next(iter(_waiting)) == key:
+            del _waiting[key]
+            _reserved[key] = now
+            return True
+        return False
+
+
+def resume_exam_slot(key: str, exam_id: str, now: float | None = None) -> bool:
+    """
+    Return True if the session may resume the snapshotted exam exam_id now,
+    reserving an exam place for it. Another tab still running the same exam
+    does not count against the cap. A resume does not queue: at the cap it
+    is refused, and the candidate retries by reloading.
+    """
+    limit = max_active_exams()
+    if limit is None:
+        return True
+    now = time.time() if now is None else now
+    with _lock:
+        if _active_exams(now, exam_id) < limit:
+            _reserved[key] = now
+            return True
+        return False
+
+
+def queue_position(key: str) -> int:
+    """Return the session's 1-based place in the queue (0 if not queued)."""
+    with _lock:
+        for position, waiter in enumerate(_waiting, 1):
+            if waiter == key:
+                return position
+    return 0
+
+
+def leave_queue(key: str) -> None:
+    with _lock:
+        _waiting.pop(key, None)
+
+
+def deep_size(obj, exclude=frozenset(), seen: set | None = None) -> int:
+    """
+    Return an estimate of the bytes reachable from obj through dicts, lists,
+    tuples and sets. Objects whose id is in exclude or seen are skipped;
+    counted objects are added to seen, so a shared seen set counts each
+    object once across calls.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or id(o) in exclude:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, collections.deque)):
+            stack.extend(o)
+    return total
+
+
+def session_sizes(exclude: set | None = None) -> dict:
+    """Return {session key: {"total": bytes, "keys": {state key: bytes}}} for every session."""
+    if exclude is None:
+        exclude = catalog.shared_object_ids() | upload_sandbox.shared_object_ids()
+    with _lock:
+        states = {key: entry["state"] for key, entry in _sessions.items()}
+    sizes = {}
+    for key, state in states.items():
+        per_key = {name: deep_size(value, exclude) for name, value in _items(state).items()}
+        sizes[key] = {"total": sum(per_key.values()), "keys": per_key}
+    return sizes
+
+
+def evict(state) -> None:
+    """Drop a session's exam and bank state, carrying its cumulative scores forward."""
+    results = _get(state, "results")
+    if results and results.get("category_breakdown"):
+        state["_persistent_scorecard"] = scoring.carry_forward(
+            results["category_breakdown"], results.get("category_rollups")
+        )
+        state["_evicted"] = True  # the setup page tells the user why their results are gone
+    for name in EXAM_KEYS + BANK_KEYS:
+        if name in state:
+            del state[name]
+
+
+def sweep(now: float | None = None) -> list:
+    """Evict idle sessions (see module docstring); return the evicted keys."""
+    global _last_sweep
+    if not _sweep_lock.acquire(blocking=False):
+        return []  # another rerun is already sweeping
+    try:
+        now = time.time() if now is None else now
+        _last_sweep = now
+        ttl = idle_ttl_seconds()
+        with _lock:
+            entries = list(_sessions.items())
+        expired = []
+        for key, entry in entries:
+            idle = now - entry["last_seen"]
+            if entry["exam"]:
+                # Keep an unfinished exam until its deadline has passed, in
+                # case the candidate's tab reconnects
+                state = entry["state"]
+                deadline = _get(state, "start_time", 0) + _get(state, "time_limit_seconds", 0)
+                if idle >= ttl and now >= deadline:
+                    expired.append(key)
+            elif idle >= ttl:
+                expired.append(key)
+
+        budget = memory_budget_bytes()
+        if budget is not None:
+            expired_set = set(expired)
+            sizes = session_sizes()
+            total = sum(size["total"] for key, size in sizes.items() if key not in expired_set)
+            idle_finished = sorted(
+                (entry["last_seen"], key)
+                for key, entry in entries
+                if key not in expired_set
+                and key in sizes
+                and not entry["exam"]
+                and now - entry["last_seen"] >= _BUDGET_MIN_IDLE_SECONDS
+            )
+            for _, key in idle_finished:
+                if total <= budget:
+                    break
+                expired.append(key)
+                total -= sizes[key]["total"]
+
+        for key in expired:
+            with _lock:
+                entry = _sessions.get(key)
+                if entry is None or entry["last_seen"] > now:
+                    continue  # reran while we were deciding
+                del _sessions[key]
+            evict(entry["state"])
+        return expired
+    finally:
+        _sweep_lock.release()
@@ -6,6 +6,21 @@ def shuffle_questions(questions: list, seed=None) -> list:
     return random.Random(seed).sample(questions, len(questions))
 
 
+def shuffle_case_study_groups(questions: list, seed=None) -> list:
+    """
+    Return a new list in randomized order that keeps questions sharing a
+    case study contiguous. Input is not mutated.
+    """
+    rng = random.Random(seed)
+    groups = {}
+    for q in questions:
+        groups.setdefault(q.get("case_study_id") or ("q", q["id"]), []).append(q)
+    ordered = []
+    for key in rng.sample(list(groups), len(groups)):
+        ordered.extend(rng.sample(groups[key], len(groups[key])))
+    return ordered
+
+
 def shuffle_options(question: dict, seed=None) -> tuple:
     """
     Shuffle a question's options for display.
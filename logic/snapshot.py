@@ -0,0 +1,184 @@
+"""logic/snapshot.py — Compact, versioned snapshots of a running exam.
+
+A snapshot records only what cannot be recomputed: question ids in order,
+the session seed, answers as original option ids, flags and the deadline.
+Shuffled options, points lookups and the live score are rebuilt from the
+banks on restore, so a snapshot of a 200-question mock is a few kilobytes
+and any replica with the same bank files can resume it.
+
+The candidate's review schedule and seen-question record do not change
+during an exam and can grow to thousands of rows, so they are kept out of
+the snapshot, which is saved on every answer. They go in a separate user
+record (build_user_record), saved once when the exam starts under
+user_record_id(session_id).
+
+Sessions on an uploaded bank are not snapshotted (the bank is not on disk).
+
+MUST NOT import streamlit.
+"""
+import data.cat as cat
+import data.catalog as catalog
+import data.review as review
+import data.seen as seen
+import logic.profiles as profiles
+import logic.scoring as scoring
+import logic.session_pool as session_pool
+
+SNAPSHOT_VERSION = 1
+_USER_RECORD_SUFFIX = "_user"
+
+
+def build_snapshot(state) -> dict:
+    """Return the snapshot of a running session from its session state mapping."""
+    cat_session = state.get("cat")
+    historical = state.get("historical_scorecard")
+    return {
+        "version": SNAPSHOT_VERSION,
+        "session_id": state["session_id"],
+        "user_name": state["user_name"],
+        "exam_profile": state["exam_profile"]["name"],
+        "banks": state["session_banks"],
+        "seed": state["session_seed"],
+        "question_ids": [q["id"] for q in state["questions"]],
+        "answers": {q_id: a["original_option_id"] for q_id, a in state["answers"].items()},
+        "flags": sorted(state["flags"]),
+        "deadline": state["start_time"] + state["time_limit_seconds"],
+        "time_extension_used": state["time_extension_used"],
+        "current_question_idx": state["current_question_idx"],
+        "practice_mode": state.get("practice_mode", False),
+        "historical": {
+            key: historical[key]
+            for key in ("category_summary", "category_rollups")
+            if key in historical
+        }
+        if historical
+        else None,
+        "cat": None
+        if cat_session is None
+        else {
+            "tag_ids": cat_session["tag_ids"],
+            "target": cat_session["target"],
+            "avoid_near_duplicates": cat_session["avoid_near_duplicates"],
+        },
+    }
+
+
+def user_record_id(session_id: str) -> str:
+    """Return the session store id of a session's user record."""
+    return session_id + _USER_RECORD_SUFFIX
+
+
+def build_user_record(state) -> dict | None:
+    """Return the review schedule and seen-question rows of a session, or None if it has neither."""
+    schedule = state.get("review_schedule")
+    seen_record = state.get("seen_questions")
+    if not schedule and not seen_record:
+        return None
+    return {
+        "version": SNAPSHOT_VERSION,
+        "review_schedule": review.to_rows(schedule) if schedule else None,
+        "seen_questions": seen.to_rows(seen_record) if seen_record else None,
+    }
+
+
+def restore_state(
+    snapshot: dict, tag_map: dict, bank_dir: str = catalog.BANK_DIR, user_record: dict | None = None
+) -> dict:
+    """
+    Return the session state keys of a snapshotted session, rebuilt from the
+    banks, plus the review schedule and seen questions of its user record.
+
+    Raises ValueError if the snapshot is from another version, is missing
+    fields or holds values of the wrong type, or its questions are no longer
+    in the banks.
+    """
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError("Unsupported session snapshot")
+    if user_record is not None and (
+        not isinstance(user_record, dict) or user_record.get("version") != SNAPSHOT_VERSION
+    ):
+        raise ValueError("Unsupported session user record")
+    try:
+        return _restore(snapshot, tag_map, bank_dir, user_record)
+    except KeyError as e:
+        raise ValueError(f"Session snapshot is missing '{e.args[0]}'") from None
+    except (TypeError, AttributeError) as e:
+        raise ValueError(f"Session snapshot is malformed ({e})") from None
+
+
+def _restore(snapshot: dict, tag_map: dict, bank_dir: str, user_record: dict | None) -> dict:
+    profile = profiles.get_profile(snapshot["exam_profile"])
+    paths = {catalog.bank_name_for(path): path for path in catalog.discover_banks(bank_dir)}
+    missing = [name for name in snapshot["banks"] if name not in paths]
+    if missing:
+        raise ValueError(f"Question bank no longer available: {', '.join(missing)}")
+    entries = catalog.load_banks([paths[name] for name in snapshot["banks"]])
+    by_id = {q["id"]: q for entry in entries.values() for q in entry["questions"]}
+    try:
+        questions = [by_id[q_id] for q_id in snapshot["question_ids"]]
+    except KeyError as e:
+        raise ValueError(f"Question {e.args[0]} is no longer in the bank") from None
+
+    prepared = session_pool.prepare_questions(questions, profile, tag_map, snapshot["seed"])
+    answers = {}
+    for q_id, option_id in snapshot["answers"].items():
+        opt = next(
+            (o for o in prepared["shuffled_options"].get(q_id, ()) if o["option_id"] == option_id),
+            None,
+        )
+        if opt is None:
+            raise ValueError(f"Question {q_id} has no option '{option_id}'")
+        answers[q_id] = {
+            "display_idx": opt["display_idx"],
+            "original_option_id": option_id,
+            "points": prepared["points_lookups"][q_id][option_id],
+        }
+        scoring.apply_live_answer(prepared["live_score"], q_id, answers[q_id]["points"])
+
+    cat_session = None
+    if snapshot["cat"] is not None:
+        cat_session = cat.resume_cat_session(
+            catalog.combined_bank([entries[name] for name in snapshot["banks"]]),
+            snapshot["cat"]["tag_ids"],
+            snapshot["cat"]["target"],
+            snapshot["cat"]["avoid_near_duplicates"],
+            snapshot["question_ids"],
+        )
+
+    # Snapshots saved before user records existed carry the rows themselves
+    user = user_record if user_record is not None else snapshot
+    time_limit_seconds = profile["time_limit_minutes"] * 60
+    return {
+        "session_id": snapshot["session_id"],
+        "session_banks": snapshot["banks"],
+        "session_seed": snapshot["seed"],
+        "user_name": snapshot["user_name"],
+        "exam_profile": profile,
+        "time_limit_seconds": time_limit_seconds,
+        "time_extension_used": snapshot["time_extension_used"],
+        "questions": prepared["questions"],
+        "shuffled_options": prepared["shuffled_options"],
+        "shuffle_maps": prepared["shuffle_maps"],
+        "points_lookups": prepared["points_lookups"],
+        "live_score": prepared["live_score"],
+        "practice_mode": snapshot["practice_mode"],
+        "historical_scorecard": snapshot["historical"],
+        "session_active": True,
+        "session_submitted": False,
+        "current_question_idx": min(snapshot["current_question_idx"], len(questions) - 1),
+        "answers": answers,
+        "flags": set(snapshot["flags"]),
+        "start_time": snapshot["deadline"] - time_limit_seconds,
+        "cat": cat_session,
+        "tag_map": tag_map,
+        **(
+            {"review_schedule": review.from_rows(user["review_schedule"])}
+            if user.get("review_schedule")
+            else {}
+        ),
+        **(
+            {"seen_questions": seen.from_rows(user["seen_questions"])}
+            if user.get("seen_questions")
+            else {}
+        ),
+    }
@@ -0,0 +1,109 @@
+"""logic/telemetry.py — Per-session interaction log and pacing summary.
+
+The quiz page records navigation, answer and flag events into a fixed-size
+ring buffer held in the session: a preallocated list and a write position.
+Recording an event is one store, the log never grows, and once it is full
+the oldest events are overwritten. Reruns that stay on the same question
+record nothing, so the one-second timer tick costs a single comparison.
+
+Timestamps come from time.monotonic(), so changes to the wall clock cannot
+distort them. They are only comparable within one process, so the log is
+not part of a session snapshot; a resumed exam starts a new log.
+
+At submit, summarize() replays the log into per-question dwell time (from
+viewing a question until the next one is viewed or the session ends),
+visits, answer changes and flag use.
+
+MUST NOT import streamlit.
+"""
+import time
+
+# Events kept per session; a 200-question exam typically records under 1,000.
+EVENT_CAPACITY = 2048
+
+VIEW = "view"
+ANSWER = "answer"
+FLAG = "flag"
+UNFLAG = "unflag"
+
+
+def new_log(capacity: int = EVENT_CAPACITY) -> dict:
+    """Return an empty log: {"events": [(t, kind, q_id) or None] * capacity, "next", "recorded", "viewing"}."""
+    return {"events": [None] * capacity, "next": 0, "recorded": 0, "viewing": None}
+
+
+def record(log: dict, kind: str, question_id, now: float | None = None) -> None:
+    """Append one event, overwriting the oldest once the log is full."""
+    events = log["events"]
+    events[log["next"]] = (time.monotonic() if now is None else now, kind, question_id)
+    log["next"] = (log["next"] + 1) % len(events)
+    log["recorded"] += 1
+
+
+def record_view(log: dict, question_id, now: float | None = None) -> None:
+    """Record that question_id is displayed, unless it already was (safe to call on every rerun)."""
+    if log["viewing"] != question_id:
+        log["viewing"] = question_id
+        record(log, VIEW, question_id, now)
+
+
+def events(log: dict) -> list:
+    """Return the retained events, oldest first."""
+    buffer, start = log["events"], log["next"]
+    if log["recorded"] < len(buffer):
+        return buffer[:start]
+    return buffer[start:] + buffer[:start]
+
+
+def summarize(log: dict, question_ids: list, now: float | None = None) -> dict:
+    """
+    Return the pacing summary of a session:
+
+        {"per_question": {q_id: {"dwell_seconds", "visits", "answer_changes",
+                                 "flag_changes", "revisited_after_flag"}},
+         "dropped_events": events overwritten because the log was full}
+
+    The first answer to a question is not a change; each later one is.
+    """
+    now = time.monotonic() if now is None else now
+    per_question = {
+        q_id: {
+            "dwell_seconds": 0.0,
+            "visits": 0,
+            "answer_changes": 0,
+            "flag_changes": 0,
+            "revisited_after_flag": False,
+        }
+        for q_id in question_ids
+    }
+    answered, flagged = set(), set()
+    viewing, since = None, None
+    for t, kind, q_id in events(log):
+        stats = per_question.get(q_id)
+        if stats is None:
+            continue
+        if kind == VIEW:
+            if viewing is not None:
+                per_question[viewing]["dwell_seconds"] += t - since
+            viewing, since = q_id, t
+            stats["visits"] += 1
+            if q_id in flagged:
+                stats["revisited_after_flag"] = True
+        elif kind == ANSWER:
+            if q_id in answered:
+                stats["answer_changes"] += 1
+            answered.add(q_id)
+        else:
+            stats["flag_changes"] += 1
+            if kind == FLAG:
+                flagged.add(q_id)
+            else:
+                flagged.discard(q_id)
+    if viewing is not None:
+        per_question[viewing]["dwell_seconds"] += now - since
+    for stats in per_question.values():
+        stats["dwell_seconds"] = round(stats["dwell_seconds"], 1)
+    return {
+        "per_question": per_question,
+        "dropped_events": max(0, log["recorded"] - len(log["events"])),
+    }
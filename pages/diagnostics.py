@@ -0,0 +1,132 @@
+"""pages/diagnostics.py — Admin-only memory diagnostics.
+
+Registered in app.py only when QUIZLIT_ADMIN_TOKEN is set. Every measurement
+runs when its button is pressed, so the page costs nothing until used.
+"""
+import hmac
+
+import pandas as pd
+import streamlit as st
+
+import logic.diagnostics as diagnostics
+
+st.title("Diagnostics")
+st.page_link("pages/setup.py", label="Back to Session Setup", icon="⬅️")
+
+# ---------------------------------------------------------------------------
+# Admin guard
+# ---------------------------------------------------------------------------
+token = diagnostics.admin_token()
+if token is None:
+    st.error("Diagnostics are disabled. Set QUIZLIT_ADMIN_TOKEN to enable them.")
+    st.stop()
+if not st.session_state.get("_diagnostics_admin"):
+    entered = st.text_input("Admin token", type="password", key="diagnostics_token")
+    if entered and hmac.compare_digest(entered.encode(), token.encode()):
+        st.session_state._diagnostics_admin = True
+        st.rerun()
+    if entered:
+        st.error("Wrong token.")
+    st.stop()
+
+# ---------------------------------------------------------------------------
+# Per-session state sizes
+# ---------------------------------------------------------------------------
+st.subheader("Sessions")
+st.caption(
+    "Estimated bytes held by each browser session's state. Banks and the tag map "
+    "are shared by every session and are counted under Caches instead."
+)
+if st.button("Measure sessions", key="measure_sessions_btn"):
+    sessions = diagnostics.session_report()
+    st.metric("Sessions", len(sessions))
+    if sessions:
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Session": row["session"][:8],
+                        "Idle (s)": row["idle_seconds"],
+                        "Exam running": row["exam_running"],
+                        "Total (KB)": round(row["total_bytes"] / 1024, 1),
+                        **{f"{key} (KB)": round(size / 1024, 1) for key, size in row["keys"].items()},
+                    }
+                    for row in sessions
+                ]
+            ).fillna(0),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+st.divider()
+
+# ---------------------------------------------------------------------------
+# Process-wide caches
+# ---------------------------------------------------------------------------
+st.subheader("Caches")
+measure_bytes = st.checkbox(
+    "Also measure cache sizes (walks every cached question; slow on very large banks)",
+    key="measure_cache_bytes",
+)
+if st.button("Read cache statistics", key="cache_stats_btn"):
+    caches = diagnostics.cache_report(measure_bytes)
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Cache": row["cache"],
+                    "Entries": row["entries"],
+                    "Hits": row["hits"],
+                    "Misses": row["misses"],
+                    "Hit rate": row["hit_rate"],
+                    "Size (KB)": None if row["bytes"] is None else round(row["bytes"] / 1024, 1),
+                }
+                for row in caches
+            ]
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+st.divider()
+
+# ---------------------------------------------------------------------------
+# Allocation tracing
+# ---------------------------------------------------------------------------
+st.subheader("Top allocators")
+st.caption(
+    "tracemalloc slows every allocation while it runs. Start it, take a baseline, "
+    "let traffic run, then take another snapshot to see what grew."
+)
+snapshots = st.session_state.setdefault("_diagnostics_snapshots", [])
+start_col, snap_col, stop_col = st.columns(3)
+with start_col:
+    if st.button("Start tracing", disabled=diagnostics.is_tracing(), use_container_width=True):
+        diagnostics.start_tracing()
+        snapshots.clear()
+        st.rerun()
+with snap_col:
+    if st.button("Take snapshot", disabled=not diagnostics.is_tracing(), use_container_width=True):
+        snapshots[:] = (snapshots + [diagnostics.take_snapshot()])[-2:]  # previous and latest
+with stop_col:
+    if st.button("Stop tracing", disabled=not diagnostics.is_tracing(), use_container_width=True):
+        diagnostics.stop_tracing()
+        snapshots.clear()
+        st.rerun()
+
+if diagnostics.is_tracing():
+    st.caption(f"Tracing. Snapshots taken: {len(snapshots)} of 2.")
+if snapshots:
+    st.markdown("**Largest allocation sites (latest snapshot)**")
+    st.dataframe(
+        pd.DataFrame(diagnostics.top_allocations(snapshots[-1])),
+        hide_index=True,
+        use_container_width=True,
+    )
+if len(snapshots) == 2:
+    st.markdown("**Growth since the previous snapshot**")
+    st.dataframe(
+        pd.DataFrame(diagnostics.compare_snapshots(snapshots[0], snapshots[1])),
+        hide_index=True,
+        use_container_width=True,
+    )
@@ -1,10 +1,22 @@
 """pages/quiz.py — Exam Mode Session orchestrator (T020 + T021)."""
+import sqlite3
 import time
 
 import streamlit as st
 
-import data.tag_resolver as tag_resolver
+import data.cat as cat
+import data.history as history
+import data.item_stats as item_stats
+import data.review as review
+import data.seen as seen
+import data.session_store as session_store
+import logic.profiles as profiles
 import logic.scoring as scoring
+import logic.session_pool as session_pool
+import logic.shuffler as shuffler
+import logic.snapshot as snapshot
+import logic.telemetry as telemetry
+from components.feedback import render_answer_feedback, render_live_score
 from components.navigator import render_navigator
 from components.question_card import render_question_card
 from components.timer import render_timer
@@ -39,11 +51,46 @@ points_lookups = st.session_state.points_lookups
 time_limit_seconds = st.session_state.time_limit_seconds
 tag_map = st.session_state.tag_map
 
+# Adaptive tests grow the question list one question at a time up to the
+# profile's count; every other mode has all questions from the start.
+cat_session = st.session_state.get("cat")
+question_count = cat_session["target"] if cat_session else len(questions)
+
 current_idx = st.session_state.current_question_idx
 current_q = questions[current_idx]
 q_id = current_q["id"]
 opts = shuffled_options[q_id]
 
+# Pacing telemetry: records only when the displayed question changes, so the
+# timer's reruns cost one comparison. A resumed exam starts a new log.
+telemetry_log = st.session_state.setdefault("telemetry", telemetry.new_log())
+telemetry.record_view(telemetry_log, q_id)
+
+
+def _administer_next() -> None:
+    """Adaptive test: pick the next question from the answers so far and add it."""
+    q = cat.next_question(cat_session, questions, st.session_state.answers)
+    opts, smap = shuffler.shuffle_options(
+        q, session_pool.option_seed(st.session_state.session_seed, q["id"])
+    )
+    questions.append(q)
+    shuffled_options[q["id"]] = opts
+    shuffle_maps[q["id"]] = smap
+    points_lookups[q["id"]] = scoring.build_points_lookup(
+        q["scoring"], st.session_state.exam_profile["points_scheme"]
+    )
+    scoring.add_live_question(st.session_state.live_score, q, st.session_state.tag_map)
+
+
+def _save_snapshot() -> None:
+    """Queue this session's snapshot (coalesced; see data/session_store.py)."""
+    store = session_store.configured_store()
+    if store is not None and st.session_state.get("session_id"):
+        session_store.save_snapshot(
+            store, st.session_state.session_id, snapshot.build_snapshot(st.session_state)
+        )
+        st.session_state._snapshot_start_time = st.session_state.start_time
+
 
 # ---------------------------------------------------------------------------
 # T021: _submit_session() — compute scores and store results
@@ -51,47 +98,51 @@ opts = shuffled_options[q_id]
 def _submit_session() -> None:
     """Finalise the session: compute all scores and store results in session state."""
     qs = st.session_state.questions
-    pl = st.session_state.points_lookups
-    sm = st.session_state.shuffle_maps
     ans = st.session_state.answers
-    tm = st.session_state.tag_map
+    profile = st.session_state.exam_profile
+    max_points = profiles.max_points_per_question(profile)
 
-    total_score = scoring.score_session(qs, pl, sm, ans)
-    passed = scoring.is_passing(total_score)
-    breakdown = scoring.compute_category_breakdown(qs, pl, sm, ans, tm)
-    category_breakdown = scoring.merge_historical(
-        breakdown, st.session_state.get("historical_scorecard")
+    # Totals were kept up to date as answers were committed (see top of page)
+    st.session_state.results = scoring.build_results(
+        qs,
+        ans,
+        st.session_state.points_lookups,
+        profile,
+        st.session_state.tag_map,
+        st.session_state.live_score,
+        st.session_state.get("historical_scorecard"),
+        st.session_state.user_name,
     )
-
-    per_question = []
-    for q in qs:
-        qid = q["id"]
-        tier_lookup = scoring.build_tier_lookup(q["scoring"])
-        tag_names = tag_resolver.get_tag_names_for_question(q, tm)
-        per_question.append(
-            {
-                "question_id": qid,
-                "scenario": q["scenario"],
-                "question": q["question"],
-                "selected_option_id": ans[qid]["original_option_id"] if qid in ans else None,
-                "points_earned": ans[qid]["points"] if qid in ans else 0,
-                "points_lookup": pl[qid],
-                "tier_for_option": tier_lookup,
-                "rationale": q["rationale"],
-                "tag_names": tag_names,
-                "primary_category": tag_names[0] if tag_names else "",
-            }
+    per_question = st.session_state.results["per_question"]
+    st.session_state.results["pacing"] = telemetry.summarize(telemetry_log, [q["id"] for q in qs])
+    # Spaced repetition: reschedule every question of this session
+    schedule = st.session_state.setdefault("review_schedule", review.new_schedule())
+    review.record_session(schedule, per_question, max_points)
+    st.session_state.results["review_schedule"] = review.to_rows(schedule)
+    # No-repeat draws: this session becomes the newest generation of the record
+    seen_record = st.session_state.setdefault("seen_questions", seen.new_record())
+    seen.record_session(seen_record, qs)
+    st.session_state.results["seen_questions"] = seen.to_rows(seen_record)
+    if cat_session:
+        theta, se = cat.current_ability(cat_session, qs, ans)
+        st.session_state.results["ability"] = {"theta": theta, "standard_error": se}
+    if item_stats.event_log_path():
+        # Queued for the background writer; never blocks the submit
+        item_stats.log_events(
+            item_stats.event_log_path(), item_stats.build_events(st.session_state.results)
         )
-
-    st.session_state.results = {
-        "total_score": total_score,
-        "max_score": 40,
-        "pass_mark": scoring.PASS_MARK,
-        "passed": passed,
-        "per_question": per_question,
-        "category_breakdown": category_breakdown,
-        "user_name": st.session_state.user_name,
-    }
+    if history.history_db_path() and st.session_state.results["user_name"]:
+        try:
+            history.record_attempt(
+                history.connect(history.history_db_path()), st.session_state.results
+            )
+        except sqlite3.Error as e:
+            # Never lose the submission over the history store; results page reports it
+            st.session_state.results["history_error"] = str(e)
+    store = session_store.configured_store()
+    if store is not None and st.session_state.get("session_id"):
+        session_store.delete_snapshot(store, st.session_state.session_id)
+        session_store.delete_snapshot(store, snapshot.user_record_id(st.session_state.session_id))
     st.session_state.session_submitted = True
     st.session_state.session_active = False
 
@@ -116,6 +167,9 @@ if selected_text is not None:
             }
             if st.session_state.answers.get(q_id) != new_answer:
                 st.session_state.answers[q_id] = new_answer
+                scoring.apply_live_answer(st.session_state.live_score, q_id, new_answer["points"])
+                telemetry.record(telemetry_log, telemetry.ANSWER, q_id)
+                _save_snapshot()
             break
 
 # ---------------------------------------------------------------------------
@@ -129,6 +183,14 @@ if timer_expired:
     _submit_session()
     st.switch_page("pages/results.py")
     st.stop()
+# The time extension moves start_time; keep the snapshot's deadline in step
+if st.session_state.get("session_id") and st.session_state.get("_snapshot_start_time") != st.session_state.start_time:
+    _save_snapshot()
+
+# Practice mode: running score and category bars
+if st.session_state.get("practice_mode"):
+    render_live_score(st.session_state.live_score)
+    st.sidebar.divider()
 
 # (3) Navigator
 st.sidebar.subheader("Questions")
@@ -140,13 +202,14 @@ nav_click = render_navigator(
 )
 if nav_click is not None and nav_click != current_idx:
     st.session_state.current_question_idx = nav_click
+    _save_snapshot()
     st.rerun()
 
 st.sidebar.divider()
 
 # Submit button
 answered_count = len(st.session_state.answers)
-st.sidebar.caption(f"Answered: {answered_count} / {len(questions)}")
+st.sidebar.caption(f"Answered: {answered_count} / {question_count}")
 if st.sidebar.button(
     "Submit Session",
     type="primary",
@@ -173,20 +236,28 @@ with main:
             st.session_state.flags.discard(q_id)
         else:
             st.session_state.flags.add(q_id)
+        telemetry.record(telemetry_log, telemetry.UNFLAG if is_flagged else telemetry.FLAG, q_id)
+        _save_snapshot()
         st.rerun()
 
     st.divider()
 
     # (5) Question card
-    render_question_card(
-        current_q,
-        opts,
-        st.session_state.answers.get(q_id),
-    )
+    practice_mode = st.session_state.get("practice_mode", False)
+    answer = st.session_state.answers.get(q_id)
+    render_question_card(current_q, opts, answer, locked=practice_mode and answer is not None)
+    if practice_mode and answer is not None:
+        render_answer_feedback(current_q, answer, points_lookups[q_id])
 
     # (6) Previous / Next / Submit navigation buttons
     st.divider()
-    is_last = current_idx == len(questions) - 1
+    is_last = current_idx == question_count - 1
+    # Adaptive tests: the next question depends on this answer
+    needs_answer = (
+        cat_session is not None
+        and current_idx == len(questions) - 1
+        and q_id not in st.session_state.answers
+    )
     prev_col, next_col = st.columns(2)
     with prev_col:
         prev_clicked = st.button("← Previous", disabled=current_idx == 0, use_container_width=True, key="prev_btn")
@@ -194,13 +265,21 @@ with main:
         if is_last:
             inline_submit = st.button("Submit Session", type="primary", use_container_width=True, key="inline_submit_btn")
         else:
-            next_clicked = st.button("Next →", use_container_width=True, key="next_btn")
+            next_clicked = st.button("Next →", disabled=needs_answer, use_container_width=True, key="next_btn")
 
 if prev_clicked:
     st.session_state.current_question_idx = current_idx - 1
+    _save_snapshot()
     st.rerun()
 if not is_last and next_clicked:
+    if current_idx == len(questions) - 1:
+        try:
+            _administer_next()
+        except ValueError as e:
+            st.error(f"{e}. Submit the session to see your results.")
+            st.stop()
     st.session_state.current_question_idx = current_idx + 1
+    _save_snapshot()
     st.rerun()
 if is_last and inline_submit:
     _submit_session()
@@ -219,13 +298,14 @@ st.rerun()
 #   logic/ and data/ modules imported above contain NO "import streamlit"
 #   statements. Verified by grep in Phase 8 (exit code 1 = no matches).
 # Principle 2 — Deterministic scoring invariant:
-#   Answers committed at top of render (before any widget) ensure
-#   score_session() always operates on the latest user selection,
-#   even when timer fires mid-render.
+#   Answers committed at top of render (before any widget) update the live
+#   score in the same step, so _submit_session() always reads totals for the
+#   latest user selection, even when timer fires mid-render.
 # Principle 3 — Answers committed before navigation:
 #   st.session_state.answers[q_id] is written at the top of this page
 #   before any call to st.switch_page() or st.rerun().
 # Principle 4 — Pass mark single source of truth:
-#   scoring.PASS_MARK = 24 is defined once in logic/scoring.py.
-#   Both this page and logic/exporter.py reference that constant.
+#   The session's exam profile (logic/profiles.py) defines question count,
+#   time limit, pass mark and points. _submit_session() records those numbers
+#   in results; the results page and logic/exporter.py read them from there.
 # ---------------------------------------------------------------------------
@@ -5,7 +5,10 @@ import pandas as pd
 import streamlit as st
 
 from components.category_chart import render_category_chart, render_strength_weakness_charts
+from data.tag_resolver import LEVEL_LABELS, LEVELS
 import logic.exporter as exporter
+import logic.scoring as scoring
+import logic.session_registry as session_registry
 
 # ---------------------------------------------------------------------------
 # Session guard (T023)
@@ -40,7 +43,18 @@ with col_verdict:
         st.success("✅ PASS")
     else:
         st.error("❌ FAIL")
-    st.caption(f"Pass mark: {results['pass_mark']}/{results['max_score']} (60%)")
+    st.caption(
+        f"Pass mark: {results['pass_mark']}/{results['max_score']} ({results['pass_pct']}%)"
+    )
+
+if results.get("ability"):
+    st.caption(
+        f"Adaptive test ability estimate: {results['ability']['theta']:+.2f} "
+        f"(± {results['ability']['standard_error']:.2f}) on the logit scale"
+    )
+
+if results.get("history_error"):
+    st.warning(f"This attempt could not be saved to your history: {results['history_error']}")
 
 st.divider()
 
@@ -51,16 +65,24 @@ st.header("Question Review")
 
 # Build option-text lookup from the drawn questions still in session state
 q_lookup = {q["id"]: q for q in st.session_state.questions}
+# Dwell time and answer changes (see logic/telemetry.py); absent for API sessions
+pacing = results.get("pacing", {}).get("per_question", {})
 
 for i, pq in enumerate(results["per_question"]):
     expander_label = f"Question {i + 1} — {pq['primary_category']}"
     with st.expander(expander_label, expanded=False):
         # Scenario
-        if pq["scenario"]:
-            st.info(pq["scenario"])
+        if pq["case_study_id"] is not None:
+            st.info(results["case_studies"][pq["case_study_id"]])
 
         # Question text
         st.write(pq["question"])
+        if pq["question_id"] in pacing:
+            p = pacing[pq["question_id"]]
+            st.caption(
+                f"Time on question: {p['dwell_seconds']:.0f} s · visits: {p['visits']} · "
+                f"answer changes: {p['answer_changes']}"
+            )
         st.write("")
 
         if pq["selected_option_id"] is not None:
@@ -101,17 +123,66 @@ for i, pq in enumerate(results["per_question"]):
 
 st.divider()
 
+# ---------------------------------------------------------------------------
+# Pacing: time per question against the exam's average allowance
+# ---------------------------------------------------------------------------
+if pacing:
+    st.header("Pacing")
+    n_questions = len(results["per_question"])
+    allowance = results["time_limit_minutes"] * 60 / n_questions
+    total_dwell = sum(p["dwell_seconds"] for p in pacing.values())
+    col_time, col_avg, col_changes = st.columns(3)
+    col_time.metric("Time on questions", f"{total_dwell / 60:.1f} min")
+    col_avg.metric(
+        "Average per question",
+        f"{total_dwell / n_questions:.0f} s",
+        delta=f"{total_dwell / n_questions - allowance:+.0f} s vs {allowance:.0f} s allowance",
+        delta_color="inverse",
+    )
+    col_changes.metric("Answers changed", sum(p["answer_changes"] for p in pacing.values()))
+    flagged = [p for p in pacing.values() if p["flag_changes"]]
+    if flagged:
+        revisited = sum(1 for p in flagged if p["revisited_after_flag"])
+        st.caption(f"You flagged {len(flagged)} question(s) and went back to {revisited} of them.")
+    pacing_rows = [
+        {
+            "Question": i + 1,
+            "Category": pq["primary_category"],
+            "Seconds": pacing[pq["question_id"]]["dwell_seconds"],
+            "Visits": pacing[pq["question_id"]]["visits"],
+            "Answer changes": pacing[pq["question_id"]]["answer_changes"],
+            "Points": pq["points_earned"],
+        }
+        for i, pq in enumerate(results["per_question"])
+        if pq["question_id"] in pacing
+    ]
+    st.dataframe(
+        pd.DataFrame(pacing_rows).set_index("Question").sort_values("Seconds", ascending=False),
+        use_container_width=True,
+    )
+    st.divider()
+
 # ---------------------------------------------------------------------------
 # T025: Category breakdown chart + summary table
 # ---------------------------------------------------------------------------
 st.header("Category Breakdown")
 
-render_category_chart(results["category_breakdown"])
+# Topic tags roll up to their category and category group (togaf_tags_db.csv)
+level = st.radio(
+    "Group by",
+    options=[lv for lv in LEVELS if scoring.breakdown_at_level(results, lv)],
+    format_func=LEVEL_LABELS.get,
+    horizontal=True,
+    key="breakdown_level_input",
+)
+level_breakdown = scoring.breakdown_at_level(results, level) if level else {}
 
-if results["category_breakdown"]:
+render_category_chart(level_breakdown, results["pass_pct"])
+
+if level_breakdown:
     table_rows = []
-    for cat in sorted(results["category_breakdown"].keys()):
-        data = results["category_breakdown"][cat]
+    for cat in sorted(level_breakdown.keys()):
+        data = level_breakdown[cat]
         s_pct = (
             round(data["session_points"] / data["session_max"] * 100, 1)
             if data["session_max"] > 0
@@ -124,7 +195,7 @@ if results["category_breakdown"]:
         )
         table_rows.append(
             {
-                "Category": cat,
+                LEVEL_LABELS[level]: cat,
                 "Session Pts / Max": f"{data['session_points']} / {data['session_max']}",
                 "Session %": s_pct,
                 "Cumulative Pts / Max": (
@@ -134,35 +205,21 @@ if results["category_breakdown"]:
             }
         )
     st.dataframe(
-        pd.DataFrame(table_rows).set_index("Category"),
+        pd.DataFrame(table_rows).set_index(LEVEL_LABELS[level]),
         use_container_width=True,
     )
 
-if results["category_breakdown"]:
+if level_breakdown:
     st.subheader("Strengths & Weaknesses")
     st.caption("Based on cumulative scores across all sessions. Bigger slice = larger gap to perfect (weaknesses) or stronger performance (strengths). Up to 10 categories shown per chart.")
-    render_strength_weakness_charts(results["category_breakdown"])
+    render_strength_weakness_charts(level_breakdown)
 
 st.divider()
 
 # ---------------------------------------------------------------------------
 # T025: Start New Session button — clears all quiz state
 # ---------------------------------------------------------------------------
-_KEYS_TO_CLEAR = [
-    "session_active",
-    "session_submitted",
-    "questions",
-    "shuffled_options",
-    "shuffle_maps",
-    "points_lookups",
-    "answers",
-    "flags",
-    "current_question_idx",
-    "start_time",
-    "time_extension_used",
-    "results",
-    "historical_scorecard",
-]
+_KEYS_TO_CLEAR = session_registry.EXAM_KEYS
 
 # ---------------------------------------------------------------------------
 # T034: Scorecard download
@@ -187,15 +244,9 @@ st.divider()
 if st.button("▶ Start New Session", type="primary", use_container_width=True):
     # Snapshot cumulative scores so the next session carries them forward automatically
     if results.get("category_breakdown"):
-        st.session_state._persistent_scorecard = {
-            "category_summary": {
-                cat: {
-                    "cumulative_points": data["cumulative_points"],
-                    "cumulative_max": data["cumulative_max"],
-                }
-                for cat, data in results["category_breakdown"].items()
-            }
-        }
+        st.session_state._persistent_scorecard = scoring.carry_forward(
+            results["category_breakdown"], results.get("category_rollups")
+        )
     for key in _KEYS_TO_CLEAR:
         st.session_state.pop(key, None)
     st.switch_page("pages/setup.py")
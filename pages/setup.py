@@ -1,14 +1,29 @@
 """pages/setup.py — Session Setup & Launch (User Story 1)"""
 import os
+import secrets
+import sqlite3
 import time
 
 import streamlit as st
 
+import data.cat as cat
+import data.catalog as catalog
+import data.dedupe as dedupe
+import data.forms as forms
+import data.history as history
 import data.loader as loader
+import data.review as review
+import data.sampler as sampler
+import data.seen as seen
+import data.session_store as session_store
 import data.tag_resolver as tag_resolver
+import data.upload_sandbox as upload_sandbox
 import logic.importer as importer
-import logic.shuffler as shuffler
-import logic.scoring as scoring
+import logic.profiles as profiles
+import logic.session_pool as session_pool
+import logic.session_registry as session_registry
+import logic.snapshot as snapshot
+import logic.telemetry as telemetry
 
 # ---------------------------------------------------------------------------
 # Session guards
@@ -18,7 +33,7 @@ if st.session_state.get("session_submitted"):
     st.stop()
 
 if st.session_state.get("session_active"):
-    st.switch_page("pages/quiz.py")
+    st.switch_page("pages/quiz.py", query_params=st.query_params.to_dict())
     st.stop()
 
 st.markdown(
@@ -45,19 +60,30 @@ st.markdown("""
 """)
 
 st.info('The project is still in its very early stages, so you may notice a few hiccups.', icon="ℹ️")
+st.page_link("pages/study.py", label="Study the question bank without a timer", icon="📚")
 
 st.divider()
 
 # ---------------------------------------------------------------------------
-# Auto-load tag map on first page load
+# Tag map and bank hot reload — edits to bank/ or the tag CSV are picked up
+# by a background watcher; this page (never shown during an exam) refreshes
+# its snapshot on every render, so running sessions are unaffected.
 # ---------------------------------------------------------------------------
-if "tag_map" not in st.session_state:
-    try:
-        with open("togaf_tags_db.csv", "rb") as _f:
-            st.session_state.tag_map = tag_resolver.load_tags(_f)
-    except Exception as e:
+catalog.start_watcher()
+try:
+    st.session_state.tag_map = catalog.load_tag_map()
+except Exception as e:
+    if "tag_map" not in st.session_state:
         st.error(f"Failed to load tag reference: {e}")
         st.stop()
+    st.warning(f"Tag reference could not be reloaded, keeping the previous version: {e}")
+
+if st.session_state.pop("_evicted", False):
+    st.info(
+        "Your last results were cleared after a period of inactivity. "
+        "Your cumulative scores were kept for your next session.",
+        icon="ℹ️",
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -81,47 +107,87 @@ with col1:
     # ---------------------------------------------------------------------------
     st.subheader("Question Bank")
 
-    bank_files = sorted(f for f in os.listdir("bank") if f.endswith(".json"))
-    selected_bank = bank_files[0] if bank_files else None
+    bank_paths = catalog.discover_banks()
+    bank_names = {catalog.bank_name_for(path): path for path in bank_paths}
+    selected_bank_names = list(bank_names)
+    if len(bank_names) > 1:
+        selected_bank_names = st.multiselect(
+            "Question banks",
+            options=list(bank_names),
+            default=list(bank_names),
+            key="banks_input",
+        )
 
-    uploaded_bank = None  # hidden — uncomment below to re-enable
-    # uploaded_bank = st.file_uploader(
-    #     "Or upload a custom question bank (.json)",
-    #     type=["json"],
-    #     key="bank_upload",
-    # )
+    uploaded_bank = st.file_uploader(
+        "Or upload a custom question bank (.json or .jsonl)",
+        type=["json", "jsonl"],
+        key="bank_upload",
+        max_upload_size=upload_sandbox.max_upload_mb(),
+    )
 
-    # Determine current bank source key (uploaded file takes precedence)
+    # Determine current bank source key (uploaded file takes precedence).
+    # Uploads are keyed by content, so the same file is validated only once.
+    upload_pending = False
     if uploaded_bank is not None:
-        bank_source_key = f"upload:{uploaded_bank.name}:{uploaded_bank.size}"
-    elif selected_bank is not None:
-        bank_source_key = f"select:{selected_bank}"
+        upload_data = uploaded_bank.getvalue()
+        bank_source_key = "upload:" + upload_sandbox.upload_key(
+            upload_data, loader.is_json_lines(uploaded_bank.name)
+        )
+    elif selected_bank_names:
+        bank_source_key = "select:" + ",".join(selected_bank_names)
     else:
         bank_source_key = None
 
     prev_bank_source_key = st.session_state.get("_bank_source_key")
 
-    # Reload when bank source changes (includes the very first page load)
-    if bank_source_key is not None and bank_source_key != prev_bank_source_key:
+    # Look up on every render: cached banks cost one stat() each, and the
+    # combined bank is shared by every session selecting the same versions.
+    if bank_source_key is not None:
         try:
             if uploaded_bank is not None:
-                questions = loader.load_question_bank(uploaded_bank)
+                if bank_source_key != prev_bank_source_key:
+                    # Parsed and validated in a separate, resource-limited
+                    # process; this rerun only polls it (see data/upload_sandbox.py)
+                    job = upload_sandbox.validate_upload(
+                        upload_data, loader.is_json_lines(uploaded_bank.name)
+                    )
+                    if job["state"] == "failed":
+                        raise ValueError(job["error"])
+                    if job["state"] != "done":
+                        upload_pending = True
+                        st.progress(job["progress"], text=f"{job['stage']}…")
+                    else:
+                        st.session_state._combined_bank = catalog.combined_bank([job["entry"]])
             else:
-                with open(os.path.join("bank", selected_bank), "rb") as _f:
-                    questions = loader.load_question_bank(_f)
-
-            st.session_state.question_bank = questions
-            st.session_state._bank_source_key = bank_source_key
-            st.session_state._bank_tag_names = tag_resolver.get_all_tag_names(
-                questions, st.session_state.tag_map
-            )
-            # Clear category selection whenever the bank changes
-            if "categories_input" in st.session_state:
-                del st.session_state["categories_input"]
+                entries = catalog.load_banks([bank_names[name] for name in selected_bank_names])
+                st.session_state._combined_bank = catalog.combined_bank(list(entries.values()))
+
+            if bank_source_key != prev_bank_source_key and not upload_pending:
+                st.session_state._bank_source_key = bank_source_key
+                # Clear category selection whenever the bank selection changes
+                if "categories_input" in st.session_state:
+                    del st.session_state["categories_input"]
+            combined = st.session_state.get("_combined_bank")
+            if combined is not None:
+                # References into the shared combined bank, not copies
+                st.session_state.question_bank = combined["questions"]
+                st.session_state._bank_tag_index = combined["tag_index"]
+                st.session_state._bank_near_duplicates = combined["near_duplicates"]
+                st.session_state._bank_tag_names = sorted(
+                    {
+                        st.session_state.tag_map[tag_id]["name"]
+                        for tag_id in combined["tag_index"]
+                        if tag_id in st.session_state.tag_map
+                    }
+                )
 
         except ValueError as e:
             st.error(str(e))
             # Leave previously loaded question_bank in place (do not clear it)
+    else:
+        st.session_state.pop("_combined_bank", None)
+        st.session_state.pop("question_bank", None)
+        st.session_state.pop("_bank_source_key", None)
 
     if "question_bank" in st.session_state:
         # st.success(f"✓ {len(st.session_state.question_bank)} questions loaded.")  # hidden
@@ -142,10 +208,29 @@ with col2:
     if uploaded_scorecard is not None:
         try:
             st.session_state.historical_scorecard = importer.load_scorecard(uploaded_scorecard)
+            if "review_schedule" in st.session_state.historical_scorecard:
+                st.session_state.review_schedule = st.session_state.historical_scorecard[
+                    "review_schedule"
+                ]
+            if "seen_questions" in st.session_state.historical_scorecard:
+                st.session_state.seen_questions = st.session_state.historical_scorecard[
+                    "seen_questions"
+                ]
             st.success("✓ Scorecard loaded. Cumulative scores will be carried forward.")
         except ValueError as e:
             st.error(str(e))
             st.session_state.historical_scorecard = None
+    elif history.history_db_path() and user_name.strip():
+        # Self-hosted deployments: cumulative scores come from the history store
+        try:
+            st.session_state.historical_scorecard = history.load_history(
+                history.connect(history.history_db_path()), user_name.strip()
+            )
+        except sqlite3.Error as e:
+            st.error(f"Attempt history is unavailable: {e}")
+            st.session_state.historical_scorecard = None
+        if st.session_state.historical_scorecard:
+            st.success("✓ Cumulative scores loaded from your attempt history.")
     else:
         # Fall back to cumulative scores carried forward from the previous session
         st.session_state.historical_scorecard = st.session_state.get("_persistent_scorecard")
@@ -165,6 +250,86 @@ selected_categories = st.multiselect(
     placeholder="Load a question bank first" if not available_tags else "Choose categories…",
 )
 
+# ---------------------------------------------------------------------------
+# Exam profile: question count, time limit, pass mark, points scheme
+# ---------------------------------------------------------------------------
+st.divider()
+st.subheader("Exam Format")
+profile_name = st.selectbox(
+    "Exam format",
+    options=list(profiles.EXAM_PROFILES),
+    index=list(profiles.EXAM_PROFILES).index(profiles.DEFAULT_PROFILE),
+    format_func=lambda name: profiles.EXAM_PROFILES[name]["label"],
+    key="exam_profile_input",
+    label_visibility="collapsed",
+)
+profile = profiles.get_profile(profile_name)
+st.caption(
+    f"Pass mark: {profiles.pass_mark(profile)} / {profiles.max_score(profile)} "
+    f"({profile['pass_pct']}%)"
+)
+
+_DRAW_MODES = {
+    "random": "Random",
+    "adaptive": "Adaptive — focus on my weakest categories",
+    "blueprint": "Blueprint — match syllabus weights",
+    "case_study": "Case studies — questions sharing a scenario together",
+    "cat": "Computer-adaptive — each question matched to your current ability",
+    "review": "Spaced review — questions due for another look first",
+    "unseen": "Unseen first — questions you have not had yet, then those seen longest ago",
+}
+draw_mode = st.radio(
+    "Question draw",
+    options=list(_DRAW_MODES),
+    format_func=_DRAW_MODES.get,
+    key="draw_mode_input",
+    horizontal=True,
+)
+if draw_mode == "adaptive" and not st.session_state.get("historical_scorecard"):
+    st.caption(
+        "No score history yet — adaptive draws spread evenly across categories "
+        "until a session is completed or a scorecard is uploaded."
+    )
+
+if draw_mode == "review":
+    review_schedule = st.session_state.get("review_schedule") or review.new_schedule()
+    st.caption(
+        f"{review.due_count(review_schedule)} questions due for review. Due questions are "
+        "drawn first, most overdue first; the rest of the session is drawn at random."
+    )
+
+if draw_mode == "unseen":
+    st.caption(
+        f"You have seen {seen.seen_count(st.session_state.get('seen_questions'))} questions "
+        "so far. Upload your last scorecard to carry this across browser sessions."
+    )
+
+practice_mode = st.checkbox(
+    "Practice mode — show points and rationale right after each answer",
+    value=False,
+    key="practice_mode_input",
+)
+
+avoid_near_duplicates = st.checkbox(
+    "Avoid near-duplicate questions in the same session",
+    value=True,
+    key="avoid_near_duplicates_input",
+)
+
+# Proctored sittings: a pre-generated exam form replaces the random draw
+forms_manifest_path = (
+    os.path.join(forms.FORMS_DIR, os.path.basename(bank_names[selected_bank_names[0]]))
+    if uploaded_bank is None and len(selected_bank_names) == 1
+    else None
+)
+form_id = ""
+if forms_manifest_path is not None and os.path.exists(forms_manifest_path):
+    form_id = st.text_input(
+        "Exam form id (proctored sittings only)",
+        placeholder="e.g. F001 — leave blank for a random draw",
+        key="form_id_input",
+    ).strip()
+
 # ---------------------------------------------------------------------------
 # T014: Start Session button (disabled until all conditions met)
 # ---------------------------------------------------------------------------
@@ -172,7 +337,7 @@ st.divider()
 bank_loaded = "question_bank" in st.session_state
 name_filled = bool(user_name.strip())
 cats_selected = len(selected_categories) > 0
-can_start = bank_loaded and name_filled and cats_selected
+can_start = bank_loaded and name_filled and cats_selected and not upload_pending
 
 start_btn = st.button(
     "▶ Start Session",
@@ -181,10 +346,33 @@ start_btn = st.button(
     use_container_width=True,
 )
 
+# ---------------------------------------------------------------------------
+# Exam cap: when every exam place is taken, wait in the queue and start
+# automatically once a place frees up (see logic/session_registry.py)
+# ---------------------------------------------------------------------------
+registry_key = st.session_state.get("_registry_key")
+queued = st.session_state.get("_exam_queued", False) and can_start
+if queued and st.button("Leave queue", key="leave_queue_btn"):
+    session_registry.leave_queue(registry_key)
+    queued = False
+if not queued:
+    st.session_state.pop("_exam_queued", None)
+start_requested = start_btn or queued
+if start_requested and registry_key and not session_registry.acquire_exam_slot(registry_key):
+    st.session_state._exam_queued = True
+    st.info(
+        f"⏳ All {session_registry.max_active_exams()} exam places are in use. Please wait — "
+        f"you are number {session_registry.queue_position(registry_key)} in the queue, "
+        "and your exam will start automatically.",
+    )
+    time.sleep(session_registry.QUEUE_POLL_SECONDS)
+    st.rerun()
+st.session_state.pop("_exam_queued", None)
+
 # ---------------------------------------------------------------------------
 # T016: Start Session handler
 # ---------------------------------------------------------------------------
-if start_btn:
+if start_requested:
     # Resolve selected category names → integer tag ids
     tag_ids = [
         tid
@@ -193,44 +381,152 @@ if start_btn:
         if tid is not None
     ]
 
-    filtered = loader.filter_by_tags(st.session_state.question_bank, tag_ids)
-
+    form_seed = None
+    prepared = None
+    combined = st.session_state._combined_bank
     try:
-        drawn = loader.draw_session_questions(filtered, 8)
-    except ValueError:
-        st.error(
-            f"Insufficient questions: only {len(filtered)} match the selected "
-            "categories. Add more questions or broaden your tag selection."
-        )
+        if form_id:
+            try:
+                with open(forms_manifest_path, "rb") as _f:
+                    manifest = forms.load_manifest(_f)
+                drawn, form_seed = forms.get_form(
+                    manifest, form_id, st.session_state.question_bank
+                )
+            except (OSError, ValueError) as e:
+                st.error(str(e))
+                st.stop()
+            if len(drawn) != profile["question_count"]:
+                st.error(
+                    f"Form {form_id} has {len(drawn)} questions; choose an exam format "
+                    f"with {len(drawn)} questions."
+                )
+                st.stop()
+        elif draw_mode in session_pool.POOLED_DRAW_MODES:
+            # Draws that do not depend on the user come ready-made from the
+            # prefetch pool, so a class starting at once does not queue here
+            prepared = session_pool.take_session(
+                [combined["entries"][name] for name in combined["banks"]],
+                tag_ids,
+                profile,
+                draw_mode,
+                avoid_near_duplicates,
+                st.session_state.tag_map,
+            )
+        elif draw_mode == "adaptive":
+            historical = st.session_state.get("historical_scorecard") or {}
+            drawn = sampler.draw_adaptive(
+                st.session_state.question_bank,
+                st.session_state._bank_tag_index,
+                tag_ids,
+                profile["question_count"],
+                historical.get("category_summary"),
+                st.session_state.tag_map,
+                cluster_of=st.session_state._bank_near_duplicates if avoid_near_duplicates else None,
+            )
+        elif draw_mode == "cat":
+            # Only the first question is drawn now; the quiz page picks each
+            # next one from the answers so far (see data/cat.py).
+            cat_session = cat.new_cat_session(
+                combined,
+                tag_ids,
+                profile["question_count"],
+                avoid_near_duplicates,
+            )
+            drawn = [cat.next_question(cat_session, [], {})]
+        elif draw_mode == "unseen":
+            drawn = seen.draw_unseen_first(
+                combined,
+                tag_ids,
+                profile["question_count"],
+                st.session_state.get("seen_questions"),
+                st.session_state._bank_near_duplicates if avoid_near_duplicates else None,
+            )
+        elif draw_mode == "review":
+            filtered = loader.filter_by_tags(st.session_state.question_bank, tag_ids)
+            by_id = {q["id"]: q for q in filtered}
+            due_ids = review.next_reviews(
+                review_schedule, profile["question_count"], by_id.__contains__
+            )
+            drawn = [by_id[q_id] for q_id in due_ids]
+            if len(filtered) < profile["question_count"]:
+                raise ValueError(
+                    f"Need {profile['question_count']} questions but only "
+                    f"{len(filtered)} match the selected categories"
+                )
+            if len(drawn) < profile["question_count"]:
+                # Fill at random from the questions not already picked
+                picked = set(due_ids)
+                drawn += loader.draw_session_questions(
+                    [q for q in filtered if q["id"] not in picked],
+                    profile["question_count"] - len(drawn),
+                )
+        # Other draws reject near-duplicates themselves; the review fill is a
+        # uniform draw from the filtered bank, so refilling from it is the same
+        if avoid_near_duplicates and draw_mode == "review" and not form_id:
+            drawn = dedupe.exclude_near_duplicates(
+                drawn,
+                st.session_state._bank_near_duplicates,
+                lambda: loader.filter_by_tags(st.session_state.question_bank, tag_ids),
+            )
+    except ValueError as e:
+        if draw_mode == "blueprint" and not form_id:
+            st.error(f"The question bank cannot meet the syllabus blueprint: {e}.")
+        else:
+            st.error(
+                f"Insufficient questions: {e}. Add more questions or broaden your "
+                "tag selection."
+            )
         st.stop()
 
-    # Shuffle question order; shuffle options per question; build score lookups
-    shuffled_qs = shuffler.shuffle_questions(drawn)
-    shuffled_options_map = {}
-    shuffle_maps_map = {}
-    points_lookups_map = {}
-
-    for q in shuffled_qs:
-        q_id = q["id"]
-        opts, smap = shuffler.shuffle_options(q)
-        shuffled_options_map[q_id] = opts
-        shuffle_maps_map[q_id] = smap
-        points_lookups_map[q_id] = scoring.build_points_lookup(q["scoring"])
+    # Shuffle question order; shuffle options per question; build score lookups.
+    # Exam forms shuffle from the form's seed so every sitting of a form matches.
+    if prepared is None:
+        prepared = session_pool.prepare_session(
+            drawn, profile, st.session_state.tag_map, form_seed
+        )
 
     # Write all session state keys
     st.session_state.user_name = user_name.strip()
-    st.session_state.time_limit_seconds = 5400  # 90 minutes
+    st.session_state.exam_profile = profile
+    st.session_state.time_limit_seconds = profile["time_limit_minutes"] * 60
     st.session_state.time_extension_used = False
-    st.session_state.questions = shuffled_qs
-    st.session_state.shuffled_options = shuffled_options_map
-    st.session_state.shuffle_maps = shuffle_maps_map
-    st.session_state.points_lookups = points_lookups_map
+    st.session_state.questions = prepared["questions"]
+    st.session_state.shuffled_options = prepared["shuffled_options"]
+    st.session_state.shuffle_maps = prepared["shuffle_maps"]
+    st.session_state.points_lookups = prepared["points_lookups"]
+    st.session_state.live_score = prepared["live_score"]
+    st.session_state.practice_mode = practice_mode
     st.session_state.session_active = True
     st.session_state.session_submitted = False
     st.session_state.current_question_idx = 0
     st.session_state.answers = {}
     st.session_state.flags = set()
+    st.session_state.telemetry = telemetry.new_log()
     st.session_state.start_time = time.time()
-    st.session_state.historical_scorecard = None  # wired in Phase 7 (T035)
-
+    st.session_state.cat = cat_session if draw_mode == "cat" and not form_id else None
+    st.session_state.session_seed = prepared["seed"]
+    st.session_state.session_banks = list(combined["banks"])
+
+    # Snapshot the session so it survives a reload, a restart or a move to
+    # another replica; the quiz URL carries its id (see app.py)
+    store = session_store.configured_store()
+    if store is not None and uploaded_bank is None:
+        st.session_state.session_id = secrets.token_urlsafe(12)
+        session_store.save_snapshot(
+            store, st.session_state.session_id, snapshot.build_snapshot(st.session_state)
+        )
+        user_record = snapshot.build_user_record(st.session_state)
+        if user_record is not None:
+            session_store.save_snapshot(
+                store, snapshot.user_record_id(st.session_state.session_id), user_record
+            )
+        st.switch_page("pages/quiz.py", query_params={"session": st.session_state.session_id})
+    st.session_state.session_id = None
     st.switch_page("pages/quiz.py")
+
+# ---------------------------------------------------------------------------
+# An uploaded bank is still being validated: poll its worker
+# ---------------------------------------------------------------------------
+if upload_pending:
+    time.sleep(upload_sandbox.POLL_SECONDS)
+    st.rerun()
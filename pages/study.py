@@ -0,0 +1,138 @@
+"""pages/study.py — Study Browser: search and browse the question bank."""
+import pandas as pd
+import streamlit as st
+
+import data.catalog as catalog
+import data.search as search
+import data.tag_resolver as tag_resolver
+from components.media import render_media
+
+PAGE_SIZE = 10
+
+# ---------------------------------------------------------------------------
+# Session guard — no studying during a running exam
+# ---------------------------------------------------------------------------
+if st.session_state.get("session_active"):
+    st.switch_page("pages/quiz.py")
+    st.stop()
+
+st.markdown(
+    """
+    <style>
+    [data-testid="stSidebar"] { display: none; }
+    [data-testid="collapsedControl"] { display: none; }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+catalog.start_watcher()
+try:
+    st.session_state.tag_map = catalog.load_tag_map()
+except Exception as e:
+    if "tag_map" not in st.session_state:
+        st.error(f"Failed to load tag reference: {e}")
+        st.stop()
+tag_map = st.session_state.tag_map
+
+st.title("Study Browser")
+st.page_link("pages/setup.py", label="Back to Session Setup", icon="⬅️")
+
+# ---------------------------------------------------------------------------
+# Bank selection, query and tag filter
+# ---------------------------------------------------------------------------
+bank_paths = {catalog.bank_name_for(path): path for path in catalog.discover_banks()}
+selected_banks = list(bank_paths)
+if len(bank_paths) > 1:
+    selected_banks = st.multiselect(
+        "Question banks", options=list(bank_paths), default=list(bank_paths), key="study_banks"
+    )
+
+try:
+    entries = list(catalog.load_banks([bank_paths[name] for name in selected_banks]).values())
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+query = st.text_input(
+    "Search",
+    placeholder="e.g. stakeholder power/interest grid, readiness assessment…",
+    key="study_query",
+)
+bank_tag_ids = {tag_id for entry in entries for tag_id in entry["tag_index"]}
+selected_categories = st.multiselect(
+    "Filter by category",
+    options=sorted({tag_map[t]["name"] for t in bank_tag_ids if t in tag_map}),
+    key="study_categories",
+)
+tag_ids = [
+    tag_id
+    for name in selected_categories
+    for tag_id in [tag_resolver.get_tag_id_for_name(name, tag_map)]
+    if tag_id is not None
+]
+
+# ---------------------------------------------------------------------------
+# Query every selected bank's index, scored as one collection
+# ---------------------------------------------------------------------------
+hit_banks, hit_positions, hit_scores = search.search_banks(
+    [catalog.get_search_index(entry) for entry in entries],
+    query,
+    [
+        search.tag_mask(entry["tag_index"], tag_ids, len(entry["questions"])) if tag_ids else None
+        for entry in entries
+    ],
+)
+
+total = len(hit_scores)
+n_pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+st.caption(f"{total} matching question{'s' if total != 1 else ''}")
+if total == 0:
+    st.stop()
+
+# Page number resets when the query or filters change (keyed by them)
+page = (
+    st.number_input(
+        f"Page (of {n_pages})",
+        min_value=1,
+        max_value=n_pages,
+        value=1,
+        key=f"study_page_{hash((query, tuple(selected_banks), tuple(tag_ids)))}",
+    )
+    - 1
+)
+
+# ---------------------------------------------------------------------------
+# Render only the visible page
+# ---------------------------------------------------------------------------
+for rank, hit in enumerate(search.page_of(hit_scores, page, PAGE_SIZE)):
+    q = entries[hit_banks[hit]]["questions"][hit_positions[hit]]
+    tag_names = tag_resolver.get_tag_names_for_question(q, tag_map)
+    label = f"{page * PAGE_SIZE + rank + 1}. [{q['id']}] {tag_names[0] if tag_names else ''}"
+    with st.expander(label, expanded=False):
+        if q.get("scenario"):
+            st.info(q["scenario"])
+            render_media(q.get("scenario_media", []))
+        st.write(q["question"])
+        render_media(q.get("media", []))
+
+        points = {tier["option"]: tier["points"] for tier in q["scoring"].values()}
+        tiers = {tier["option"]: name for name, tier in q["scoring"].items()}
+        options_df = pd.DataFrame(
+            [
+                {"Option": opt_id, "Answer": q["options"][opt_id], "Points": points[opt_id]}
+                for opt_id in ["A", "B", "C", "D"]
+            ]
+        ).set_index("Option")
+        st.dataframe(options_df, use_container_width=True)
+
+        st.subheader("Rationale")
+        for opt_id in sorted(points, key=points.get, reverse=True):
+            st.markdown(
+                f"**Option {opt_id}** ({points[opt_id]} pts): "
+                f"{q['rationale'][f'why_{tiers[opt_id]}']}"
+            )
+        st.markdown(f"**Concept tested:** {q['rationale']['concept_tested']}")
+        st.markdown(f"**Common mistakes:** {q['rationale']['common_mistakes']}")
+        st.caption(q["rationale"]["togaf_reference"])
+        st.caption("Categories: " + ", ".join(tag_names))
@@ -0,0 +1,64 @@
+"""tests/helpers.py — Small question banks built in memory for the tests."""
+import io
+import json
+import os
+
+from data.catalog import namespace_questions
+from data.loader import load_question_bank
+from data.tag_resolver import load_tags
+
+TAGS_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "togaf_tags_db.csv")
+
+RATIONALE = {
+    "why_best": "Best.",
+    "why_second_best": "Second.",
+    "why_third_best": "Third.",
+    "why_distractor": "Distractor.",
+    "concept_tested": "Concept.",
+    "common_mistakes": "Mistakes.",
+    "togaf_reference": "Reference.",
+}
+
+
+def raw_question(q_id: int, tags=(1,), scenario: str = "", question: str | None = None) -> dict:
+    """Return a valid raw bank question; option A is best, D the distractor."""
+    return {
+        "id": q_id,
+        "scenario": scenario,
+        "question": question or f"Question number {q_id} about topic {tags[0]}?",
+        "options": {key: f"Option {key} of {q_id}" for key in "ABCD"},
+        "scoring": {
+            "best": {"option": "A", "points": 5},
+            "second_best": {"option": "B", "points": 3},
+            "third_best": {"option": "C", "points": 1},
+            "distractor": {"option": "D", "points": 0},
+        },
+        "tags": list(tags),
+        "rationale": dict(RATIONALE),
+    }
+
+
+def wording(q_id: int) -> str:
+    """Return a question stem sharing no word triple with other ids' stems."""
+    return " ".join(f"w{q_id}x{i}" for i in range(12)) + "?"
+
+
+def bank_json(raw: list) -> str:
+    return json.dumps(raw)
+
+
+def make_bank(raw: list, name: str = "T") -> list:
+    """Return raw questions validated and namespaced as the app loads them ("T:1", ...)."""
+    return namespace_questions(load_question_bank(io.StringIO(bank_json(raw))), name)
+
+
+def write_bank(path, raw: list) -> str:
+    """Write raw questions as a JSON bank file; return its path as a string."""
+    path.write_text(bank_json(raw), encoding="utf-8")
+    return str(path)
+
+
+def tag_map() -> dict:
+    """Return the tag map of the repository's togaf_tags_db.csv."""
+    with open(TAGS_CSV, "rb") as f:
+        return load_tags(f)
@@ -0,0 +1,148 @@
+import asyncio
+import shutil
+
+import pytest
+
+import logic.api as api
+import logic.profiles as profiles
+from data.item_stats import EVENT_LOG_ENV
+import data.session_store as session_store
+from data.session_store import SESSION_STORE_ENV
+from tests.helpers import TAGS_CSV, raw_question, wording, write_bank
+
+
+@pytest.fixture(autouse=True)
+def app_dir(tmp_path, monkeypatch):
+    """Run from a directory holding one bank of 12 Phase A questions and the tag CSV."""
+    (tmp_path / "bank").mkdir()
+    write_bank(tmp_path / "bank" / "T.json", [raw_question(i, tags=(2,), question=wording(i)) for i in range(1, 13)])
+    shutil.copy(TAGS_CSV, tmp_path / "togaf_tags_db.csv")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(EVENT_LOG_ENV, "")
+    monkeypatch.delenv(SESSION_STORE_ENV, raising=False)
+    monkeypatch.setattr(api, "_sessions", {})
+    return tmp_path
+
+
+def _start(**body) -> dict:
+    started = api.start_session({"exam_profile": "practitioner", **body}, now=0)
+    return api.get_session(started["session_id"])
+
+
+def _display_idx(question: dict, option: str) -> int:
+    return next(o["display_idx"] for o in question["options"] if o["text"].startswith(f"Option {option} "))
+
+
+def test_start_session_draws_a_profile_sized_session():
+    started = api.start_session({"exam_profile": "practitioner", "categories": ["Phase A: Architecture Vision"]}, now=0)
+    profile = profiles.get_profile("practitioner")
+
+    assert started["question_count"] == profile["question_count"]
+    assert started["deadline"] == profile["time_limit_minutes"] * 60
+    session = api.get_session(started["session_id"])
+    assert len({q["id"] for q in session["questions"]}) == profile["question_count"]
+
+
+def test_start_session_rejects_bad_requests():
+    with pytest.raises(ValueError, match="draw_mode"):
+        api.start_session({"draw_mode": "nonsense"})
+    with pytest.raises(ValueError, match="Unknown question bank: Nope"):
+        api.start_session({"banks": ["Nope"]})
+    with pytest.raises(ValueError, match="Unknown category"):
+        api.start_session({"categories": ["Not a tag"]})
+    with pytest.raises(LookupError):
+        api.get_session("AbCdEfGhIjKlMnOp")
+
+
+def test_questions_keep_their_option_order_and_answers():
+    session = _start()
+    first = api.get_question(session, 1)
+    assert api.get_question(session, 1)["options"] == first["options"]
+    assert first["answer"] is None and first["of"] == len(session["questions"])
+
+    idx = _display_idx(first, "B")
+    assert api.answer_question(session, 1, {"display_idx": idx}) == {"number": 1, "answer": idx, "answered": 1}
+    assert session["snapshot"]["answers"][first["question_id"]] == "B"
+    assert api.get_question(session, 1)["answer"] == idx
+
+    with pytest.raises(ValueError, match="display_idx"):
+        api.answer_question(session, 1, {"display_idx": 4})
+    with pytest.raises(LookupError):
+        api.get_question(session, len(session["questions"]) + 1)
+
+
+def test_submit_scores_answers_once_and_closes_the_session():
+    session = _start()
+    for number in range(1, len(session["questions"]) + 1):
+        question = api.get_question(session, number)
+        api.answer_question(session, number, {"display_idx": _display_idx(question, "A" if number > 1 else "D")})
+
+    results = api.submit_session(session)
+
+    assert results["total_score"] == results["max_score"] - results["max_points_per_question"]
+    assert api.submit_session(session) is results
+    assert api.closed_reason(session, now=0) == "Session already submitted"
+
+
+def test_deadline_closes_answers_and_sweep_drops_old_sessions():
+    session = _start()
+    deadline = session["snapshot"]["deadline"]
+
+    assert api.closed_reason(session, now=deadline - 1) is None
+    assert api.closed_reason(session, now=deadline) == "Time is up; submit the session"
+    assert api.sweep(now=deadline + api.RESULTS_TTL_SECONDS - 1) == 0
+    assert api.sweep(now=deadline + api.RESULTS_TTL_SECONDS) == 1
+
+
+def test_sessions_resume_from_the_store_after_a_restart(app_dir, monkeypatch):
+    monkeypatch.setenv(SESSION_STORE_ENV, f"dir:{app_dir / 'sessions'}")
+    session = _start()
+    api.answer_question(session, 2, {"display_idx": 1})
+    expected = api.get_question(session, 2)
+
+    monkeypatch.setattr(api, "_sessions", {})
+    resumed = api.get_session(session["snapshot"]["session_id"])
+
+    assert resumed is not session
+    assert api.get_question(resumed, 2) == expected
+    session_store.flush_snapshots()
+
+
+def test_route_maps_endpoints_to_status_codes():
+    status, started = asyncio.run(api.route("POST", "/sessions", {"exam_profile": "practitioner"}))
+    assert status == 201
+    path = f"/sessions/{started['session_id']}"
+
+    assert asyncio.run(api.route("GET", path, {}))[1]["answered"] == 0
+    assert asyncio.run(api.route("PUT", f"{path}/answers/1", {"display_idx": 0}))[0] == 200
+    assert asyncio.run(api.route("GET", f"{path}/scorecard", {}))[0] == 409
+    assert asyncio.run(api.route("DELETE", path, {}))[0] == 405
+    assert asyncio.run(api.route("GET", "/nowhere", {}))[0] == 404
+    assert asyncio.run(api.route("POST", f"{path}/submit", {}))[0] == 200
+    assert asyncio.run(api.route("PUT", f"{path}/answers/1", {"display_idx": 0}))[0] == 409
+
+
+def test_start_session_rejects_fields_of_the_wrong_type():
+    for body, field in (
+        ({"banks": "T"}, "banks"),
+        ({"banks": [1]}, "banks"),
+        ({"categories": [{"name": "x"}]}, "categories"),
+        ({"draw_mode": 3}, "draw_mode"),
+        ({"user_name": ["me"]}, "user_name"),
+        ({"avoid_near_duplicates": "yes"}, "avoid_near_duplicates"),
+    ):
+        with pytest.raises(ValueError, match=field):
+            api.start_session(body)
+    session = _start()
+    with pytest.raises(ValueError, match="display_idx"):
+        api.answer_question(session, 1, {"display_idx": True})
+
+
+def test_concurrent_submits_score_once():
+    session = _start()
+
+    async def submit_four():
+        return await asyncio.gather(*(asyncio.to_thread(api.submit_session, session) for _ in range(4)))
+
+    results = asyncio.run(submit_four())
+    assert all(r is results[0] for r in results)
@@ -0,0 +1,102 @@
+import collections
+import io
+import json
+
+import pytest
+from PIL import Image
+
+import data.assets as assets
+from data.loader import load_question_bank
+from tests.helpers import raw_question, write_bank
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(assets, "_cache", collections.OrderedDict())
+    monkeypatch.setattr(assets, "_cache_bytes", 0)
+    monkeypatch.delenv(assets.CACHE_MB_ENV, raising=False)
+
+
+def _image(path, width: int, image_format: str = "PNG") -> str:
+    Image.new("RGB", (width, width // 2), (30, 90, 150)).save(path, image_format)
+    return str(path)
+
+
+def test_add_asset_stores_original_and_narrower_variants_once(tmp_path):
+    asset_dir = str(tmp_path / "assets")
+    path = _image(tmp_path / "wide.png", 1200)
+
+    asset_id = assets.add_asset(path, asset_dir)
+
+    assert asset_id == assets.asset_id_for((tmp_path / "wide.png").read_bytes())
+    assert sorted(p.name for p in (tmp_path / "assets" / asset_id).iterdir()) == [
+        "original.png",
+        "w480.png",
+        "w960.png",
+    ]
+    assert assets.add_asset(path, asset_dir) == asset_id
+    small = assets.add_asset(_image(tmp_path / "small.jpg", 600, "JPEG"), asset_dir)
+    assert sorted(p.name for p in (tmp_path / "assets" / small).iterdir()) == ["original.jpg", "w480.jpg"]
+
+
+def test_add_asset_rejects_files_that_are_not_images(tmp_path):
+    (tmp_path / "notes.png").write_text("not an image")
+    with pytest.raises(ValueError, match="not a readable image"):
+        assets.add_asset(str(tmp_path / "notes.png"), str(tmp_path / "assets"))
+
+
+def test_read_asset_serves_the_smallest_wide_enough_variant(tmp_path):
+    asset_dir = str(tmp_path / "assets")
+    asset_id = assets.add_asset(_image(tmp_path / "wide.png", 1200), asset_dir)
+
+    def width_of(width):
+        mime, data = assets.read_asset(asset_id, width, asset_dir)
+        assert mime == "image/png"
+        return Image.open(io.BytesIO(data)).width
+
+    assert [width_of(w) for w in (300, 480, 500, 2000, None)] == [480, 480, 960, 1200, 1200]
+    for bad in ("../../etc/passwd", "0" * 64):
+        with pytest.raises(LookupError):
+            assets.read_asset(bad, None, asset_dir)
+
+
+def test_cache_evicts_least_recently_used_images_past_its_budget(tmp_path, monkeypatch):
+    asset_dir = str(tmp_path / "assets")
+    ids = [assets.add_asset(_image(tmp_path / f"{w}.png", w), asset_dir) for w in (400, 401, 402)]
+    sizes = [len(assets.read_asset(asset_id, None, asset_dir)[1]) for asset_id in ids]
+    # Room for any two of the three
+    monkeypatch.setenv(assets.CACHE_MB_ENV, str((sum(sizes) - 1) / 1024 / 1024))
+    monkeypatch.setattr(assets, "_cache", collections.OrderedDict())
+    monkeypatch.setattr(assets, "_cache_bytes", 0)
+
+    for asset_id in (ids[0], ids[1], ids[0], ids[2]):
+        assets.read_asset(asset_id, None, asset_dir)
+
+    cached = {key[1] for key in assets._cache}
+    assert cached == {ids[0], ids[2]}
+    assert assets.cache_stats()["bytes"] == sizes[0] + sizes[2]
+
+
+def test_case_study_images_reach_their_questions_and_missing_ones_are_listed(tmp_path):
+    asset_dir = str(tmp_path / "assets")
+    stored = assets.add_asset(_image(tmp_path / "a.png", 100), asset_dir)
+    missing = "f" * 64
+    question = raw_question(2)
+    del question["scenario"]
+    bank = {
+        "case_studies": {"cs": {"text": "Shared scenario", "media": [{"asset": stored, "caption": "ADM"}]}},
+        "questions": [
+            {**raw_question(1), "media": [{"asset": missing}]},
+            {**question, "case_study_id": "cs"},
+        ],
+    }
+    (tmp_path / "bank").mkdir()
+    (tmp_path / "bank" / "M.json").write_text(json.dumps(bank), encoding="utf-8")
+
+    questions = load_question_bank(io.StringIO(json.dumps(bank)))
+    assert assets.media_refs(questions[1]) == [{"asset": stored, "caption": "ADM"}]
+    assert assets.missing_assets(str(tmp_path / "bank"), asset_dir) == [("M:1", missing)]
+
+    bad = write_bank(tmp_path / "bad.json", [{**raw_question(3), "media": [{"asset": "x.png"}]}])
+    with open(bad, encoding="utf-8") as f, pytest.raises(ValueError, match="64 hex digits"):
+        load_question_bank(f)
@@ -0,0 +1,112 @@
+import csv
+
+import openpyxl
+import pytest
+
+import data.bulk_import as bulk_import
+from data.loader import load_question_bank
+from tests.helpers import RATIONALE, tag_map
+
+HEADER = [
+    "ID",
+    "Scenario",
+    "Question",
+    "Option A",
+    "Option B",
+    "Option C",
+    "Option D",
+    "Best",
+    "Second Best",
+    "Third Best",
+    "Distractor",
+    "Tags",
+    *(column.replace("_", " ").title() for column in RATIONALE),
+]
+
+
+def _row(q_id, tags: str = "Preliminary Phase; 2", best: str = "a") -> list:
+    return [
+        q_id,
+        f"Scenario {q_id}",
+        f"Question {q_id}?",
+        *(f"Option {letter}" for letter in "ABCD"),
+        best,
+        "B",
+        "C",
+        "D",
+        tags,
+        *RATIONALE.values(),
+    ]
+
+
+def _write_csv(path, rows: list) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([HEADER, *rows])
+    return str(path)
+
+
+def _error_rows(path) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def test_map_columns_ignores_case_and_punctuation_and_applies_renames():
+    header = ["Stem" if name == "Question" else name for name in HEADER]
+
+    with pytest.raises(ValueError, match="Missing columns: question"):
+        bulk_import.map_columns(header)
+    columns = bulk_import.map_columns(header, {"question": "stem"})
+    assert columns["question"] == 2 and columns["option_a"] == 3 and columns["id"] == 0
+
+
+def test_row_to_question_resolves_tags_and_rejects_bad_rows():
+    columns = bulk_import.map_columns(HEADER)
+    lookup = bulk_import.tag_ids_by_name(tag_map())
+
+    question = bulk_import.row_to_question(tuple(_row(7.0)), 2, columns, lookup)
+    assert question["id"] == 7
+    assert question["tags"] == [1, 2]
+    assert question["scoring"]["best"] == {"option": "A", "points": 5}
+
+    with pytest.raises(ValueError, match="Unknown tag 'Phase Z'"):
+        bulk_import.row_to_question(tuple(_row(1, tags="Phase Z")), 2, columns, lookup)
+    with pytest.raises(ValueError, match="whole number"):
+        bulk_import.row_to_question(tuple(_row("x1")), 2, columns, lookup)
+    with pytest.raises(ValueError):
+        bulk_import.row_to_question(tuple(_row(1, best="B")), 2, columns, lookup)
+
+
+@pytest.mark.parametrize("out_name", ["bank.jsonl", "bank.json"])
+def test_import_writes_valid_rows_and_reports_the_rest(tmp_path, out_name):
+    source = _write_csv(
+        tmp_path / "questions.csv",
+        [_row(1), _row(2, tags="Phase Z"), [""] * len(HEADER), _row(3), _row(1), _row(4)],
+    )
+    out, errors = str(tmp_path / out_name), str(tmp_path / "errors.csv")
+
+    summary = bulk_import.import_questions(source, out, errors, tag_map(), workers=1, chunk_size=2)
+
+    assert (summary["rows"], summary["imported"], summary["rejected"]) == (5, 3, 2)
+    assert _error_rows(errors) == [["3", "2", "Unknown tag 'Phase Z'"], ["6", "1", "Duplicate id 1"]]
+    with open(out, encoding="utf-8") as f:
+        bank = load_question_bank(f, json_lines=out.endswith(".jsonl"))
+    assert [q["id"] for q in bank] == [1, 3, 4]
+    assert not (tmp_path / f"{out_name}.tmp").exists()
+
+
+def test_workbooks_and_worker_pools_give_the_same_bank(tmp_path):
+    rows = [_row(i) for i in range(1, 8)]
+    workbook = openpyxl.Workbook()
+    for row in [HEADER, *rows]:
+        workbook.active.append(row)
+    workbook.save(tmp_path / "questions.xlsx")
+    errors = str(tmp_path / "errors.csv")
+
+    bulk_import.import_questions(
+        str(tmp_path / "questions.xlsx"), str(tmp_path / "a.jsonl"), errors, tag_map(), workers=2, chunk_size=3
+    )
+    bulk_import.import_questions(
+        _write_csv(tmp_path / "q.csv", rows), str(tmp_path / "b.jsonl"), errors, tag_map(), workers=1
+    )
+
+    assert (tmp_path / "a.jsonl").read_text(encoding="utf-8") == (tmp_path / "b.jsonl").read_text(encoding="utf-8")
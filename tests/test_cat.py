@@ -0,0 +1,134 @@
+import io
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+import data.catalog as catalog
+import data.cat as cat
+import data.history as history
+from data.irt import DEFAULT_STEPS
+from data.loader import load_question_bank
+from tests.helpers import bank_json, raw_question, wording, write_bank
+
+
+@pytest.fixture(autouse=True)
+def calibration_dir(tmp_path, monkeypatch):
+    """Run in tmp_path so get_information_index finds no real calibration files."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(cat.CALIBRATION_DIR)
+    return tmp_path / cat.CALIBRATION_DIR
+
+
+def _bank(tmp_path, n: int = 10, name: str = "C") -> dict:
+    raw = [raw_question(i, tags=(1 if i % 2 else 2,), question=wording(i)) for i in range(1, n + 1)]
+    return catalog.load_banks([write_bank(tmp_path / f"{name}.json", raw)])[name]
+
+
+def _administer(session: dict, k: int, option: str = "A", seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    questions, answers = [], {}
+    for _ in range(k):
+        question = cat.next_question(session, questions, answers, rng)
+        questions.append(question)
+        answers[question["id"]] = {"original_option_id": option}
+    return questions, answers
+
+
+def test_answer_category_orders_scoring_tiers():
+    question = raw_question(1)
+    assert [cat.answer_category(question, option) for option in "ABCD"] == [3, 2, 1, 0]
+
+
+def test_new_session_needs_enough_eligible_questions(tmp_path):
+    combined = catalog.combined_bank([_bank(tmp_path)])
+
+    with pytest.raises(ValueError, match="only 5 match"):
+        cat.new_cat_session(combined, [1], 6)
+    assert sum(mask.sum() for mask in cat.new_cat_session(combined, [1], 5)["available"]) == 5
+
+
+def test_next_question_draws_distinct_eligible_questions_until_none_left(tmp_path):
+    session = cat.new_cat_session(catalog.combined_bank([_bank(tmp_path)]), [2], 5)
+
+    questions, answers = _administer(session, 5)
+
+    assert len({q["id"] for q in questions}) == 5
+    assert all(q["tags"] == [2] for q in questions)
+    with pytest.raises(ValueError, match="No eligible questions"):
+        cat.next_question(session, questions, answers)
+
+
+def test_ability_estimate_follows_answers(tmp_path):
+    combined = catalog.combined_bank([_bank(tmp_path)])
+    strong = cat.new_cat_session(combined, [], 4)
+    weak = cat.new_cat_session(combined, [], 4)
+
+    high, _ = cat.current_ability(strong, *_administer(strong, 4, option="A"))
+    low, _ = cat.current_ability(weak, *_administer(weak, 4, option="D"))
+
+    assert low < 0 < high
+
+
+def test_near_duplicates_are_drawn_at_most_once():
+    raw = [raw_question(1, question=wording(1)), raw_question(2, question=wording(1)), raw_question(3, question=wording(3))]
+    entry = catalog.build_entry("upload", load_question_bank(io.StringIO(bank_json(raw))))
+    session = cat.new_cat_session(catalog.combined_bank([entry]), [], 2)
+
+    questions, answers = _administer(session, 2)
+
+    assert "upload:3" in {q["id"] for q in questions}
+    with pytest.raises(ValueError):
+        cat.next_question(session, questions, answers)
+
+
+def test_resume_restores_state_after_administered_questions(tmp_path):
+    combined = catalog.combined_bank([_bank(tmp_path)])
+    session = cat.new_cat_session(combined, [], 6)
+    questions, _ = _administer(session, 3)
+
+    resumed = cat.resume_cat_session(combined, [], 6, True, [q["id"] for q in questions])
+
+    assert resumed["positions"] == session["positions"]
+    assert resumed["used_clusters"] == session["used_clusters"]
+    assert all((a == b).all() for a, b in zip(resumed["available"], session["available"]))
+
+
+def test_information_index_follows_calibration_file(tmp_path, calibration_dir):
+    entry = _bank(tmp_path, n=3)
+    assert cat.get_information_index(entry)["steps"].tolist() == [list(DEFAULT_STEPS)] * 3
+    assert cat.get_information_index(entry) is cat.get_information_index(entry)
+
+    path = cat.calibration_path("C", str(calibration_dir))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": cat.CALIBRATION_VERSION, "items": {"C:2": [-2.0, 0.0, 2.0]}}, f)
+    os.utime(path, ns=(1, 1))
+
+    assert cat.get_information_index(entry)["steps"][1].tolist() == [-2.0, 0.0, 2.0]
+
+
+def test_calibrate_skips_items_with_few_responses(tmp_path):
+    path = write_bank(tmp_path / "C.json", [raw_question(i, question=wording(i)) for i in range(1, 4)])
+    db = str(tmp_path / "history.db")
+    conn = history.connect(db)
+    rng = np.random.default_rng(0)
+    with conn:
+        for attempt in range(1, cat.MIN_RESPONSES + 6):
+            conn.execute(
+                "INSERT INTO attempts (attempt_id, user, submitted_at, exam_profile, total_score, max_score, passed)"
+                " VALUES (?, 'sam', 0, 'practitioner', 0, 0, 0)",
+                (attempt,),
+            )
+            answered = ["C:1", "C:2"] if attempt <= 5 else ["C:1"]
+            conn.executemany(
+                "INSERT INTO answers (attempt_id, question_id, selected_option, points) VALUES (?, ?, ?, 0)",
+                [(attempt, q_id, str(rng.choice(list("ABCD")))) for q_id in answered],
+            )
+    conn.close()
+
+    calibrations = cat.calibrate(db, [path])
+
+    assert list(calibrations["C"]["items"]) == ["C:1"]
+    assert len(calibrations["C"]["items"]["C:1"]) == len(DEFAULT_STEPS)
@@ -0,0 +1,122 @@
+import io
+import os
+
+import data.catalog as catalog
+from data.loader import load_question_bank
+from data.search import build_search_index
+from tests.helpers import bank_json, raw_question, wording, write_bank
+
+
+def test_combined_bank_is_shared_per_selection_of_versions(tmp_path):
+    paths = [
+        write_bank(tmp_path / "A.json", [raw_question(i, tags=(1,)) for i in range(1, 4)]),
+        write_bank(tmp_path / "B.json", [raw_question(i, tags=(2,)) for i in range(1, 3)]),
+    ]
+    entries = catalog.load_banks(paths)
+    combined = catalog.combined_bank([entries["A"], entries["B"]])
+
+    assert catalog.combined_bank([entries["A"], entries["B"]]) is combined
+    assert combined["banks"] == ["A", "B"]
+    assert combined["spans"] == {"A": (0, 3), "B": (3, 5)}
+    assert combined["tag_index"] == {1: [0, 1, 2], 2: [3, 4]}
+    assert combined["by_id"]["B:2"] is entries["B"]["questions"][1]
+    assert id(combined["questions"]) in catalog.shared_object_ids()
+
+    write_bank(tmp_path / "B.json", [raw_question(i, tags=(2,)) for i in range(1, 4)])
+    os.utime(paths[1], ns=(1, 1))
+    reloaded = catalog.load_banks(paths)
+    assert catalog.combined_bank([reloaded["A"], reloaded["B"]]) is not combined
+
+
+def _upload(raw: list) -> dict:
+    return catalog.build_entry("upload", load_question_bank(io.StringIO(bank_json(raw))))
+
+
+def test_uploads_reusing_ids_get_distinct_versions():
+    first = _upload([raw_question(1, question="What is phase A?")])
+    second = _upload([raw_question(1, question="What is phase B?")])
+
+    assert first["version"] != second["version"]
+    assert catalog.combined_bank([first]) is not catalog.combined_bank([second])
+
+
+def test_near_duplicate_clusters_span_banks(tmp_path):
+    shared = wording(100)
+    paths = [
+        write_bank(tmp_path / "A.json", [raw_question(1, question=shared), raw_question(2, question=wording(2))]),
+        write_bank(tmp_path / "B.json", [raw_question(1, question=wording(3)), raw_question(7, question=shared)]),
+    ]
+    entries = catalog.load_banks(paths)
+
+    both = catalog.combined_bank([entries["A"], entries["B"]])
+    assert both["near_duplicates"]["A:1"] == both["near_duplicates"]["B:7"]
+    assert set(both["near_duplicates"]) == {"A:1", "B:7"}
+    # A question whose only near-duplicate is outside the selection is not clustered
+    assert catalog.combined_bank([entries["A"]])["near_duplicates"] == {}
+
+    # Editing B only re-indexes B's changed question
+    write_bank(tmp_path / "B.json", [raw_question(1, question=wording(3)), raw_question(7, question=wording(7))])
+    os.utime(paths[1], ns=(1, 1))
+    reloaded = catalog.load_banks(paths)
+    assert reloaded["B"]["questions"][0] is entries["B"]["questions"][0]
+    assert catalog.combined_bank([reloaded["A"], reloaded["B"]])["near_duplicates"] == {}
+
+
+def test_uploads_are_clustered_on_their_own():
+    entry = _upload([raw_question(1, question=wording(1)), raw_question(2, question=wording(1))])
+
+    assert entry["near_duplicates"] == {"upload:1": ("upload", 0), "upload:2": ("upload", 0)}
+    assert catalog.combined_bank([entry])["near_duplicates"] == entry["near_duplicates"]
+
+
+def test_reload_patches_indexes_to_match_a_full_rebuild(tmp_path):
+    raw = [raw_question(i, tags=(i % 3 + 1,), question=wording(i)) for i in range(1, 7)]
+    path = write_bank(tmp_path / "R.json", raw)
+    entry = catalog.load_banks([path])["R"]
+    catalog.get_search_index(entry)
+
+    # Remove 2, edit 4 (new text and tag), append 9
+    raw = [q for q in raw if q["id"] != 2]
+    raw[2] = raw_question(4, tags=(5,), question="Which phase defines the baseline architecture?")
+    raw.append(raw_question(9, tags=(1,), question=wording(9)))
+    write_bank(tmp_path / "R.json", raw)
+    os.utime(path, ns=(1, 1))
+    patched = catalog.load_banks([path])["R"]
+    rebuilt = catalog.build_entry("R", load_question_bank(io.StringIO(bank_json(raw))))
+    full_index = build_search_index(rebuilt["questions"])
+
+    assert patched["questions"][0] is entry["questions"][0]
+    assert patched["tag_index"] == rebuilt["tag_index"]
+    index = patched["search_index"]
+    assert index["size"] == full_index["size"]
+    assert index["doc_len"].tolist() == full_index["doc_len"].tolist()
+    assert set(index["postings"]) == set(full_index["postings"])
+    for term, (positions, tfs) in full_index["postings"].items():
+        got = sorted(zip(index["postings"][term][0].tolist(), index["postings"][term][1].tolist()))
+        assert got == sorted(zip(positions.tolist(), tfs.tolist()))
+
+
+def test_watcher_forgets_deleted_banks_and_keeps_one_failure_per_file(tmp_path):
+    shared = wording(100)
+    a = write_bank(tmp_path / "A.json", [raw_question(1, question=shared)])
+    b = write_bank(tmp_path / "B.json", [raw_question(7, question=shared)])
+    bad = str(tmp_path / "C.json")
+    catalog.load_banks([a, b])
+    for mtime in (1, 2):
+        with open(bad, "w") as f:
+            f.write("[{")
+        os.utime(bad, ns=(mtime, mtime))
+        catalog._poll(str(tmp_path))
+    assert [k for k in catalog._failed_keys if k[0] == bad] == [catalog._cache_key(bad)]
+    assert (b, "B:7") in catalog._dup_links[(a, "A:1")]
+
+    os.remove(b)
+    os.remove(bad)
+    catalog._poll(str(tmp_path))
+
+    assert not [k for k in catalog._bank_cache if k[0] in (b, bad)]
+    assert not [k for k in catalog._failed_keys if k[0] == bad]
+    assert (b, "B:7") not in catalog._dup_links
+    assert (b, "B:7") not in catalog._dup_links.get((a, "A:1"), set())
+    # A missing bank directory is retried on the next pass, not fatal
+    catalog._poll(str(tmp_path / "gone"))
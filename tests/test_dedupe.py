@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import data.dedupe as dedupe
+from tests.helpers import make_bank, raw_question, wording
+
+
+def _signature(text: str):
+    return dedupe.minhash_signature(dedupe.shingle_question(raw_question(1, question=text)))
+
+
+def test_lsh_query_finds_near_duplicates_and_remove_forgets_them():
+    index = dedupe.new_lsh_index()
+    dedupe.lsh_add(index, "a", _signature(wording(1)))
+    dedupe.lsh_add(index, "b", _signature(wording(2)))
+
+    assert [key for key, _ in dedupe.lsh_query(index, _signature(wording(1)))] == ["a"]
+    dedupe.lsh_remove(index, "a")
+    assert dedupe.lsh_query(index, _signature(wording(1))) == []
+    assert all("a" not in keys for bucket in index["buckets"] for keys in bucket.values())
+    dedupe.lsh_remove(index, "a")  # absent keys are ignored
+
+
+def test_linked_clusters_only_follow_selected_keys():
+    links = {"a": {"b"}, "b": {"a", "c"}, "c": {"b"}, "d": {"e"}, "e": {"d"}}
+
+    assert sorted(map(sorted, dedupe.linked_clusters(links, ["a", "b", "c", "d"]))) == [["a", "b", "c"]]
+    # a and c are only linked through b
+    assert dedupe.linked_clusters(links, ["a", "c"]) == []
+
+
+def test_find_near_duplicate_clusters():
+    questions = make_bank(
+        [raw_question(1, question=wording(1)), raw_question(2, question=wording(1)), raw_question(3, question=wording(3))]
+    )
+
+    assert dedupe.find_near_duplicate_clusters([(q["id"], q) for q in questions]) == [["T:1", "T:2"]]
+
+
+def test_exclude_near_duplicates_replaces_later_cluster_members():
+    questions = make_bank([raw_question(i, question=wording(i)) for i in range(1, 6)])
+    cluster_of = {"T:1": 0, "T:2": 0}
+
+    kept = dedupe.exclude_near_duplicates(questions[:3], cluster_of, lambda: questions, random.Random(1))
+
+    assert [q["id"] for q in kept[:2]] == ["T:1", "T:3"]
+    assert kept[2]["id"] in ("T:4", "T:5")
+    with pytest.raises(ValueError, match="near-duplicates"):
+        dedupe.exclude_near_duplicates(questions[:2], cluster_of, lambda: questions[:2])
@@ -0,0 +1,58 @@
+import collections
+
+import data.catalog as catalog
+import logic.diagnostics as diagnostics
+import logic.session_registry as session_registry
+from tests.helpers import raw_question, wording, write_bank
+
+
+def _rows_by_cache(**kwargs) -> dict:
+    return {row["cache"]: row for row in diagnostics.cache_report(**kwargs)}
+
+
+def test_cache_report_counts_lookups_and_measures_on_request(tmp_path):
+    path = write_bank(tmp_path / "D.json", [raw_question(i, question=wording(i)) for i in range(1, 4)])
+    entry = catalog.load_banks([path])["D"]
+    before = _rows_by_cache()["catalog.combined"]
+    catalog.combined_bank([entry])
+    catalog.combined_bank([entry])
+
+    rows = _rows_by_cache()
+    combined = rows["catalog.combined"]
+    assert (combined["hits"], combined["misses"]) == (before["hits"] + 1, before["misses"] + 1)
+    assert combined["hit_rate"] == round(combined["hits"] / (combined["hits"] + combined["misses"]), 3)
+    assert combined["bytes"] is None
+    assert rows["assets.images"]["bytes"] is not None
+
+    measured = _rows_by_cache(measure_bytes=True)
+    assert measured["catalog.banks"]["bytes"] > 0
+    assert measured["catalog.combined"]["bytes"] > 0
+
+
+def test_session_report_sorts_largest_first(monkeypatch):
+    monkeypatch.setattr(session_registry, "_sessions", {})
+    monkeypatch.setattr(session_registry, "_last_sweep", float("inf"))
+    session_registry.touch("small", {"answers": {}}, now=0)
+    session_registry.touch("large", {"answers": {f"T:{i}": "A" * 100 for i in range(100)}, "flags": []}, now=5)
+
+    rows = diagnostics.session_report(now=10)
+
+    assert [row["session"] for row in rows] == ["large", "small"]
+    assert rows[0]["idle_seconds"] == 5 and rows[1]["idle_seconds"] == 10
+    assert list(rows[0]["keys"]) == ["answers", "flags"]
+
+
+def test_snapshots_show_where_memory_grew():
+    diagnostics.start_tracing()
+    try:
+        old = diagnostics.take_snapshot()
+        grown = collections.deque(bytearray(10_000) for _ in range(50))
+        new = diagnostics.take_snapshot()
+    finally:
+        diagnostics.stop_tracing()
+
+    top = diagnostics.compare_snapshots(old, new, limit=5)
+    assert top[0]["location"].startswith(__file__)
+    assert top[0]["bytes_diff"] >= 50 * 10_000
+    assert len(grown) == 50
+    assert not diagnostics.is_tracing()
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import data.forms as forms
+from tests.helpers import make_bank, raw_question, write_bank
+
+
+def _bank(n_per_tag=(6, 3, 3)):
+    raw, q_id = [], 1
+    for tag, count in enumerate(n_per_tag, 1):
+        for _ in range(count):
+            raw.append(raw_question(q_id, tags=(tag,)))
+            q_id += 1
+    return raw
+
+
+def test_proportional_quotas_sum_to_size():
+    strata = forms.build_strata(make_bank(_bank((7, 5, 1))))
+    for size in range(1, 14):
+        quotas = forms.proportional_quotas(strata, size)
+        assert sum(quotas) == size
+        assert all(q >= 0 for q in quotas)
+
+
+def test_generate_forms_meets_quotas_and_overlap():
+    questions = make_bank(_bank())
+    result = forms.generate_forms(questions, 5, 4, max_overlap=2, seed=1, workers=1)
+    assert len(result) == 5
+    quotas = forms.proportional_quotas(forms.build_strata(questions), 4)
+    for form in result:
+        tags = [questions[pos]["tags"][0] for pos in form["positions"]]
+        assert [tags.count(tag) for tag in (1, 2, 3)] == quotas
+    for i, a in enumerate(result):
+        for b in result[i + 1 :]:
+            assert len(set(a["positions"]) & set(b["positions"])) <= 2
+
+
+def test_generate_forms_is_reproducible():
+    questions = make_bank(_bank())
+    first = forms.generate_forms(questions, 3, 4, max_overlap=3, seed=7, workers=1)
+    assert forms.generate_forms(questions, 3, 4, max_overlap=3, seed=7, workers=1) == first
+
+
+def test_manifest_round_trip(tmp_path):
+    questions = make_bank(_bank())
+    manifest = forms.build_manifest("T.json", questions, forms.generate_forms(questions, 2, 4, 4, workers=1), 4)
+    path = tmp_path / "forms.json"
+    path.write_text(json.dumps(manifest))
+    with open(path) as f:
+        loaded = forms.load_manifest(f)
+    drawn, seed = forms.get_form(loaded, "F1", questions)
+    assert [q["id"] for q in drawn] == manifest["forms"]["F1"]["ids"]
+    with pytest.raises(ValueError):
+        forms.get_form(loaded, "F9", questions)
+
+
+def test_cli_reports_unsatisfiable_arguments(tmp_path, capsys):
+    bank = write_bank(tmp_path / "T.json", _bank())
+    with pytest.raises(SystemExit) as exc:
+        forms.main([bank, "--forms", "50", "--size", "8", "--max-overlap", "0", "--workers", "1"])
+    assert exc.value.code == 2
+    assert "forms could be built" in capsys.readouterr().err
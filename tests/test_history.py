@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+import data.history as history
+
+
+def _results(user: str, total: int, breakdown: dict, question_ids=("Q1:1", "Q1:2")) -> dict:
+    return {
+        "user_name": user,
+        "exam_profile": "practitioner",
+        "total_score": total,
+        "max_score": 10,
+        "passed": total >= 6,
+        "per_question": [
+            {"question_id": q_id, "selected_option_id": "A", "points_earned": total // len(question_ids)}
+            for q_id in question_ids
+        ],
+        "category_breakdown": {
+            name: {"session_points": p, "session_max": m, "cumulative_points": 99, "cumulative_max": 99}
+            for name, (p, m) in breakdown.items()
+        },
+    }
+
+
+@pytest.fixture
+def conn(tmp_path):
+    return history.connect(str(tmp_path / "history.db"))
+
+
+def test_totals_accumulate_session_values(conn):
+    history.record_attempt(conn, _results("sam", 8, {"Phase A": (3, 5), "Phase B": (5, 5)}))
+    history.record_attempt(conn, _results("sam", 4, {"Phase A": (4, 5), "Unseen": (0, 0)}))
+    history.record_attempt(conn, _results("kim", 10, {"Phase A": (5, 5)}))
+
+    assert history.load_history(conn, "sam") == {
+        "category_summary": {
+            "Phase A": {"cumulative_points": 7, "cumulative_max": 10},
+            "Phase B": {"cumulative_points": 5, "cumulative_max": 5},
+        }
+    }
+    summary = history.user_summary(conn, "sam")
+    assert (summary["attempts"], summary["passes"], summary["total_points"], summary["total_max"]) == (2, 1, 12, 20)
+    assert [a["total_score"] for a in history.recent_attempts(conn, "sam")] == [4, 8]
+    assert history.load_history(conn, "nobody") is None
+    assert history.user_summary(conn, "nobody") is None
+
+
+def test_a_failed_attempt_leaves_no_partial_totals(conn):
+    with pytest.raises(sqlite3.IntegrityError):
+        history.record_attempt(conn, _results("sam", 8, {"Phase A": (3, 5)}, ("Q1:1", "Q1:1")))
+
+    assert history.load_history(conn, "sam") is None
+    assert history.recent_attempts(conn, "sam") == []
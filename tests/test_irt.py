@@ -0,0 +1,74 @@
+import numpy as np
+
+from data.irt import (
+    DEFAULT_STEPS,
+    N_STEPS,
+    THETA_GRID,
+    category_probabilities,
+    estimate_ability,
+    fit_partial_credit,
+    information_table,
+)
+
+
+def _simulate(steps: np.ndarray, n_persons: int, seed: int = 0) -> tuple:
+    """Return (persons, items, categories, theta) with everyone answering every item."""
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(size=n_persons)
+    persons = np.repeat(np.arange(n_persons), len(steps))
+    items = np.tile(np.arange(len(steps)), n_persons)
+    p = category_probabilities(theta[persons], steps[items])
+    categories = (rng.random(len(persons))[:, None] > np.cumsum(p, axis=1)).sum(axis=1)
+    return persons, items, categories, theta
+
+
+def test_category_probabilities_sum_to_one_and_follow_ability():
+    steps = np.array([DEFAULT_STEPS])
+    p = category_probabilities(np.array([-3.0, 0.0, 3.0]), steps)
+
+    assert p.shape == (3, N_STEPS + 1)
+    assert np.allclose(p.sum(axis=1), 1)
+    assert p[0].argmax() == 0 and p[2].argmax() == N_STEPS
+
+
+def test_information_table_matches_unchunked_build():
+    steps = np.array([DEFAULT_STEPS, (-2.0, -1.0, 0.0), (0.5, 1.5, 2.5)])
+
+    table = information_table(steps, chunk=2)
+
+    assert table.shape == (len(THETA_GRID), 3)
+    assert np.allclose(table, information_table(steps))
+    # An item is most informative around its own step difficulties
+    assert THETA_GRID[table[:, 1].argmax()] < THETA_GRID[table[:, 2].argmax()]
+
+
+def test_fit_partial_credit_recovers_known_steps():
+    true_steps = np.sort(np.random.default_rng(1).uniform(-2, 2, size=(20, N_STEPS)), axis=1)
+    persons, items, categories, theta = _simulate(true_steps, n_persons=2000)
+
+    steps, fitted_theta, iterations = fit_partial_credit(persons, items, categories, 2000, len(true_steps))
+
+    assert iterations < 200
+    assert np.abs(steps - true_steps).mean() < 0.15
+    assert np.abs(steps - true_steps).max() < 0.4
+    assert np.corrcoef(theta, fitted_theta)[0, 1] > 0.9
+
+
+def test_fit_keeps_unobserved_categories_finite():
+    # Every answer is in the top category
+    persons, items = np.arange(10), np.zeros(10, dtype=int)
+    steps, theta, _ = fit_partial_credit(persons, items, np.full(10, N_STEPS), 10, 1)
+
+    assert np.isfinite(steps).all() and np.isfinite(theta).all()
+
+
+def test_estimate_ability_moves_with_answers_and_narrows():
+    steps = np.tile(DEFAULT_STEPS, (6, 1))
+
+    prior = estimate_ability(steps[:0], np.array([], dtype=int))
+    high = estimate_ability(steps, np.full(6, N_STEPS))
+    low = estimate_ability(steps, np.zeros(6, dtype=int))
+
+    assert abs(prior[0]) < 1e-9
+    assert low[0] < prior[0] < high[0]
+    assert np.isfinite(high[0]) and high[1] < prior[1]
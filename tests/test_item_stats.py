@@ -0,0 +1,110 @@
+import numpy as np
+
+import data.item_stats as item_stats
+
+
+TIERS = {"A": "best", "B": "second_best", "C": "third_best", "D": "distractor"}
+
+
+def _results(answers: list, max_points: int = 5) -> dict:
+    """Return a submitted-results dict for (question_id, option, points) answers."""
+    return {
+        "per_question": [
+            {"question_id": q_id, "selected_option_id": option, "points_earned": points, "tier_for_option": TIERS}
+            for q_id, option, points in answers
+        ],
+        "max_points_per_question": max_points,
+        "max_score": max_points * len(answers),
+        "total_score": sum(points for _, _, points in answers),
+    }
+
+
+def test_build_events_records_option_best_and_rest_score():
+    events = item_stats.build_events(_results([("T:1", "A", 5), ("T:2", None, 0), ("T:3", "C", 1)]))
+
+    assert events["question_id"].tolist() == [b"T:1", b"T:2", b"T:3"]
+    assert events["option"].tolist() == [1, 0, 3]
+    assert events["max_points"].tolist() == [5, 5, 5]
+    assert events["best"].tolist() == [1, 0, 0]
+    assert np.allclose(events["rest_score"], [1 / 10, 6 / 10, 5 / 10])
+
+
+def test_accumulate_and_merge_match_one_pass():
+    first = item_stats.build_events(_results([("T:1", "A", 5), ("T:2", "B", 3)]))
+    second = item_stats.build_events(_results([("T:2", "A", 5), ("T:3", "D", 0)]))
+
+    stats = item_stats.new_stats()
+    item_stats.merge_stats(stats, *item_stats.accumulate(first))
+    item_stats.merge_stats(stats, *item_stats.accumulate(second))
+    question_ids, acc = item_stats.accumulate(np.concatenate([first, second]))
+
+    assert stats["question_ids"].tolist() == question_ids.tolist() == [b"T:1", b"T:2", b"T:3"]
+    assert np.allclose(stats["acc"], acc)
+
+
+def test_refresh_reads_only_records_appended_since_last_time(tmp_path):
+    log = str(tmp_path / "events.bin")
+    item_stats.log_events(log, item_stats.build_events(_results([("T:1", "A", 5), ("T:2", "B", 3)])))
+    item_stats.flush_events()
+
+    stats = item_stats.refresh_stats(log)
+    assert stats["offset"] == 2 * item_stats.EVENT_DTYPE.itemsize
+
+    item_stats.log_events(log, item_stats.build_events(_results([("T:1", "C", 1)])))
+    item_stats.flush_events()
+    # A partly written record is left for the next refresh
+    with open(log, "ab") as f:
+        f.write(b"\0" * 3)
+    stats = item_stats.refresh_stats(log, chunk_records=1)
+
+    assert stats["offset"] == 3 * item_stats.EVENT_DTYPE.itemsize
+    assert item_stats.load_stats(log)["offset"] == stats["offset"]
+    rows = {row["question_id"]: row for row in item_stats.item_report(stats)}
+    assert rows["T:1"]["responses"] == 2
+    assert rows["T:1"]["pct_A"] == rows["T:1"]["pct_C"] == 50.0
+    assert rows["T:1"]["mean_points"] == 3.0
+    assert rows["T:1"]["best_rate"] == 0.5
+
+
+def test_item_report_flags_only_with_enough_responses():
+    # Everyone picks A and earns full marks: too easy, B-D dead, no discrimination
+    answers = [("T:1", "A", 5)] * item_stats.MIN_RESPONSES
+    stats = item_stats.new_stats()
+    item_stats.merge_stats(stats, *item_stats.accumulate(item_stats.build_events(_results(answers))))
+
+    (row,) = item_stats.item_report(stats)
+    assert row["responses"] == item_stats.MIN_RESPONSES
+    assert "too easy" in row["flags"]
+    assert "option B rarely chosen" in row["flags"]
+    assert row["point_biserial"] is None
+
+    few = item_stats.new_stats()
+    item_stats.merge_stats(few, *item_stats.accumulate(item_stats.build_events(_results(answers[:3]))))
+    assert item_stats.item_report(few)[0]["flags"] == ""
+
+
+def test_sessions_with_different_points_schemes_aggregate_on_one_scale():
+    # A 5-point session (full marks) and a 1-point session (best option, full marks)
+    events = np.concatenate(
+        [
+            item_stats.build_events(_results([("T:1", "A", 5), ("T:2", "D", 0)])),
+            item_stats.build_events(_results([("T:1", "A", 1), ("T:2", "B", 0)], max_points=1)),
+        ]
+    )
+    stats = item_stats.new_stats()
+    item_stats.merge_stats(stats, *item_stats.accumulate(events))
+
+    rows = {row["question_id"]: row for row in item_stats.item_report(stats)}
+    assert rows["T:1"]["mean_points"] == 5.0
+    assert rows["T:1"]["mean_points_pct"] == 100.0
+    assert rows["T:1"]["best_rate"] == 1.0
+    assert rows["T:2"]["best_rate"] == 0.0
+
+
+def test_event_log_is_opt_in(monkeypatch):
+    monkeypatch.delenv(item_stats.EVENT_LOG_ENV, raising=False)
+    assert item_stats.event_log_path() is None
+    monkeypatch.setenv(item_stats.EVENT_LOG_ENV, "")
+    assert item_stats.event_log_path() is None
+    monkeypatch.setenv(item_stats.EVENT_LOG_ENV, "events/answers.bin")
+    assert item_stats.event_log_path() == "events/answers.bin"
@@ -0,0 +1,73 @@
+import io
+import json
+import random
+
+import pytest
+
+import logic.shuffler as shuffler
+from data.loader import case_study_id_for, draw_by_case_study, get_case_studies, load_question_bank
+from tests.helpers import raw_question, wording
+
+SCENARIO = "A bank is merging three regional IT departments. " * 20
+
+
+def _load(payload) -> list:
+    return load_question_bank(io.StringIO(payload))
+
+
+def test_inline_scenarios_are_shared_and_get_content_ids():
+    questions = _load(json.dumps([raw_question(i, scenario=SCENARIO[:-1] + ".") for i in range(1, 4)]))
+
+    assert questions[0]["scenario"] is questions[1]["scenario"] is questions[2]["scenario"]
+    assert {q["case_study_id"] for q in questions} == {case_study_id_for(questions[0]["scenario"])}
+    assert case_study_id_for("") is None
+
+
+def test_case_studies_are_stored_once_and_referenced_by_id():
+    raw = [raw_question(i) for i in range(1, 4)]
+    for q in raw[:2]:
+        del q["scenario"]
+        q["case_study_id"] = "merger"
+    payload = json.dumps({"case_studies": {"merger": SCENARIO}, "questions": raw})
+
+    questions = _load(payload)
+
+    assert questions[0]["scenario"] is questions[1]["scenario"]
+    assert questions[0]["case_study_id"] == "merger"
+    assert questions[2]["case_study_id"] is None
+    assert get_case_studies(questions) == {"merger": SCENARIO}
+
+
+def test_unknown_case_study_is_rejected():
+    raw = raw_question(1)
+    del raw["scenario"]
+    raw["case_study_id"] = "missing"
+    with pytest.raises(ValueError, match="unknown case_study_id 'missing'"):
+        _load(json.dumps({"case_studies": {}, "questions": [raw]}))
+
+
+def test_shuffled_case_studies_stay_contiguous():
+    raw = [raw_question(i, scenario=f"Scenario {i % 3}", question=wording(i)) for i in range(9)]
+    questions = _load(json.dumps(raw))
+
+    for seed in range(10):
+        ordered = shuffler.shuffle_case_study_groups(questions, seed)
+        groups = [q["case_study_id"] for q in ordered]
+        runs = [g for i, g in enumerate(groups) if i == 0 or groups[i - 1] != g]
+        assert len(runs) == 3
+        assert sorted(q["id"] for q in ordered) == sorted(q["id"] for q in questions)
+    assert shuffler.shuffle_case_study_groups(questions, 4) == shuffler.shuffle_case_study_groups(questions, 4)
+
+
+def test_case_study_draws_take_whole_groups():
+    raw = [raw_question(i, scenario=f"Scenario {i // 3}", question=wording(i)) for i in range(12)]
+    questions = _load(json.dumps(raw))
+
+    for seed in range(10):
+        drawn = draw_by_case_study(questions, 7, random.Random(seed))
+        assert len({q["id"] for q in drawn}) == 7
+        groups = [q["case_study_id"] for q in drawn]
+        runs = [g for i, g in enumerate(groups) if i == 0 or groups[i - 1] != g]
+        assert len(runs) == len(set(runs)) == 3
+    with pytest.raises(ValueError, match="only 12 match"):
+        draw_by_case_study(questions, 13)
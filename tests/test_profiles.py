@@ -0,0 +1,55 @@
+import io
+
+import openpyxl
+import pytest
+
+import logic.exporter as exporter
+import logic.profiles as profiles
+import logic.scoring as scoring
+import logic.session_pool as session_pool
+from tests.helpers import make_bank, raw_question, tag_map, wording
+
+
+@pytest.mark.parametrize(
+    "name, max_score, pass_mark",
+    [("practitioner", 40, 24), ("foundation", 40, 22), ("foundation_mock", 80, 44), ("practitioner_mock", 1000, 600)],
+)
+def test_profile_numbers(name, max_score, pass_mark):
+    profile = profiles.get_profile(name)
+    assert profile["name"] == name
+    assert profiles.max_score(profile) == max_score
+    assert profiles.pass_mark(profile) == pass_mark
+    assert profiles.pass_mark(profile) <= max_score
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown exam profile"):
+        profiles.get_profile("expert")
+
+
+def test_points_scheme_overrides_bank_points():
+    scoring_block = raw_question(1)["scoring"]
+    assert scoring.build_points_lookup(scoring_block) == {"A": 5, "B": 3, "C": 1, "D": 0}
+    assert scoring.build_points_lookup(scoring_block, profiles.FOUNDATION_POINTS) == {"A": 1, "B": 0, "C": 0, "D": 0}
+
+
+def test_scorecard_records_the_profile_numbers():
+    tags = tag_map()
+    profile = {**profiles.get_profile("foundation_mock"), "question_count": 3}
+    questions = make_bank([raw_question(i, question=wording(i)) for i in range(1, 4)])
+    prepared = session_pool.prepare_questions(questions, profile, tags, seed=1)
+    answers = {"T:1": {"original_option_id": "A", "points": prepared["points_lookups"]["T:1"]["A"]}}
+    scoring.apply_live_answer(prepared["live_score"], "T:1", answers["T:1"]["points"])
+    results = scoring.build_results(
+        questions, answers, prepared["points_lookups"], profile, tags, prepared["live_score"], None, "Sam"
+    )
+
+    wb = openpyxl.load_workbook(io.BytesIO(exporter.build_scorecard(results, None)))
+    header, row = wb["Session Metadata"].iter_rows(values_only=True)
+    meta = dict(zip(header, row))
+    assert meta["total_score"] == 1
+    assert meta["max_score"] == 3
+    assert meta["pass_mark"] == 2
+    assert meta["time_limit_minutes"] == 120
+    assert meta["exam_profile"] == "foundation_mock"
+    assert meta["pass_fail"] == "FAIL"
@@ -0,0 +1,78 @@
+import data.review as review
+
+DAY = review.SECONDS_PER_DAY
+
+
+def test_quality_maps_scoring_tiers():
+    assert [review.quality_for(points, 5) for points in (5, 3, 1, 0)] == [5, 3, 1, 0]
+    assert review.quality_for(0, 0) == 0
+
+
+def test_sm2_intervals_grow_on_recall_and_reset_on_lapse():
+    schedule = review.new_schedule()
+
+    review.review_card(schedule, "T:1", 5, now=0)
+    assert schedule["cards"]["T:1"][:2] == [DAY, 1.0]
+    review.review_card(schedule, "T:1", 5, now=DAY)
+    assert schedule["cards"]["T:1"][1] == 6.0
+    review.review_card(schedule, "T:1", 5, now=7 * DAY)
+    interval, ease = schedule["cards"]["T:1"][1:3]
+    assert interval == round(6.0 * 2.7, 1) and ease == 2.8
+
+    review.review_card(schedule, "T:1", 0, now=30 * DAY)
+    due, interval, ease, reps, lapses = schedule["cards"]["T:1"]
+    assert (due, interval, reps, lapses) == (31 * DAY, 1.0, 0, 1)
+    assert ease == round(2.8 - 0.8, 3)
+
+
+def test_ease_never_drops_below_minimum():
+    schedule = review.new_schedule()
+    for day in range(10):
+        review.review_card(schedule, "T:1", 0, now=day * DAY)
+    assert schedule["cards"]["T:1"][2] == review.MIN_EASE
+
+
+def test_next_reviews_returns_earliest_due_and_skips_ineligible():
+    schedule = review.new_schedule()
+    review.record_session(
+        schedule,
+        [{"question_id": f"T:{i}", "points_earned": points} for i, points in enumerate((5, 0, 3, 1), 1)],
+        5,
+        now=0,
+    )
+    # T:2 is due again at the same time, leaving a duplicate heap entry behind
+    review.review_card(schedule, "T:2", 5, now=0)
+    review.review_card(schedule, "T:1", 5, now=DAY)
+
+    assert review.next_reviews(schedule, 1) == ["T:2"]
+    picked = review.next_reviews(schedule, 10, eligible=lambda q_id: q_id != "T:3")
+    assert sorted(picked) == ["T:1", "T:2", "T:4"]
+    assert picked[-1] == "T:1"
+    assert [schedule["cards"][q_id][0] for q_id in picked] == sorted(schedule["cards"][q_id][0] for q_id in picked)
+    # Asking again gives the same answer: the heap is left intact
+    assert review.next_reviews(schedule, 10, eligible=lambda q_id: q_id != "T:3") == picked
+    assert review.due_count(schedule, now=DAY) == 3
+    assert review.due_count(schedule, now=DAY - 1) == 0
+
+
+def test_next_reviews_skips_cards_not_yet_due():
+    schedule = review.new_schedule()
+    review.review_card(schedule, "T:1", 0, now=0)  # due at DAY
+    review.review_card(schedule, "T:2", 5, now=DAY)  # due at 2 * DAY
+
+    assert review.next_reviews(schedule, 5, now=DAY - 1) == []
+    assert review.next_reviews(schedule, 5, now=DAY) == ["T:1"]
+    assert review.next_reviews(schedule, 5, now=2 * DAY) == ["T:1", "T:2"]
+
+
+def test_rows_round_trip():
+    schedule = review.new_schedule()
+    for i in range(5):
+        review.review_card(schedule, f"T:{i}", i, now=i * DAY)
+    rows = review.to_rows(schedule)
+
+    restored = review.from_rows(rows)
+
+    assert all(len(row) == len(review.CARD_FIELDS) for row in rows)
+    assert restored["cards"] == schedule["cards"]
+    assert review.next_reviews(restored, 5) == review.next_reviews(schedule, 5)
@@ -0,0 +1,207 @@
+import random
+from collections import Counter
+
+import pytest
+
+import data.loader as loader
+import data.sampler as sampler
+import logic.profiles as profiles
+import logic.session_pool as session_pool
+from tests.helpers import make_bank, raw_question, tag_map, wording
+
+TAGS = tag_map()
+
+
+def _bank(tag_counts: dict) -> list:
+    raw, q_id = [], 1
+    for tag_id, count in tag_counts.items():
+        for _ in range(count):
+            raw.append(raw_question(q_id, tags=(tag_id,), question=wording(q_id)))
+            q_id += 1
+    return make_bank(raw)
+
+
+def _clusters(questions: list, size: int) -> dict:
+    """Pair up consecutive questions into near-duplicate clusters of size."""
+    return {q["id"]: i // size for i, q in enumerate(questions)}
+
+
+def _drawn_clusters(drawn: list, cluster_of: dict) -> list:
+    return [cluster_of[q["id"]] for q in drawn if q["id"] in cluster_of]
+
+
+def test_alias_table_samples_in_proportion_to_weights():
+    prob, alias = sampler.build_alias_table([1, 3])
+    rng = random.Random(7)
+    counts = Counter(sampler.alias_draw(prob, alias, rng) for _ in range(20000))
+    assert counts[1] / 20000 == pytest.approx(0.75, abs=0.02)
+    with pytest.raises(ValueError):
+        sampler.build_alias_table([0, 0])
+
+
+def test_weakness_weight_grows_as_a_category_gets_weaker():
+    assert sampler.weakness_weight(0, 0) == 0.5
+    assert sampler.weakness_weight(0, 20) > sampler.weakness_weight(10, 20) > sampler.weakness_weight(20, 20) > 0
+
+
+def test_adaptive_draw_without_history_or_matching_tags():
+    questions = _bank({1: 5, 2: 5})
+    index = loader.build_tag_index(questions)
+
+    drawn = sampler.draw_adaptive(questions, index, [1, 2], 10, None, TAGS, random.Random(3))
+    assert sorted(q["id"] for q in drawn) == sorted(q["id"] for q in questions)
+    with pytest.raises(ValueError, match="only 0 match"):
+        sampler.draw_adaptive(questions, index, [9], 1, None, TAGS)
+    with pytest.raises(ValueError, match="only 5 match"):
+        sampler.draw_adaptive(questions, index, [1], 6, None, TAGS)
+
+
+@pytest.mark.parametrize("n", [1, 8, 40, 60])
+def test_blueprint_quotas_sum_to_n(n):
+    quotas = sampler.compute_blueprint_quotas([1, 2, 3, 7], TAGS, n)
+    assert sum(quotas.values()) == n
+    # Heavier syllabus weights never get fewer seats
+    assert quotas.get(3, 0) >= quotas.get(1, 0)
+
+
+def test_blueprint_needs_a_weighted_category():
+    with pytest.raises(ValueError, match="no blueprint"):
+        sampler.compute_blueprint_quotas([10_000], TAGS, 8)
+
+
+def test_blueprint_draw_meets_every_quota():
+    questions = _bank({1: 6, 3: 10})
+    index = loader.build_tag_index(questions)
+    quotas = {1: 3, 3: 5}
+
+    for seed in range(20):
+        drawn = sampler.draw_blueprint(questions, index, quotas, TAGS, random.Random(seed))
+        assert Counter(q["tags"][0] for q in drawn) == quotas
+
+
+def test_blueprint_draw_counts_each_question_towards_one_quota():
+    # Every question carries both tags, so each tag's seats need distinct questions
+    questions = make_bank([raw_question(i, tags=(1, 3), question=wording(i)) for i in range(1, 5)])
+    index = loader.build_tag_index(questions)
+
+    drawn = sampler.draw_blueprint(questions, index, {1: 2, 3: 2}, TAGS, random.Random(0))
+    assert len({q["id"] for q in drawn}) == 4
+    with pytest.raises(ValueError, match="needs 3, only 2 available"):
+        sampler.draw_blueprint(questions, index, {1: 2, 3: 3}, TAGS)
+
+
+def test_blueprint_excludes_near_duplicates_within_each_stratum():
+    questions = _bank({1: 6, 3: 10})
+    index = loader.build_tag_index(questions)
+    cluster_of = _clusters(questions, 2)
+    quotas = {1: 3, 3: 5}
+
+    for seed in range(20):
+        drawn = sampler.draw_blueprint(questions, index, quotas, TAGS, random.Random(seed), cluster_of)
+        assert Counter(q["tags"][0] for q in drawn) == quotas
+        clusters = _drawn_clusters(drawn, cluster_of)
+        assert len(clusters) == len(set(clusters))
+
+
+def test_blueprint_reports_a_stratum_short_after_excluding_near_duplicates():
+    questions = _bank({1: 4})
+    with pytest.raises(ValueError, match="needs 3, only 2 available once near-duplicates are excluded"):
+        sampler.draw_blueprint(
+            questions, loader.build_tag_index(questions), {1: 3}, TAGS, cluster_of=_clusters(questions, 2)
+        )
+
+
+def test_adaptive_draw_favours_weak_categories_and_skips_near_duplicates():
+    questions = _bank({1: 20, 2: 20})
+    index = loader.build_tag_index(questions)
+    scores = {
+        TAGS[1]["name"]: {"cumulative_points": 0, "cumulative_max": 50},
+        TAGS[2]["name"]: {"cumulative_points": 50, "cumulative_max": 50},
+    }
+    cluster_of = _clusters(questions, 2)
+    counts = Counter()
+    for seed in range(50):
+        drawn = sampler.draw_adaptive(questions, index, [1, 2], 8, scores, TAGS, random.Random(seed), cluster_of)
+        assert len({q["id"] for q in drawn}) == 8
+        clusters = _drawn_clusters(drawn, cluster_of)
+        assert len(clusters) == len(set(clusters))
+        counts.update(q["tags"][0] for q in drawn)
+    assert counts[1] > 2 * counts[2]
+
+
+def test_adaptive_draw_raises_when_near_duplicates_leave_too_few():
+    questions = _bank({1: 6})
+    with pytest.raises(ValueError, match="near-duplicates"):
+        sampler.draw_adaptive(
+            questions, loader.build_tag_index(questions), [1], 4, None, TAGS, cluster_of=_clusters(questions, 2)
+        )
+
+
+def test_case_study_draw_keeps_groups_contiguous_without_near_duplicates():
+    raw = [
+        raw_question(i, tags=(1,), question=wording(i), scenario=f"Scenario {i // 3} " + wording(100 + i // 3))
+        for i in range(12)
+    ]
+    questions = make_bank(raw)
+    cluster_of = {"T:0": "x", "T:3": "x"}
+
+    for seed in range(20):
+        drawn = loader.draw_by_case_study(questions, 7, random.Random(seed), cluster_of)
+        assert len(drawn) == 7
+        assert not {"T:0", "T:3"} <= {q["id"] for q in drawn}
+        groups = [q["case_study_id"] for q in drawn]
+        # each case study appears as one contiguous run
+        runs = [g for i, g in enumerate(groups) if i == 0 or groups[i - 1] != g]
+        assert len(runs) == len(set(runs))
+
+
+def test_pooled_draws_keep_their_structure_when_avoiding_near_duplicates():
+    questions = _bank({1: 6, 3: 14})
+    bank = {
+        "questions": questions,
+        "tag_index": loader.build_tag_index(questions),
+        "near_duplicates": _clusters(questions, 2),
+    }
+    profile = {**profiles.get_profile("foundation"), "question_count": 8}
+    quotas = sampler.compute_blueprint_quotas([1, 3], TAGS, 8)
+
+    for mode in session_pool.POOLED_DRAW_MODES:
+        drawn = session_pool.draw_questions(bank, [1, 3], profile, mode, True, TAGS)
+        assert len(drawn) == 8
+        clusters = _drawn_clusters(drawn, bank["near_duplicates"])
+        assert len(clusters) == len(set(clusters))
+        if mode == "blueprint":
+            assert Counter(q["tags"][0] for q in drawn) == quotas
+
+
+def test_weakness_weight_grows_as_a_category_gets_weaker():
+    assert sampler.weakness_weight(0, 0) == 0.5
+    assert sampler.weakness_weight(0, 20) > sampler.weakness_weight(10, 20) > sampler.weakness_weight(20, 20) > 0
+
+
+def test_adaptive_draw_without_history_or_matching_tags():
+    questions = _bank({1: 5, 2: 5})
+    index = loader.build_tag_index(questions)
+
+    drawn = sampler.draw_adaptive(questions, index, [1, 2], 10, None, TAGS, random.Random(3))
+    assert sorted(q["id"] for q in drawn) == sorted(q["id"] for q in questions)
+    with pytest.raises(ValueError, match="only 0 match"):
+        sampler.draw_adaptive(questions, index, [9], 1, None, TAGS)
+    with pytest.raises(ValueError, match="only 5 match"):
+        sampler.draw_adaptive(questions, index, [1], 6, None, TAGS)
+
+
+def test_blueprint_needs_a_weighted_category():
+    with pytest.raises(ValueError, match="no blueprint"):
+        sampler.compute_blueprint_quotas([10_000], TAGS, 8)
+
+
+def test_blueprint_draw_counts_each_question_towards_one_quota():
+    # Every question carries both tags, so each tag's seats need distinct questions
+    questions = make_bank([raw_question(i, tags=(1, 3), question=wording(i)) for i in range(1, 5)])
+    index = loader.build_tag_index(questions)
+
+    drawn = sampler.draw_blueprint(questions, index, {1: 2, 3: 2}, TAGS, random.Random(0))
+    assert len({q["id"] for q in drawn}) == 4
+    with pytest.raises(ValueError, match="needs 3, only 2 available"):
+        sampler.draw_blueprint(questions, index, {1: 2, 3: 3}, TAGS)
@@ -0,0 +1,60 @@
+import io
+
+import openpyxl
+
+import logic.exporter as exporter
+import logic.importer as importer
+import logic.profiles as profiles
+import logic.scoring as scoring
+import logic.session_pool as session_pool
+from tests.helpers import make_bank, raw_question, tag_map, wording
+
+
+def _results(historical=None) -> dict:
+    tags = tag_map()
+    profile = profiles.get_profile("practitioner")
+    questions = make_bank([raw_question(i, tags=(1 + i % 3,), question=wording(i)) for i in range(1, 9)])
+    prepared = session_pool.prepare_questions(questions, profile, tags, seed=5)
+    answers = {}
+    for q_id, option_id in (("T:1", "A"), ("T:2", "B"), ("T:3", "D")):
+        answers[q_id] = {"original_option_id": option_id, "points": prepared["points_lookups"][q_id][option_id]}
+        scoring.apply_live_answer(prepared["live_score"], q_id, answers[q_id]["points"])
+    return scoring.build_results(
+        questions, answers, prepared["points_lookups"], profile, tags, prepared["live_score"], historical, "Sam"
+    )
+
+
+def test_scorecard_round_trips_every_rollup_level():
+    results = _results()
+
+    scorecard = importer.load_scorecard(io.BytesIO(exporter.build_scorecard(results, None)))
+
+    expected = scoring.carry_forward(results["category_breakdown"], results["category_rollups"])
+    assert scorecard["category_summary"] == expected["category_summary"]
+    assert scorecard["category_rollups"] == expected["category_rollups"]
+    assert set(scorecard["category_rollups"]) == {"category", "parent"}
+
+    # Imported again, the next session carries every level forward
+    again = _results(scorecard)
+    for level, summary in scorecard["category_rollups"].items():
+        for name, data in summary.items():
+            merged = again["category_rollups"][level][name]
+            assert merged["cumulative_points"] == merged["session_points"] + data["cumulative_points"]
+
+
+def test_scorecards_without_levels_load_as_tag_summaries():
+    wb = openpyxl.Workbook()
+    wb.active.title = "Session Metadata"
+    wb.create_sheet("Question Results")
+    summary = wb.create_sheet("Category Summary")
+    summary.append(["category", "session_points", "session_max", "cumulative_points", "cumulative_max"])
+    summary.append(["Preliminary Phase", 3, 5, 8, 15])
+    out = io.BytesIO()
+    wb.save(out)
+    out.seek(0)
+
+    scorecard = importer.load_scorecard(out)
+
+    assert scorecard == {"category_summary": {"Preliminary Phase": {"cumulative_points": 8, "cumulative_max": 15}}}
+    derived = scoring.derive_rollups(scorecard["category_summary"], tag_map())
+    assert derived["category"] == {"ADM Phases": {"cumulative_points": 8, "cumulative_max": 15}}
@@ -0,0 +1,115 @@
+import logic.profiles as profiles
+import logic.scoring as scoring
+import logic.session_pool as session_pool
+from data.tag_resolver import LEVELS
+from tests.helpers import make_bank, raw_question, tag_map, wording
+
+TAGS = tag_map()
+
+
+def _session():
+    questions = make_bank(
+        [raw_question(i, tags=tags, question=wording(i)) for i, tags in enumerate([(1,), (2, 3), (3,), (7, 83)], 1)]
+    )
+    profile = profiles.get_profile("practitioner")
+    prepared = session_pool.prepare_questions(questions, profile, TAGS, seed=3)
+    return questions, profile, prepared
+
+
+def _answer(prepared, answers, q_id, option_id):
+    answers[q_id] = {
+        "original_option_id": option_id,
+        "points": prepared["points_lookups"][q_id][option_id],
+    }
+    scoring.apply_live_answer(prepared["live_score"], q_id, answers[q_id]["points"])
+
+
+def test_live_score_matches_a_full_recompute_after_changed_answers():
+    questions, profile, prepared = _session()
+    live = prepared["live_score"]
+    answers = {}
+    _answer(prepared, answers, "T:1", "A")
+    _answer(prepared, answers, "T:2", "C")
+    _answer(prepared, answers, "T:2", "B")  # changed answer
+
+    max_points = profiles.max_points_per_question(profile)
+    assert live["total"] == sum(a["points"] for a in answers.values())
+    recomputed = scoring.compute_level_breakdowns(questions, answers, TAGS, max_points)
+    assert live["breakdown"] == recomputed["tag"]
+    assert live["rollups"] == {level: recomputed[level] for level in LEVELS[1:]}
+    assert live["answered_max"] == 2 * max_points
+
+
+def test_build_results_reads_the_live_score():
+    questions, profile, prepared = _session()
+    answers = {}
+    _answer(prepared, answers, "T:3", "A")
+
+    results = scoring.build_results(
+        questions, answers, prepared["points_lookups"], profile, TAGS, prepared["live_score"], None, "Sam"
+    )
+
+    assert results["total_score"] == prepared["live_score"]["total"]
+    rows = {row["question_id"]: row for row in results["per_question"]}
+    assert rows["T:3"]["points_earned"] == 5
+    assert rows["T:3"]["tier_for_option"] == {"A": "best", "B": "second_best", "C": "third_best", "D": "distractor"}
+    assert rows["T:2"]["tag_names"] == [TAGS[2]["name"], TAGS[3]["name"]]
+    for level in LEVELS[1:]:
+        merged = results["category_rollups"][level]
+        assert {name: data["session_points"] for name, data in merged.items()} == {
+            name: data["session_points"] for name, data in prepared["live_score"]["rollups"][level].items()
+        }
+
+
+def _submit(historical):
+    questions, profile, prepared = _session()
+    answers = {}
+    _answer(prepared, answers, "T:1", "A")
+    return scoring.build_results(
+        questions, answers, prepared["points_lookups"], profile, TAGS, prepared["live_score"], historical, "Sam"
+    )
+
+
+def test_old_scorecards_get_rollups_derived_from_their_tags():
+    # Two tags of the same category (and group) from a scorecard without rollups
+    old = {
+        "category_summary": {
+            TAGS[1]["name"]: {"cumulative_points": 4, "cumulative_max": 10},
+            TAGS[2]["name"]: {"cumulative_points": 6, "cumulative_max": 10},
+        }
+    }
+    category = TAGS[1]["ancestors"]["category"]
+    parent = TAGS[1]["ancestors"]["parent"]
+    assert TAGS[2]["ancestors"]["category"] == category
+
+    assert scoring.derive_rollups(old["category_summary"], TAGS) == {
+        "category": {category: {"cumulative_points": 10, "cumulative_max": 20}},
+        "parent": {parent: {"cumulative_points": 10, "cumulative_max": 20}},
+    }
+    results = _submit(old)
+    merged = results["category_rollups"]["category"][category]
+    assert merged["cumulative_points"] == merged["session_points"] + 10
+    assert merged["cumulative_max"] == merged["session_max"] + 20
+    assert results["category_rollups"]["parent"][parent]["cumulative_max"] == (
+        results["category_rollups"]["parent"][parent]["session_max"] + 20
+    )
+
+
+def test_new_scorecards_use_their_recorded_rollups():
+    category = TAGS[1]["ancestors"]["category"]
+    new = {
+        "category_summary": {TAGS[1]["name"]: {"cumulative_points": 4, "cumulative_max": 10}},
+        "category_rollups": {"category": {category: {"cumulative_points": 7, "cumulative_max": 15}}},
+    }
+
+    results = _submit(new)
+
+    merged = results["category_rollups"]["category"][category]
+    assert merged["cumulative_points"] == merged["session_points"] + 7
+    # A level missing from the scorecard carries nothing forward
+    parent = TAGS[1]["ancestors"]["parent"]
+    data = results["category_rollups"]["parent"][parent]
+    assert data["cumulative_max"] == data["session_max"]
+    assert scoring.carry_forward(results["category_breakdown"], results["category_rollups"])[
+        "category_rollups"
+    ]["category"][category]["cumulative_points"] == merged["cumulative_points"]
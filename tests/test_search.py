@@ -0,0 +1,73 @@
+import numpy as np
+
+from data.loader import build_tag_index
+from data.search import build_search_index, page_of, search, search_banks, tag_mask, tokenize
+from tests.helpers import make_bank, raw_question
+
+
+def _questions():
+    stems = [
+        "Which stakeholder owns the architecture vision?",
+        "How is the architecture repository governed?",
+        "Which gap analysis technique applies to the baseline?",
+        "Who approves the statement of architecture work?",
+    ]
+    return make_bank([raw_question(i, tags=(i % 2 + 1,), question=stem) for i, stem in enumerate(stems, 1)])
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("The Architecture of a Vision!") == ["architecture", "vision"]
+
+
+def test_search_scores_only_matching_questions():
+    questions = _questions()
+    index = build_search_index(questions)
+
+    positions, scores = search(index, "gap analysis")
+    assert positions.tolist() == [2]
+    assert scores[0] > 0
+
+    positions, scores = search(index, "architecture vision")
+    # The vision question matches both terms, so it ranks first
+    assert positions[page_of(scores, 0, 1)].tolist() == [0]
+    assert set(positions.tolist()) == {0, 1, 3}
+
+
+def test_tag_mask_filters_hits_and_browses_without_a_query():
+    questions = _questions()
+    index = build_search_index(questions)
+    mask = tag_mask(build_tag_index(questions), [1], len(questions))
+
+    assert mask.tolist() == [False, True, False, True]
+    positions, _ = search(index, "architecture", mask)
+    assert set(positions.tolist()) == {1, 3}
+    positions, scores = search(index, "", mask)
+    assert positions.tolist() == [1, 3]
+    assert not scores.any()
+
+
+def test_page_of_sorts_only_the_requested_page():
+    scores = np.array([0.5, 2.0, 1.0, 2.0, 0.1], dtype=np.float32)
+
+    assert page_of(scores, 0, 2).tolist() == [1, 3]  # ties keep bank order
+    assert page_of(scores, 1, 2).tolist() == [2, 0]
+    assert page_of(scores, 2, 2).tolist() == [4]
+    assert page_of(scores, 3, 2).tolist() == []
+    assert page_of(np.zeros(3, dtype=np.float32), 0, 2).tolist() == [0, 1]
+
+
+def test_banks_are_scored_as_one_collection():
+    questions = _questions()
+    split = [questions[:1], questions[1:]]
+    query = "architecture vision baseline"
+
+    banks, positions, scores = search_banks(
+        [build_search_index(part) for part in split], query, [None, np.array([True, False, True])]
+    )
+
+    whole_positions, whole_scores = search(build_search_index(questions), query)
+    expected = {int(p): s for p, s in zip(whole_positions, whole_scores) if p != 2}
+    got = {int(p) + (1 if b else 0): s for b, p, s in zip(banks, positions, scores)}
+    assert set(got) == set(expected)
+    for position, score in expected.items():
+        assert np.isclose(got[position], score)
@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+import pytest
+
+import data.catalog as catalog
+import data.seen as seen
+from tests.helpers import raw_question, wording, write_bank
+
+
+def _combined(tmp_path, n: int = 10, name: str = "S") -> dict:
+    raw = [raw_question(i, tags=(1 if i <= n // 2 else 2,), question=wording(i)) for i in range(1, n + 1)]
+    entry = catalog.load_banks([write_bank(tmp_path / f"{name}.json", raw)])[name]
+    return catalog.combined_bank([entry])
+
+
+def _ids(questions: list) -> set:
+    return {q["source_id"] for q in questions}
+
+
+def _session(combined: dict, source_ids) -> list:
+    return [q for q in combined["questions"] if q["source_id"] in set(source_ids)]
+
+
+def test_set_bit_at_rank_counts_from_the_lowest_bit():
+    assert [seen._set_bit_at_rank(0b101100, rank) for rank in range(3)] == [2, 3, 5]
+    with pytest.raises(ValueError):
+        seen._set_bit_at_rank(0b1, 1)
+
+
+def test_draws_take_unseen_questions_before_the_least_recently_seen(tmp_path):
+    combined = _combined(tmp_path)
+    record = seen.new_record()
+    seen.record_session(record, _session(combined, range(1, 6)))
+    seen.record_session(record, _session(combined, range(6, 9)))
+
+    rng = random.Random(0)
+    assert _ids(seen.draw_unseen_first(combined, [], 2, record, rng=rng)) == {9, 10}
+    drawn = _ids(seen.draw_unseen_first(combined, [], 5, record, rng=rng))
+    assert {9, 10} < drawn and drawn - {9, 10} <= set(range(1, 6))
+    assert len(seen.draw_unseen_first(combined, [], 10, record, rng=rng)) == 10
+
+
+def test_draws_respect_categories_and_clusters(tmp_path):
+    combined = _combined(tmp_path)
+
+    assert _ids(seen.draw_unseen_first(combined, [2], 5, None)) == {6, 7, 8, 9, 10}
+    with pytest.raises(ValueError, match="only 5 match"):
+        seen.draw_unseen_first(combined, [1], 6, None)
+
+    cluster_of = {q["id"]: "c" for q in _session(combined, (6, 7))}
+    assert len(_ids(seen.draw_unseen_first(combined, [2], 4, None, cluster_of)) & {6, 7}) == 1
+    with pytest.raises(ValueError, match="near-duplicates"):
+        seen.draw_unseen_first(combined, [2], 5, None, cluster_of)
+
+
+def test_old_generations_are_merged_and_counted_once(tmp_path):
+    combined = _combined(tmp_path, n=100)
+    record = seen.new_record()
+    for start in range(0, 100, 10):
+        seen.record_session(record, _session(combined, range(start + 1, start + 11)))
+    seen.record_session(record, _session(combined, range(1, 11)))
+
+    assert len(record["S"]) == seen.MAX_GENERATIONS
+    assert seen.seen_count(record) == 100
+    # The first sessions were merged into the oldest generation
+    assert int(np.bitwise_count(record["S"][-1]).sum()) == 40
+
+
+def test_rows_round_trip_across_split_cells(tmp_path, monkeypatch):
+    combined = _combined(tmp_path, n=2000)
+    record = seen.new_record()
+    rng = random.Random(0)
+    for _ in range(2):
+        seen.record_session(record, _session(combined, rng.sample(range(1, 2001), 500)))
+    monkeypatch.setattr(seen, "_CHUNK_CHARS", 16)
+
+    rows = seen.to_rows(record)
+    restored = seen.from_rows(rows)
+
+    assert len(rows) > 2 * len(record["S"])
+    assert all(len(row) == len(seen.SEEN_FIELDS) for row in rows)
+    assert [bits.tolist() for bits in restored["S"]] == [bits.tolist() for bits in record["S"]]
+    with pytest.raises(ValueError, match="does not decode"):
+        seen.from_rows([["S", 0, "bm90IHpsaWI="]])
@@ -0,0 +1,74 @@
+import copy
+
+import data.catalog as catalog
+import logic.profiles as profiles
+import logic.session_pool as session_pool
+from tests.helpers import raw_question, tag_map, wording, write_bank
+
+
+def _entries(tmp_path):
+    path = write_bank(tmp_path / "P.json", [raw_question(i, tags=(2,), question=wording(i)) for i in range(1, 13)])
+    return list(catalog.load_banks([path]).values())
+
+
+def test_sessions_are_prepared_independently_and_reproducibly(tmp_path):
+    entries = _entries(tmp_path)
+    profile = profiles.get_profile("practitioner")
+    questions = entries[0]["questions"][: profile["question_count"]]
+
+    first = session_pool.prepare_session(questions, profile, tag_map(), seed=42)
+    again = session_pool.prepare_session(questions, profile, tag_map(), seed=42)
+    other = session_pool.prepare_session(questions, profile, tag_map())
+
+    assert [q["id"] for q in first["questions"]] == [q["id"] for q in again["questions"]]
+    assert first["shuffle_maps"] == again["shuffle_maps"]
+    assert other["seed"] != 42
+    assert set(first["points_lookups"]) == {q["id"] for q in questions}
+
+
+def test_take_session_serves_each_prepared_session_once(tmp_path):
+    entries = _entries(tmp_path)
+    profile = profiles.get_profile("practitioner")
+    tags = tag_map()
+
+    taken = [session_pool.take_session(entries, [2], profile, "random", True, tags) for _ in range(3)]
+
+    assert len({id(prepared) for prepared in taken}) == 3
+    assert all(len(prepared["questions"]) == profile["question_count"] for prepared in taken)
+
+
+def test_a_reloaded_tag_map_is_a_new_pool_key(tmp_path):
+    entries = _entries(tmp_path)
+    profile = profiles.get_profile("practitioner")
+    tags = tag_map()
+    reloaded = copy.deepcopy(tags)
+
+    key = session_pool.session_key(entries, [2], profile, "random", False, tags)
+    assert key == session_pool.session_key(entries, [2], profile, "random", False, tags)
+    assert key != session_pool.session_key(entries, [2], profile, "random", False, reloaded)
+
+
+def test_a_failing_build_drops_only_its_own_pool(tmp_path, monkeypatch):
+    entries = _entries(tmp_path)
+    profile = profiles.get_profile("practitioner")
+    tags = tag_map()
+    session_pool.take_session(entries, [2], profile, "random", False, tags)
+    session_pool.take_session(entries, [2], profile, "random", True, tags)
+    broken = session_pool.session_key(entries, [2], profile, "random", False, tags)
+    healthy = session_pool.session_key(entries, [2], profile, "random", True, tags)
+    build = session_pool._build
+
+    def flaky_build(spec):
+        if not spec["avoid_near_duplicates"]:
+            raise RuntimeError("boom")
+        return build(spec)
+
+    monkeypatch.setattr(session_pool, "_build", flaky_build)
+    with session_pool._pool_lock:
+        session_pool._pools[broken]["ready"].clear()
+        session_pool._pools[healthy]["ready"].clear()
+    session_pool._refill(broken)
+    session_pool._refill(healthy)
+
+    assert broken not in session_pool._pools
+    assert len(session_pool._pools[healthy]["ready"]) >= session_pool.POOL_DEPTH
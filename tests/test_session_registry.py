@@ -0,0 +1,100 @@
+import collections
+
+import pytest
+
+import logic.session_registry as registry
+
+HOUR = 3600
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(registry, "_sessions", {})
+    monkeypatch.setattr(registry, "_reserved", {})
+    monkeypatch.setattr(registry, "_waiting", collections.OrderedDict())
+    monkeypatch.setattr(registry, "_last_sweep", float("inf"))  # sweep only when a test asks
+    for env in (registry.MAX_ACTIVE_EXAMS_ENV, registry.IDLE_TTL_ENV, registry.MEMORY_BUDGET_ENV):
+        monkeypatch.delenv(env, raising=False)
+
+
+def _finished(points: int = 3) -> dict:
+    breakdown = {"Phase A": {"session_points": points, "session_max": 5, "cumulative_points": points, "cumulative_max": 5}}
+    return {"results": {"category_breakdown": breakdown}, "questions": [{"id": "T:1"}] * 50, "question_bank": ["bank"]}
+
+
+def test_deep_size_counts_shared_objects_once_and_skips_excluded():
+    shared = ["x" * 1000]
+    state = {"a": shared, "b": shared}
+
+    seen = set()
+    first = registry.deep_size(state, seen=seen)
+    assert registry.deep_size({"c": shared}, seen=seen) < first
+    assert registry.deep_size(state) - registry.deep_size(state, exclude={id(shared)}) > 1000
+
+
+def test_exam_slots_admit_waiters_first_come_first_served(monkeypatch):
+    monkeypatch.setenv(registry.MAX_ACTIVE_EXAMS_ENV, "1")
+
+    assert registry.acquire_exam_slot("a", now=0)
+    registry.touch("a", {"session_active": True}, now=1)
+    assert not registry.acquire_exam_slot("b", now=2)
+    assert not registry.acquire_exam_slot("c", now=3)
+    assert (registry.queue_position("b"), registry.queue_position("c")) == (1, 2)
+    assert registry.active_exam_count(now=3) == 1
+
+    registry.touch("a", {"session_active": False}, now=4)
+    assert not registry.acquire_exam_slot("c", now=5)  # b is still ahead
+    assert registry.acquire_exam_slot("b", now=6)
+    # b's reserved place counts until its exam starts
+    assert not registry.acquire_exam_slot("c", now=7)
+    assert registry.queue_position("c") == 1
+
+
+def test_resumed_exams_take_a_place_and_are_refused_at_the_cap(monkeypatch):
+    monkeypatch.setenv(registry.MAX_ACTIVE_EXAMS_ENV, "1")
+    registry.touch("a", {"session_active": True, "session_id": "exam-a"}, now=0)
+
+    assert not registry.resume_exam_slot("b", "exam-b", now=1)
+    # The same exam reopened in a new tab replaces its old tab's place
+    assert registry.resume_exam_slot("c", "exam-a", now=1)
+    registry.touch("c", {"session_active": True, "session_id": "exam-a"}, now=2)
+    assert registry.active_exam_count(now=2) == 1
+    assert not registry.acquire_exam_slot("d", now=3)
+
+
+def test_stale_waiters_and_abandoned_exams_free_their_places(monkeypatch):
+    monkeypatch.setenv(registry.MAX_ACTIVE_EXAMS_ENV, "1")
+    registry.touch("a", {"session_active": True}, now=0)
+    assert not registry.acquire_exam_slot("b", now=1)
+
+    # b stops polling; c is served once a's tab has been silent long enough
+    later = registry.ABANDONED_EXAM_SECONDS
+    assert registry.acquire_exam_slot("c", now=later)
+    assert registry.queue_position("b") == 0
+
+
+def test_sweep_evicts_idle_sessions_and_carries_scores_forward():
+    idle, running = _finished(), {"session_active": True, "start_time": 0, "time_limit_seconds": 3 * HOUR}
+    registry.touch("idle", idle, now=0)
+    registry.touch("running", running, now=0)
+
+    assert registry.sweep(now=2 * HOUR) == ["idle"]
+    assert idle["_persistent_scorecard"] == {
+        "category_summary": {"Phase A": {"cumulative_points": 3, "cumulative_max": 5}}
+    }
+    assert idle["_evicted"] and "results" not in idle and "question_bank" not in idle
+    # An unfinished exam is kept until its deadline has passed
+    assert registry.sweep(now=4 * HOUR) == ["running"]
+    assert registry.session_sizes() == {}
+
+
+def test_memory_budget_evicts_oldest_idle_finished_sessions_first(monkeypatch):
+    for key, last_seen in (("old", 0), ("newer", 100), ("recent", 1000)):
+        registry.touch(key, _finished(), now=last_seen)
+    sizes = registry.session_sizes()
+    # Room for two sessions
+    budget = sizes["old"]["total"] + sizes["newer"]["total"] + 1
+    monkeypatch.setenv(registry.MEMORY_BUDGET_ENV, str(budget / 1024 / 1024))
+
+    assert registry.sweep(now=1100) == ["old"]
+    assert set(registry.session_sizes()) == {"newer", "recent"}
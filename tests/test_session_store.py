@@ -0,0 +1,70 @@
+import io
+import time
+
+import pytest
+
+import data.session_store as session_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    return session_store.directory_store(str(tmp_path / "sessions"))
+
+
+SESSION_ID = "AbCdEfGhIjKlMnOp"
+
+
+@pytest.mark.parametrize("bad_id", ["../../etc/x", "short", "a" * 65, "abc/defghijklmnopq", None, 123])
+def test_invalid_session_ids_never_reach_the_store(bad_id):
+    def fail(*args):
+        raise AssertionError("store called")
+
+    trap = {"name": "trap", "get": fail, "put": fail, "delete": fail}
+    for call in (
+        lambda: session_store.load_snapshot(trap, bad_id),
+        lambda: session_store.save_snapshot(trap, bad_id, {}),
+        lambda: session_store.delete_snapshot(trap, bad_id),
+    ):
+        with pytest.raises(ValueError):
+            call()
+
+
+def test_pending_snapshot_is_readable_before_it_is_written(store):
+    session_store.save_snapshot(store, SESSION_ID, {"v": 1})
+    session_store.save_snapshot(store, SESSION_ID, {"v": 2})
+    assert session_store.load_snapshot(store, SESSION_ID) == {"v": 2}
+    session_store.flush_snapshots()
+    assert store["get"](SESSION_ID) == b'{"v":2}'
+    session_store.delete_snapshot(store, SESSION_ID)
+    assert session_store.load_snapshot(store, SESSION_ID) is None
+    session_store.flush_snapshots()
+    assert store["get"](SESSION_ID) is None
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = session_store.sqlite_store(str(tmp_path / "s.db"))
+    store["put"](SESSION_ID, b"data")
+    assert store["get"](SESSION_ID) == b"data"
+    store["delete"](SESSION_ID)
+    assert store["get"](SESSION_ID) is None
+
+
+def test_expired_directory_snapshot_is_ignored(store, monkeypatch):
+    store["put"](SESSION_ID, b"{}")
+    monkeypatch.setattr(time, "time", lambda: 1e12)
+    assert store["get"](SESSION_ID) is None
+
+
+def test_resp_replies():
+    assert session_store._read_reply(io.BytesIO(b"$5\r\nhello\r\n")) == b"hello"
+    assert session_store._read_reply(io.BytesIO(b"$-1\r\n")) is None
+    assert session_store._read_reply(io.BytesIO(b"+OK\r\n")) == b"OK"
+    with pytest.raises(OSError):
+        session_store._read_reply(io.BytesIO(b"-ERR wrong\r\n"))
+    with pytest.raises(OSError):
+        session_store._read_reply(io.BytesIO(b""))
+
+
+def test_open_store_rejects_unknown_spec():
+    with pytest.raises(ValueError):
+        session_store.open_store("ftp://x")
@@ -0,0 +1,92 @@
+import json
+import time
+
+import pytest
+
+import data.review as review
+import logic.profiles as profiles
+import logic.session_pool as session_pool
+import logic.snapshot as snapshot
+from tests.helpers import make_bank, raw_question, tag_map, write_bank
+
+
+@pytest.fixture
+def bank_dir(tmp_path):
+    write_bank(tmp_path / "T.json", [raw_question(i, tags=(1 + i % 3,)) for i in range(1, 11)])
+    return str(tmp_path)
+
+
+def _running_state(tags: dict) -> dict:
+    questions = make_bank([raw_question(i, tags=(1 + i % 3,)) for i in range(1, 11)])[:4]
+    profile = profiles.get_profile("practitioner")
+    prepared = session_pool.prepare_questions(questions, profile, tags, 42)
+    q_id = questions[1]["id"]
+    return {
+        **prepared,
+        "session_id": "AbCdEfGhIjKlMnOp",
+        "user_name": "Sam",
+        "exam_profile": profile,
+        "session_banks": ["T"],
+        "session_seed": 42,
+        "answers": {q_id: {"original_option_id": "B", "display_idx": 0, "points": 3}},
+        "flags": {q_id},
+        "start_time": time.time(),
+        "time_limit_seconds": 600,
+        "time_extension_used": False,
+        "current_question_idx": 1,
+    }
+
+
+def test_restore_round_trip(bank_dir):
+    tags = tag_map()
+    state = _running_state(tags)
+    saved = json.loads(json.dumps(snapshot.build_snapshot(state)))
+    restored = snapshot.restore_state(saved, tags, bank_dir)
+    assert [q["id"] for q in restored["questions"]] == [q["id"] for q in state["questions"]]
+    assert restored["shuffled_options"] == state["shuffled_options"]
+    q_id = state["questions"][1]["id"]
+    assert restored["answers"][q_id]["points"] == 3
+    assert restored["live_score"]["total"] == 3
+    assert restored["flags"] == {q_id}
+    assert restored["current_question_idx"] == 1
+
+
+def test_per_user_rows_live_in_the_user_record(bank_dir):
+    tags = tag_map()
+    state = _running_state(tags)
+    schedule = review.new_schedule()
+    review.review_card(schedule, state["questions"][0]["id"], 5, now=0)
+    state["review_schedule"] = schedule
+
+    saved = json.loads(json.dumps(snapshot.build_snapshot(state)))
+    user_record = json.loads(json.dumps(snapshot.build_user_record(state)))
+    assert "review_schedule" not in saved
+    assert snapshot.build_user_record(_running_state(tags)) is None
+    assert snapshot.user_record_id("AbCdEfGhIjKlMnOp") != "AbCdEfGhIjKlMnOp"
+
+    restored = snapshot.restore_state(saved, tags, bank_dir, user_record)
+    assert restored["review_schedule"]["cards"] == schedule["cards"]
+    assert "review_schedule" not in snapshot.restore_state(saved, tags, bank_dir)
+    with pytest.raises(ValueError):
+        snapshot.restore_state(saved, tags, bank_dir, {"version": 0})
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda s: s.pop("question_ids"),
+        lambda s: s.update(answers={"T:1": "Z"}),
+        lambda s: s.update(answers={"T:99": "A"}),
+        lambda s: s.update(answers=[]),
+        lambda s: s.update(question_ids=["T:404"]),
+        lambda s: s.update(banks=["Gone"]),
+        lambda s: s.update(exam_profile="nope"),
+        lambda s: s.update(version=0),
+    ],
+)
+def test_foreign_or_stale_snapshots_raise_value_error(bank_dir, corrupt):
+    tags = tag_map()
+    saved = json.loads(json.dumps(snapshot.build_snapshot(_running_state(tags))))
+    corrupt(saved)
+    with pytest.raises(ValueError):
+        snapshot.restore_state(saved, tags, bank_dir)
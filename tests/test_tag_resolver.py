@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from data.tag_resolver import get_level_names_for_question, load_tags, parse_syllabus_weight
+
+CSV = """tag_id,tag_name,tag_category,parent_category,syllabus_weight
+1,Phase A,ADM Phases,Primary,10-15%
+2,Phase B,ADM Phases,Primary,30%
+3,Gap Analysis,ADM Techniques,,N/A
+"""
+
+
+@pytest.mark.parametrize(
+    "value, expected", [("10-15%", 0.125), ("30%", 0.3), (" 20 - 30 % ", 0.25), ("N/A", None), (None, None)]
+)
+def test_parse_syllabus_weight(value, expected):
+    assert parse_syllabus_weight(value) == (pytest.approx(expected) if expected else None)
+
+
+def test_load_tags_reads_weights_and_ancestors():
+    tags = load_tags(io.StringIO(CSV))
+
+    assert tags[1]["syllabus_weight"] == pytest.approx(0.125)
+    assert tags[3]["syllabus_weight"] is None
+    assert tags[1]["ancestors"] == {"tag": "Phase A", "category": "ADM Phases", "parent": "Primary"}
+    assert tags[3]["ancestors"] == {"tag": "Gap Analysis", "category": "ADM Techniques"}
+
+
+def test_a_category_with_two_parents_is_rejected():
+    with pytest.raises(ValueError, match="more than one parent_category"):
+        load_tags(io.StringIO(CSV + "4,Phase C,ADM Phases,Secondary,\n"))
+
+
+def test_missing_required_columns_are_reported():
+    with pytest.raises(ValueError, match="'tag_category'"):
+        load_tags(io.StringIO("tag_id,tag_name\n1,A\n"))
+
+
+def test_level_names_count_a_shared_category_once():
+    tags = load_tags(io.StringIO(CSV))
+
+    assert get_level_names_for_question({"tags": [1, 2, 3, 99]}, tags) == {
+        "tag": ["Phase A", "Phase B", "Gap Analysis"],
+        "category": ["ADM Phases", "ADM Techniques"],
+        "parent": ["Primary"],
+    }
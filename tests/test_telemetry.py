@@ -0,0 +1,60 @@
+import logic.telemetry as telemetry
+
+
+def test_ring_buffer_keeps_the_newest_events_in_order():
+    log = telemetry.new_log(capacity=3)
+    for t in range(5):
+        telemetry.record(log, telemetry.ANSWER, "T:1", now=t)
+
+    assert [event[0] for event in telemetry.events(log)] == [2, 3, 4]
+    assert len(log["events"]) == 3
+    assert telemetry.summarize(log, ["T:1"], now=5)["dropped_events"] == 2
+
+
+def test_repeated_views_of_the_same_question_record_nothing():
+    log = telemetry.new_log()
+    for t in range(3):
+        telemetry.record_view(log, "T:1", now=t)
+    telemetry.record_view(log, "T:2", now=3)
+
+    assert telemetry.events(log) == [(0, telemetry.VIEW, "T:1"), (3, telemetry.VIEW, "T:2")]
+
+
+def test_summarize_replays_dwell_visits_changes_and_flags():
+    log = telemetry.new_log()
+    telemetry.record_view(log, "T:1", now=0)
+    telemetry.record(log, telemetry.ANSWER, "T:1", now=5)
+    telemetry.record(log, telemetry.FLAG, "T:1", now=6)
+    telemetry.record_view(log, "T:2", now=10)
+    telemetry.record(log, telemetry.ANSWER, "T:2", now=12)
+    telemetry.record_view(log, "T:1", now=30)
+    telemetry.record(log, telemetry.ANSWER, "T:1", now=31)
+    telemetry.record(log, telemetry.UNFLAG, "T:1", now=32)
+    telemetry.record(log, telemetry.ANSWER, "T:9", now=33)  # not in this session
+
+    summary = telemetry.summarize(log, ["T:1", "T:2", "T:3"], now=40.04)
+
+    assert summary["per_question"] == {
+        "T:1": {
+            "dwell_seconds": 20.0,
+            "visits": 2,
+            "answer_changes": 1,
+            "flag_changes": 2,
+            "revisited_after_flag": True,
+        },
+        "T:2": {
+            "dwell_seconds": 20.0,
+            "visits": 1,
+            "answer_changes": 0,
+            "flag_changes": 0,
+            "revisited_after_flag": False,
+        },
+        "T:3": {
+            "dwell_seconds": 0.0,
+            "visits": 0,
+            "answer_changes": 0,
+            "flag_changes": 0,
+            "revisited_after_flag": False,
+        },
+    }
+    assert summary["dropped_events"] == 0
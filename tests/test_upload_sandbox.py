@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+import data.upload_sandbox as upload_sandbox
+from tests.helpers import bank_json, raw_question
+
+
+def _wait(job: dict, timeout: float = 60) -> dict:
+    deadline = time.monotonic() + timeout
+    while job["state"] not in ("done", "failed"):
+        assert time.monotonic() < deadline, "validation did not finish"
+        time.sleep(0.05)
+    return job
+
+
+def test_check_nesting_rejects_deep_json():
+    upload_sandbox.check_nesting(b'[{"a": [1, {"b": "[[[[[[[["}]}]', max_depth=4)
+    with pytest.raises(ValueError):
+        upload_sandbox.check_nesting(b"[" * 5 + b"]" * 5, max_depth=4)
+
+
+def test_validate_reports_progress_then_entry():
+    messages = []
+    data = bank_json([raw_question(1), raw_question(2, tags=(2,))]).encode()
+    upload_sandbox._validate(data, False, messages.append)
+    assert messages[-1][0] == "done"
+    assert [q["id"] for q in messages[-1][1]["questions"]] == ["upload:1", "upload:2"]
+    assert all(kind == "progress" for kind, *_ in messages[:-1])
+
+
+def test_validate_reports_invalid_bank():
+    messages = []
+    upload_sandbox._validate(b'[{"id": 1}]', False, messages.append)
+    assert messages[-1][0] == "error"
+
+
+def test_same_bytes_in_another_format_are_validated_separately():
+    # One line holding a JSON array: a valid JSON bank, an invalid JSON Lines one
+    data = bank_json([raw_question(1), raw_question(2)]).encode()
+    as_json = _wait(upload_sandbox.validate_upload(data, json_lines=False))
+    as_lines = _wait(upload_sandbox.validate_upload(data, json_lines=True))
+    assert as_json["state"] == "done"
+    assert as_lines["state"] == "failed"
+    assert upload_sandbox.validate_upload(data, json_lines=False) is as_json
+
+
+def test_oversized_upload_fails_without_a_worker(monkeypatch):
+    monkeypatch.setenv(upload_sandbox.UPLOAD_MAX_MB_ENV, "1")
+    job = upload_sandbox.validate_upload(b" " * (2 * 1024 * 1024))
+    assert job["state"] == "failed" and "larger than 1 MB" in job["error"]
+
+
+def test_uploads_beyond_the_pending_cap_are_turned_away_uncached(monkeypatch):
+    monkeypatch.setattr(upload_sandbox, "_jobs", upload_sandbox.collections.OrderedDict())
+    monkeypatch.setattr(upload_sandbox, "MAX_PENDING_VALIDATIONS", 1)
+    upload_sandbox._jobs["other:json"] = {"state": "running", "entry": None}
+    data = bank_json([raw_question(1)]).encode()
+
+    job = upload_sandbox.validate_upload(data)
+    assert job["state"] == "failed" and "try again" in job["error"]
+    assert upload_sandbox.upload_key(data) not in upload_sandbox._jobs
+
+    del upload_sandbox._jobs["other:json"]
+    assert _wait(upload_sandbox.validate_upload(data))["state"] == "done"
+
+
+def test_a_timed_out_worker_is_not_cached(monkeypatch):
+    monkeypatch.setattr(upload_sandbox, "_jobs", upload_sandbox.collections.OrderedDict())
+    monkeypatch.setattr(upload_sandbox, "TIME_LIMIT_SECONDS", 0)
+    data = bank_json([raw_question(1)]).encode()
+
+    job = _wait(upload_sandbox.validate_upload(data))
+    assert job["state"] == "failed" and "longer than" in job["error"]
+    assert upload_sandbox.upload_key(data) not in upload_sandbox._jobs